@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """ Package for handling alignments files, detected faces and aligned faces along with their
 associated objects. """
-from .aligned_face import AlignedFace, _EXTRACT_RATIOS, get_matrix_scaling, get_centered_size, PoseEstimate, transform_image  # noqa
+from .aligned_face import AlignedFace, _EXTRACT_RATIOS, align_faces, get_alignment_matrices, get_matrix_scaling, get_centered_size, PoseEstimate, transform_image  # noqa
 from .alignments import Alignments  # noqa
 from .detected_face import BlurMask, DetectedFace, Mask, update_legacy_png_header  # noqa
@@ -116,6 +116,82 @@ def transform_image(image, matrix, size, padding=0):
     return retval
 
 
+def get_alignment_matrices(landmarks):
+    """ Obtain the legacy centered alignment matrices for a batch of faces in a single vectorized
+    pass.
+
+    Parameters
+    ----------
+    landmarks: :class:`numpy.ndarray`
+        The (`N`, 68, 2) original landmarks for each face
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The (`N`, 2, 3) transformation matrices for aligning each face to the mean face
+    """
+    landmarks = np.asarray(landmarks)
+    retval = _umeyama_batch(landmarks[:, 17:], _MEAN_FACE, True)[:, 0:2]
+    logger.trace("landmarks shape: %s, matrices: %s", landmarks.shape, retval)
+    return retval
+
+
+def align_faces(landmarks, images=None, centering="face", size=64, coverage_ratio=1.0,
+                dtype=None, matrices=None, feed=None):
+    """ Align a batch of faces.
+
+    The alignment matrices for all of the faces are calculated in a single vectorized pass,
+    rather than individually for each :class:`AlignedFace`.
+
+    Parameters
+    ----------
+    landmarks: :class:`numpy.ndarray`
+        The (`N`, 68, 2) original landmarks for each face
+    images: list, optional
+        The original frame that contains each face. The same frame should be passed for each face
+        that it contains. ``None`` if the aligned faces are not to be generated. Default: ``None``
+    centering: ["legacy", "face", "head"], optional
+        The type of extracted face that should be loaded. Default: `"face"`
+    size: int, optional
+        The size in pixels, of each edge of the final aligned faces. Default: `64`
+    coverage_ratio: float, optional
+        The amount of the aligned image to return. Default: `1.0`
+    dtype: str, optional
+        Set a data type for the final faces to be returned as. Passing ``None`` will return faces
+        with the same data type as the original images. Default: ``None``
+    matrices: :class:`numpy.ndarray`, optional
+        The (`N`, 2, 3) alignment matrices for the faces, if they have already been obtained from
+        :func:`get_alignment_matrices`. ``None`` to calculate them. Default: ``None``
+    feed: :class:`numpy.ndarray`, optional
+        A (`N`, `size`, `size`, 3) `float32` array to place the first 3 channels of each aligned
+        face into, scaled to the range 0.0 - 1.0, ready for feeding into a model. Only used if
+        :attr:`images` are provided. Default: ``None``
+
+    Returns
+    -------
+    list
+        The :class:`AlignedFace` object for each of the given landmarks
+    """
+    logger.trace("Aligning faces: (count: %s, centering: '%s', size: %s, coverage_ratio: %s, "
+                 "dtype: %s, feed: %s)", len(landmarks), centering, size, coverage_ratio, dtype,
+                 feed if feed is None else feed.shape)
+    if matrices is None:
+        matrices = get_alignment_matrices(landmarks)
+    retval = []
+    for idx, (points, matrix) in enumerate(zip(landmarks, matrices)):
+        face = AlignedFace(points,
+                           image=None if images is None else images[idx],
+                           centering=centering,
+                           size=size,
+                           coverage_ratio=coverage_ratio,
+                           dtype=dtype,
+                           legacy_matrix=matrix)
+        if feed is not None and face.face is not None:
+            np.divide(face.face[..., :3], 255., out=feed[idx], casting="unsafe")
+        retval.append(face)
+    return retval
+
+
 class AlignedFace():
     """ Class to align a face.
 
@@ -147,19 +223,25 @@ class AlignedFace():
     is_aligned_face: bool, optional
         Indicates that the :attr:`image` is an aligned face rather than a frame.
         Default: ``False``
+    legacy_matrix: :class:`numpy.ndarray`, optional
+        The 2x3 legacy centered alignment matrix for the given landmarks, if it has already been
+        calculated (see :func:`get_alignment_matrices`). ``None`` to calculate the matrix.
+        Default: ``None``
     """
     def __init__(self, landmarks, image=None, centering="face", size=64, coverage_ratio=1.0,
-                 dtype=None, is_aligned=False):
+                 dtype=None, is_aligned=False, legacy_matrix=None):
         logger.trace("Initializing: %s (image shape: %s, centering: '%s', size: %s, "
-                     "coverage_ratio: %s, dtype: %s, is_aligned: %s)", self.__class__.__name__,
-                     image if image is None else image.shape, centering, size, coverage_ratio,
-                     dtype, is_aligned)
+                     "coverage_ratio: %s, dtype: %s, is_aligned: %s, legacy_matrix: %s)",
+                     self.__class__.__name__, image if image is None else image.shape, centering,
+                     size, coverage_ratio, dtype, is_aligned, legacy_matrix)
         self._frame_landmarks = landmarks
         self._centering = centering
         self._size = size
         self._dtype = dtype
         self._is_aligned = is_aligned
-        self._matrices = dict(legacy=_umeyama(landmarks[17:], _MEAN_FACE, True)[0:2],
+        if legacy_matrix is None:
+            legacy_matrix = _umeyama(landmarks[17:], _MEAN_FACE, True)[0:2]
+        self._matrices = dict(legacy=legacy_matrix,
                               face=None,
                               head=None)
         self._padding = self._padding_from_coverage(size, coverage_ratio)
@@ -735,3 +817,59 @@ def _umeyama(source, destination, estimate_scale):
     T[:dim, :dim] *= scale
 
     return T
+
+
+def _umeyama_batch(source, destination, estimate_scale):
+    """ Vectorized version of :func:`_umeyama` for estimating the similarity transformations
+    from a batch of source coordinates to the same destination coordinates.
+
+    Parameters
+    ----------
+    source: :class:`numpy.ndarray`
+        (B, M, N) array of source coordinates.
+    destination: :class:`numpy.ndarray`
+        (M, N) array destination coordinates.
+    estimate_scale: bool
+        Whether to estimate scaling factor.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (B, N + 1, N + 1) The homogeneous similarity transformation matrices. A matrix contains
+        NaN values only if the problem is not well-conditioned.
+    """
+    # pylint:disable=invalid-name
+    batch_size, num, dim = source.shape
+
+    src_mean = source.mean(axis=1)
+    dst_mean = destination.mean(axis=0)
+    src_demean = source - src_mean[:, None]
+    dst_demean = destination - dst_mean
+
+    A = np.matmul(dst_demean.T[None], src_demean) / num
+
+    d = np.ones((batch_size, dim), dtype=np.double)
+    d[np.linalg.det(A) < 0, dim - 1] = -1
+
+    U, S, V = np.linalg.svd(A)
+
+    tolerance = S.max(axis=-1) * max(A.shape[-2:]) * np.finfo(S.dtype).eps
+    rank = np.count_nonzero(S > tolerance[:, None], axis=-1)
+
+    # For rank deficient sources, the reflection is decided by the orientation of U and V
+    rotation_d = d.copy()
+    deficient = rank == dim - 1
+    rotation_d[deficient, dim - 1] = np.where(np.linalg.det(U[deficient]) *
+                                              np.linalg.det(V[deficient]) > 0, 1, -1)
+    rotation = np.matmul(U * rotation_d[:, None, :], V)
+
+    if estimate_scale:
+        scale = 1.0 / src_demean.var(axis=1).sum(axis=-1) * np.sum(S * d, axis=-1)
+    else:
+        scale = np.ones((batch_size, ), dtype=np.double)
+
+    T = np.tile(np.eye(dim + 1, dtype=np.double), (batch_size, 1, 1))
+    T[:, :dim, dim] = dst_mean - scale[:, None] * np.matmul(rotation, src_mean[..., None])[..., 0]
+    T[:, :dim, :dim] = rotation * scale[:, None, None]
+    T[rank == 0] = np.nan
+    return T
@@ -4,10 +4,17 @@ serialized alignments file. """
 
 import logging
 import os
+import pickle
+import struct
+import uuid
+import zlib
+from collections.abc import MutableMapping
 from datetime import datetime
+from threading import Lock
 
 import numpy as np
 
+from lib.multithreading import MultiThread
 from lib.serializer import get_serializer, get_serializer_from_filename
 from lib.utils import FaceswapError
 
@@ -22,6 +29,9 @@ _VERSION = 2.2
 # 2.1 - Alignments data to extracted face PNG header. SHA1 hashes of faces no longer calculated
 #       or stored in alignments file
 # 2.2 - Add support for differently centered masks (i.e. not all masks stored as face centering)
+#
+# The alignments version tracks the content of the alignments data. The indexed file format
+# (see IndexedData) is identified by its file signature rather than by version number.
 
 class Alignments():
     """ The alignments file is a custom serialized ``.fsa`` file that holds information for each
@@ -34,6 +44,17 @@ class Alignments():
     Additionally it can also hold video meta information (timestamp and whether a frame is a
     key frame.)
 
+    Alignments files are saved in an indexed format which is lazily loaded through
+    :class:`IndexedData`. Legacy alignments files, which hold the whole of the alignments in a
+    single compressed pickle, are loaded in full and are updated to the indexed format the next
+    time that they are saved. A warning is logged when this happens, as older versions of
+    Faceswap cannot read the updated file.
+
+    Changes can be saved incrementally by passing ``incremental=True`` to :func:`save`, in which
+    case only the frames which have changed since the last save are appended to a delta file
+    alongside the alignments file. The delta file is merged back into the alignments file in a
+    background thread once it grows large, and on the next full save.
+
     Parameters
     ----------
     folder: str
@@ -49,8 +70,15 @@ class Alignments():
         self._serializer = get_serializer("compressed")
         self._file = self._get_location(folder, filename)
         self._meta = None
+        self._compactor = None
+        self._is_legacy_file = False
         self._data = self._load()
         self._update_legacy()
+        if not isinstance(self._data, IndexedData):
+            # Hold all data as indexed data so that changes can be tracked for incremental saves
+            data = IndexedData()
+            data.update(self._data)
+            self._data = data
         self._hashes_to_frame = dict()
         self._hashes_to_alignment = dict()
         self._thumbnails = Thumbnails(self)
@@ -68,7 +96,7 @@ class Alignments():
     @property
     def faces_count(self):
         """ int: The total number of faces that appear in the alignments :attr:`data`. """
-        retval = sum(len(val["faces"]) for val in self._data.values())
+        retval = sum(self._count_faces_in_frame(frame_name) for frame_name in self._data)
         logger.trace(retval)
         return retval
 
@@ -79,7 +107,8 @@ class Alignments():
 
     @property
     def data(self):
-        """ dict: The loaded alignments :attr:`file` in dictionary form. """
+        """ dict or :class:`IndexedData`: The loaded alignments :attr:`file` in dictionary form.
+        """
         return self._data
 
     @property
@@ -152,10 +181,12 @@ class Alignments():
         retval = dict(pts_time=None, keyframes=None)
         pts_time = []
         keyframes = []
+        is_indexed = isinstance(self._data, IndexedData)
         for idx, key in enumerate(sorted(self.data)):
-            if "video_meta" not in self.data[key]:
+            meta = (self._data.video_meta(key) if is_indexed
+                    else self.data[key].get("video_meta", None))
+            if meta is None:
                 return retval
-            meta = self.data[key]["video_meta"]
             pts_time.append(meta["pts_time"])
             if meta["keyframe"]:
                 keyframes.append(idx)
@@ -233,23 +264,77 @@ class Alignments():
                                 "{}".format(self._file))
 
         logger.info("Reading alignments from: '%s'", self._file)
+        if IndexedData.is_indexed(self._file):
+            data = IndexedData(self._file)
+            self._meta = data.meta
+            self._version = self._meta["version"]
+            logger.debug("Loaded indexed alignments")
+            return data
+
         data = self._serializer.load(self._file)
+        self._is_legacy_file = True
         self._meta = data.get("__meta__", dict(version=1.0))
         self._version = self._meta["version"]
         data = data.get("__data__", data)
         logger.debug("Loaded alignments")
         return data
 
-    def save(self):
-        """ Write the contents of :attr:`data` and :attr:`_meta` to a serialized ``.fsa`` file at
-        the location :attr:`file`. """
-        logger.debug("Saving alignments")
+    def save(self, incremental=False):
+        """ Write the contents of :attr:`data` and :attr:`_meta` to an indexed ``.fsa`` file at
+        the location :attr:`file`.
+
+        Parameters
+        ----------
+        incremental: bool, optional
+            ``True`` to only append the frames that have been added, replaced or deleted since the
+            last save to the alignments delta file, so that the time taken does not grow with the
+            size of the alignments file. Frames that have been modified in place, other than
+            through the methods of this class, must have been flagged with
+            :func:`IndexedData.mark_changed`. If the alignments have not yet been saved to
+            :attr:`file` then they are saved in full. ``False`` to save the alignments in full and
+            remove any delta file. Default: ``False``
+        """
+        logger.debug("Saving alignments: (incremental: %s)", incremental)
+        meta = dict(version=self._version)
+        if (incremental
+                and isinstance(self._data, IndexedData)
+                and self._data.can_append(self._file)):
+            self._join_compactor(wait=False)
+            if self._data.append(self._file, meta) and self._compactor is None:
+                logger.debug("Compacting alignments in background")
+                self._compactor = MultiThread(self._data.compact, name="CompactAlignments")
+                self._compactor.start()
+            logger.debug("Saved alignments incrementally")
+            return
+
+        self._join_compactor()
+        if self._is_legacy_file:
+            logger.warning("Upgrading alignments file '%s' to the indexed format. The updated "
+                           "file cannot be read by older versions of Faceswap.", self._file)
+            self._is_legacy_file = False
         logger.info("Writing alignments to: '%s'", self._file)
-        data = dict(__meta__=dict(version=self._version),
-                    __data__=self._data)
-        self._serializer.save(self._file, data)
+        if isinstance(self._data, IndexedData):
+            self._data.save(self._file, meta)
+        else:
+            IndexedData.write(self._file, meta, self._data)
         logger.debug("Saved alignments")
 
+    def _join_compactor(self, wait=True):
+        """ Join the background thread that merges the delta file into the alignments file, if it
+        is running, raising any error that occurred whilst compacting.
+
+        Parameters
+        ----------
+        wait: bool, optional
+            ``True`` to wait for compacting to complete. ``False`` to only join the thread if
+            compacting has already completed. Default: ``True``
+        """
+        if self._compactor is None or (not wait and self._compactor.is_alive()):
+            return
+        logger.debug("Joining alignments compactor")
+        self._compactor.join()
+        self._compactor = None
+
     def backup(self):
         """ Create a backup copy of the alignments :attr:`file`.
 
@@ -258,6 +343,7 @@ class Alignments():
         the original :attr:`file`.
         """
         logger.debug("Backing up alignments")
+        self._join_compactor()
         if not os.path.isfile(self._file):
             logger.debug("No alignments to back up")
             return
@@ -267,6 +353,10 @@ class Alignments():
         dst = split[0] + "_" + now + split[1]
         logger.info("Backing up original alignments to '%s'", dst)
         os.rename(src, dst)
+        if os.path.isfile(IndexedData.delta_file(src)):
+            os.rename(IndexedData.delta_file(src), IndexedData.delta_file(dst))
+        if isinstance(self._data, IndexedData):
+            self._data.set_source(dst)
         logger.debug("Backed up alignments")
 
     def save_video_meta_data(self, pts_time, keyframes):
@@ -299,6 +389,7 @@ class Alignments():
                 self.data[key] = dict(video_meta=meta, faces=[])
             else:
                 self.data[key]["video_meta"] = meta
+                self._mark_changed(key)
 
         logger.debug("Alignments count: %s, timestamp count: %s", len(self.data), len(pts_time))
         if len(self.data) != len(pts_time):
@@ -389,7 +480,7 @@ class Alignments():
             ``True`` if the given frame_name exists within the alignments :attr:`data` and has at
             least 1 face associated with it, otherwise ``False``
         """
-        retval = bool(self._data.get(frame_name, dict()).get("faces", []))
+        retval = bool(self._count_faces_in_frame(frame_name))
         logger.trace("'%s': %s", frame_name, retval)
         return retval
 
@@ -412,7 +503,7 @@ class Alignments():
         if not frame_name:
             retval = False
         else:
-            retval = bool(len(self._data.get(frame_name, dict()).get("faces", [])) > 1)
+            retval = self._count_faces_in_frame(frame_name) > 1
         logger.trace("'%s': %s", frame_name, retval)
         return retval
 
@@ -473,7 +564,12 @@ class Alignments():
         int
             The number of faces that appear in the given frame_name
         """
-        retval = len(self._data.get(frame_name, dict()).get("faces", []))
+        if frame_name not in self._data:
+            retval = 0
+        elif isinstance(self._data, IndexedData):
+            retval = self._data.face_count(frame_name)
+        else:
+            retval = len(self._data[frame_name].get("faces", []))
         logger.trace(retval)
         return retval
 
@@ -502,6 +598,7 @@ class Alignments():
                          frame_name, face_index)
             return False
         del self._data[frame_name]["faces"][face_index]
+        self._mark_changed(frame_name)
         logger.debug("Deleted face: (frame_name: '%s', face_index %s)", frame_name, face_index)
         return True
 
@@ -526,6 +623,7 @@ class Alignments():
         if frame_name not in self._data:
             self._data[frame_name] = dict(faces=[])
         self._data[frame_name]["faces"].append(face)
+        self._mark_changed(frame_name)
         retval = self._count_faces_in_frame(frame_name) - 1
         logger.debug("Returning new face index: %s", retval)
         return retval
@@ -546,6 +644,7 @@ class Alignments():
         """
         logger.debug("Updating face %s for frame_name '%s'", face_index, frame_name)
         self._data[frame_name]["faces"][face_index] = face
+        self._mark_changed(frame_name)
 
     def filter_faces(self, filter_dict, filter_out=False):
         """ Remove faces from :attr:`data` based on a given filter list.
@@ -574,6 +673,20 @@ class Alignments():
                 logger.verbose("Filtering out face: (filename: %s, index: %s)",
                                source_frame, face_idx)
                 del frame_data["faces"][face_idx]
+            if filter_list:
+                self._mark_changed(source_frame)
+
+    def _mark_changed(self, frame_name):
+        """ Flag a frame that has been modified in place as changed, so that it is included in
+        the next incremental save.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame that has been modified
+        """
+        if isinstance(self._data, IndexedData):
+            self._data.mark_changed(frame_name)
 
     # << GENERATORS >> #
     def yield_faces(self):
@@ -607,7 +720,10 @@ class Alignments():
 
     def _update_legacy(self):
         """ Check whether the alignments are legacy, and if so update them to current alignments
-        format. """
+        format. Indexed alignments files can only have been written in the current format, so
+        are not checked. """
+        if isinstance(self._data, IndexedData):
+            return
         updated = False
         if self._has_legacy_structure():
             self._update_legacy_structure()
@@ -833,3 +949,661 @@ class Thumbnails():
         logger.debug("frame: %s, face_index: %s, thumb shape: %s thumb dtype: %s",
                      frame, face_index, thumb.shape, thumb.dtype)
         self._alignments_dict[frame]["faces"][face_index]["thumb"] = thumb
+        if isinstance(self._alignments_dict, IndexedData):
+            self._alignments_dict.mark_changed(frame)
+
+
+class IndexedData(MutableMapping):
+    """ Lazily loaded alignments data backed by an indexed alignments file.
+
+    Indexed alignments files hold the alignments for each frame in independently compressed
+    blocks of frames, followed by an index of the frame names held in each block, a summary of
+    each frame and the alignments file meta information. Only the index is read on load. The
+    frames within a block are decompressed the first time that any frame within the block is
+    accessed, and are then held in memory.
+
+    This object behaves as the alignments `dict` of frame name to frame alignments. Blocks that
+    have not been accessed are copied unchanged from the existing file when the data is saved,
+    so saving only compresses the frames that have been accessed or added.
+
+    Changes can also be saved incrementally with :func:`append`. The frames that have been
+    added, replaced or deleted since the data was last saved are appended as a single record to
+    a delta file alongside the indexed file, so the time taken is proportional to the number of
+    changed frames rather than to the size of the alignments file. Any delta file is replayed
+    over the indexed file on load, and is merged back into the indexed file by :func:`compact`.
+
+    NB: Frames that are modified in place (for example, by adding a face to a frame's existing
+    list of faces) must be flagged with :func:`mark_changed` to be included in the next record.
+
+    The file is laid out as follows:
+
+        * The 8 byte file signature :attr:`signature`
+        * The compressed, pickled blocks of frames
+        * The compressed, pickled index
+        * The offset and length of the index, each as an unsigned 64 bit integer, followed by the
+          file signature
+
+    The delta file is laid out as follows:
+
+        * The 8 byte delta file signature :attr:`delta_signature`
+        * The 16 byte generation of the indexed file that the records apply to. A new generation
+          is created each time that the indexed file is saved in full, so that a delta file left
+          behind for an earlier version of the indexed file is ignored
+        * The records. Each record is the length and CRC32 of the record data, each as an unsigned
+          32 bit integer, followed by the compressed, pickled record data. An incomplete record
+          at the end of the file, from an interrupted write, is ignored
+
+    Parameters
+    ----------
+    filename: str, optional
+        The full path to an existing indexed alignments file to lazily load the data from.
+        ``None`` to create an empty object. Default: ``None``
+    """
+    signature = b"\x89FSA\r\n\x1a\n"
+    delta_signature = b"\x89FSD\r\n\x1a\n"
+    _footer = struct.Struct("<QQ")
+    _record_header = struct.Struct("<II")
+    _block_frames = 64
+    _compact_ratio = 0.5  # Compact once the delta file exceeds this ratio of the indexed file size
+    _compact_min_bytes = 1024 * 1024  # Minimum size of a delta file before it is compacted
+
+    def __init__(self, filename=None):
+        logger.debug("Initializing %s: (filename: '%s')", self.__class__.__name__, filename)
+        self._filename = filename
+        self._lock = Lock()
+        self._meta = dict()
+        self._generation = None  # The generation of the indexed file. ``None`` if not saved
+        self._delta_size = None  # Size of the valid part of the delta file. ``None`` if no file
+        self._blocks = []  # (offset, length) of each block in the file
+        self._frames = dict()  # frame name: block index. ``None`` once in memory
+        self._summary = dict()  # frame name: (face count, video meta) for frames not in memory
+        self._loaded = dict()  # frame name: frame alignments for frames held in memory
+        self._changed = dict()  # frames added or changed since the data was last saved, in order
+        self._deleted = set()  # frames deleted since the data was last saved
+        if filename is not None:
+            self._read_index()
+            self._replay_deltas()
+        logger.debug("Initialized %s: (frames: %s, blocks: %s)",
+                     self.__class__.__name__, len(self._frames), len(self._blocks))
+
+    @property
+    def meta(self):
+        """ dict: The alignments file meta information stored in the index. """
+        return self._meta
+
+    @classmethod
+    def is_indexed(cls, filename):
+        """ Test whether a file is an indexed alignments file.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the file to test
+
+        Returns
+        -------
+        bool
+            ``True`` if the file starts with the indexed alignments file signature otherwise
+            ``False``
+        """
+        with open(filename, "rb") as in_file:
+            return in_file.read(len(cls.signature)) == cls.signature
+
+    @staticmethod
+    def delta_file(filename):
+        """ Obtain the location of the delta file for an indexed alignments file.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the indexed alignments file
+
+        Returns
+        -------
+        str
+            The full path to the delta file that holds incremental changes for the given file
+        """
+        return f"{filename}.delta"
+
+    @classmethod
+    def _load_index(cls, filename):
+        """ Read the index from the end of an indexed alignments file.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the indexed alignments file
+
+        Returns
+        -------
+        dict
+            The file's index
+        """
+        with open(filename, "rb") as in_file:
+            in_file.seek(-(cls._footer.size + len(cls.signature)), os.SEEK_END)
+            footer = in_file.read()
+            if footer[cls._footer.size:] != cls.signature:
+                raise FaceswapError(f"The alignments file '{filename}' is incomplete or corrupt.")
+            offset, length = cls._footer.unpack(footer[:cls._footer.size])
+            in_file.seek(offset)
+            return pickle.loads(zlib.decompress(in_file.read(length)))
+
+    def _read_index(self):
+        """ Read the index from :attr:`_filename` and populate the block locations, frame names
+        and frame summaries. """
+        index = self._load_index(self._filename)
+        self._meta = index["meta"]
+        self._generation = index.get("generation", None)
+        self._blocks = index["blocks"]
+        for frame_name, block, face_count, video_meta in index["frames"]:
+            self._frames[frame_name] = block
+            self._summary[frame_name] = (face_count, video_meta)
+
+    @classmethod
+    def _read_deltas(cls, filename, generation, end=None):
+        """ Read the records from a delta file.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the delta file
+        generation: bytes
+            The generation of the indexed file that the records should apply to
+        end: int, optional
+            The position in the file to stop reading records at. ``None`` to read to the end of
+            the file. Default: ``None``
+
+        Returns
+        -------
+        records: list
+            The records read from the delta file, in the order that they were written
+        size: int or ``None``
+            The size of the valid part of the delta file or ``None`` if the delta file does not
+            exist or does not apply to the given generation
+        """
+        records = []
+        if generation is None or not os.path.isfile(filename):
+            return records, None
+        header = cls.delta_signature + generation
+        with open(filename, "rb") as in_file:
+            if in_file.read(len(header)) != header:
+                logger.debug("Ignoring delta file from a different generation: '%s'", filename)
+                return records, None
+            size = len(header)
+            while end is None or size < end:
+                record_header = in_file.read(cls._record_header.size)
+                if len(record_header) < cls._record_header.size:
+                    break
+                length, checksum = cls._record_header.unpack(record_header)
+                record = in_file.read(length)
+                if len(record) < length or zlib.crc32(record) != checksum:
+                    break
+                records.append(pickle.loads(zlib.decompress(record)))
+                size += cls._record_header.size + length
+        if end is None and size != os.path.getsize(filename):
+            logger.warning("The alignments delta file '%s' ends with an incomplete record, "
+                           "possibly from an interrupted save. The incomplete record has been "
+                           "ignored.", filename)
+        return records, size
+
+    def _replay_deltas(self):
+        """ Apply the records from the delta file of :attr:`_filename` to the loaded data. """
+        records, self._delta_size = self._read_deltas(self.delta_file(self._filename),
+                                                      self._generation)
+        for record in records:
+            self._meta = record["meta"]
+            for frame_name in record["deleted"]:
+                if frame_name in self._frames:
+                    self._delete(frame_name)
+            for frame_name, frame in record["frames"].items():
+                self._set(frame_name, frame)
+        logger.debug("Replayed %s delta records", len(records))
+
+    def _load_block(self, block):
+        """ Decompress a block of frames from :attr:`_filename` into memory.
+
+        Parameters
+        ----------
+        block: int
+            The index of the block to load
+        """
+        offset, length = self._blocks[block]
+        with open(self._filename, "rb") as in_file:
+            in_file.seek(offset)
+            frames = pickle.loads(zlib.decompress(in_file.read(length)))
+        logger.trace("Loaded block %s: %s frames", block, len(frames))
+        for frame_name, frame in frames.items():
+            if self._frames.get(frame_name, None) != block:
+                continue  # Frame has been replaced or deleted since the block was written
+            self._loaded[frame_name] = frame
+            self._frames[frame_name] = None
+            del self._summary[frame_name]
+
+    def _load_frame_block(self, frame_name):
+        """ Load the block that holds the given frame, if it is not already in memory. The block
+        is looked up with the lock held, as blocks are renumbered when the data is compacted.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame to load the block for
+        """
+        with self._lock:
+            block = self._frames.get(frame_name, None)
+            if block is not None:
+                self._load_block(block)
+
+    def _set(self, frame_name, frame):
+        """ Set the alignments for a frame without flagging it as changed.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame to set the alignments for
+        frame: dict
+            The alignments for the frame
+        """
+        if self._frames.get(frame_name, None) is not None:
+            # Load the rest of the block, as the block can no longer be copied as-is on save
+            self._load_frame_block(frame_name)
+        self._frames[frame_name] = None
+        self._loaded[frame_name] = frame
+
+    def _delete(self, frame_name):
+        """ Delete the alignments for a frame without flagging it as deleted.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame to delete the alignments for
+        """
+        if self._frames[frame_name] is not None:
+            # Load the rest of the block, as the block can no longer be copied as-is on save
+            self._load_frame_block(frame_name)
+        del self._frames[frame_name]
+        del self._loaded[frame_name]
+
+    def __getitem__(self, frame_name):
+        if self._frames[frame_name] is not None:
+            self._load_frame_block(frame_name)
+        return self._loaded[frame_name]
+
+    def __setitem__(self, frame_name, frame):
+        self._set(frame_name, frame)
+        self._changed[frame_name] = None
+        self._deleted.discard(frame_name)
+
+    def __delitem__(self, frame_name):
+        self._delete(frame_name)
+        self._deleted.add(frame_name)
+        self._changed.pop(frame_name, None)
+
+    def __contains__(self, frame_name):
+        return frame_name in self._frames
+
+    def __iter__(self):
+        return iter(self._frames)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def face_count(self, frame_name):
+        """ Obtain the number of faces in a frame without loading the frame from disk.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame to obtain the face count for
+
+        Returns
+        -------
+        int
+            The number of faces in the given frame
+        """
+        if self._frames[frame_name] is None:
+            return len(self._loaded[frame_name]["faces"])
+        return self._summary[frame_name][0]
+
+    def video_meta(self, frame_name):
+        """ Obtain the video meta information for a frame without loading the frame from disk.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame to obtain the video meta information for
+
+        Returns
+        -------
+        dict or ``None``
+            The `pts_time` and `keyframe` information for the frame or ``None`` if the frame does
+            not contain video meta information
+        """
+        if self._frames[frame_name] is None:
+            return self._loaded[frame_name].get("video_meta", None)
+        return self._summary[frame_name][1]
+
+    def mark_changed(self, frame_name):
+        """ Flag a frame whose alignments have been modified in place, so that it is included in
+        the next call to :func:`append`.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame that has been modified
+        """
+        if frame_name in self._frames:
+            self._changed[frame_name] = None
+
+    def set_source(self, filename):
+        """ Set the file that frames which have not yet been loaded should be read from. Used
+        when the underlying file has been moved.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the new location of the indexed alignments file
+        """
+        logger.debug("Setting source: '%s'", filename)
+        self._filename = filename
+
+    def can_append(self, filename):
+        """ Test whether changes can be saved to the given file with :func:`append`.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the indexed alignments file that is to be saved to
+
+        Returns
+        -------
+        bool
+            ``True`` if the data was loaded from, or last saved to, the given indexed file and
+            that file still exists, otherwise ``False``
+        """
+        return (self._generation is not None
+                and self._filename == filename
+                and os.path.isfile(filename))
+
+    def append(self, filename, meta):
+        """ Save the frames that have changed since the data was last saved by appending a record
+        to the delta file of the given indexed alignments file.
+
+        :func:`can_append` must return ``True`` for the given file.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the indexed alignments file that the data was loaded from or last
+            saved to
+        meta: dict
+            The alignments file meta information to store in the record
+
+        Returns
+        -------
+        bool
+            ``True`` if the delta file has grown large enough that it should be merged into the
+            indexed file with :func:`compact` otherwise ``False``
+        """
+        if not self._changed and not self._deleted and meta == self._meta:
+            logger.debug("No changes to append")
+            return False
+        record = dict(meta=meta,
+                      frames={frame_name: self[frame_name] for frame_name in self._changed},
+                      deleted=list(self._deleted))
+        record = zlib.compress(pickle.dumps(record))
+        delta_file = self.delta_file(filename)
+        with self._lock:
+            try:
+                if self._delta_size is None:
+                    with open(delta_file, "wb") as out_file:
+                        out_file.write(self.delta_signature + self._generation)
+                        self._delta_size = out_file.tell()
+                with open(delta_file, "r+b") as out_file:
+                    out_file.seek(self._delta_size)
+                    out_file.truncate()  # Discard any incomplete record from an interrupted save
+                    out_file.write(self._record_header.pack(len(record), zlib.crc32(record)))
+                    out_file.write(record)
+                    out_file.flush()
+                    os.fsync(out_file.fileno())
+                    self._delta_size = out_file.tell()
+            except IOError as err:
+                msg = f"Error writing to '{delta_file}': {err.strerror}"
+                raise FaceswapError(msg) from err
+            delta_size = self._delta_size
+        logger.debug("Appended delta record: (changed: %s, deleted: %s, delta size: %s)",
+                     len(self._changed), len(self._deleted), delta_size)
+        self._meta = meta
+        self._changed.clear()
+        self._deleted.clear()
+        return delta_size > max(self._compact_min_bytes,
+                                os.path.getsize(filename) * self._compact_ratio)
+
+    def compact(self):
+        """ Merge the records in the delta file into the indexed alignments file that the data
+        was loaded from or last saved to.
+
+        Only the blocks that hold frames which have been changed are decompressed. All other
+        blocks are copied unchanged. The merge is performed from the files on disk rather than
+        from the data held in memory, so this can be run in a background thread whilst the data
+        continues to be used and further records are appended. Any records appended during the
+        merge are retained in the delta file.
+        """
+        with self._lock:
+            filename = self._filename
+            generation = self._generation
+            end = self._delta_size
+        if end is None:
+            logger.debug("No delta file to compact")
+            return
+        logger.debug("Compacting alignments: '%s'", filename)
+        delta_file = self.delta_file(filename)
+        records, _ = self._read_deltas(delta_file, generation, end=end)
+        index = self._load_index(filename)
+        meta = index["meta"]
+        changed = dict()
+        deleted = set()
+        for record in records:
+            meta = record["meta"]
+            for frame_name in record["deleted"]:
+                changed.pop(frame_name, None)
+                deleted.add(frame_name)
+            changed.update(record["frames"])
+
+        frames = dict()  # frame name: alignments to compress or (offset, length, summary) to copy
+        blocks = dict()
+        for frame_name, block, face_count, video_meta in index["frames"]:
+            blocks.setdefault(block, []).append(frame_name)
+            frames[frame_name] = (*index["blocks"][block], face_count, video_meta)
+        with open(filename, "rb") as in_file:
+            for block, frame_names in blocks.items():
+                if not any(name in changed or name in deleted for name in frame_names):
+                    continue
+                offset, length = index["blocks"][block]
+                in_file.seek(offset)
+                block_frames = pickle.loads(zlib.decompress(in_file.read(length)))
+                frames.update({name: block_frames[name] for name in frame_names})
+        for frame_name in deleted:
+            frames.pop(frame_name, None)
+        frames.update(changed)
+
+        temp_file = f"{delta_file}.tmp"
+        new_blocks, frame_blocks = self._write_file(filename,
+                                                    dict(meta=meta, generation=generation),
+                                                    frames,
+                                                    source=filename,
+                                                    replace=False)
+        with self._lock:
+            try:
+                with open(delta_file, "rb") as in_file, open(temp_file, "wb") as out_file:
+                    out_file.write(in_file.read(len(self.delta_signature) + len(generation)))
+                    in_file.seek(end)
+                    out_file.write(in_file.read(self._delta_size - end))
+                    delta_size = out_file.tell()
+                # The compacted file holds the same generation, so the records that it now holds
+                # can safely be replayed again if the delta file cannot be replaced
+                os.replace(f"{filename}.tmp", filename)
+                os.replace(temp_file, delta_file)
+            except IOError as err:
+                msg = f"Error writing to '{delta_file}': {err.strerror}"
+                raise FaceswapError(msg) from err
+            self._delta_size = delta_size
+            self._blocks = new_blocks
+            # Frames can be added from the main thread whilst compacting, so iterate over a copy
+            for frame_name, block in list(self._frames.items()):
+                if block is not None:
+                    self._frames[frame_name] = frame_blocks[frame_name]
+        logger.debug("Compacted alignments: (records: %s, changed: %s, deleted: %s)",
+                     len(records), len(changed), len(deleted))
+
+    def save(self, filename, meta):
+        """ Save the data in full to an indexed alignments file, remove any delta file and read
+        any frames that have not yet been loaded from the saved file from now on.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to save the indexed alignments file to
+        meta: dict
+            The alignments file meta information to store in the index
+        """
+        generation = uuid.uuid4().bytes
+        with self._lock:
+            frames = {frame_name: (self._loaded[frame_name] if block is None
+                                   else (*self._blocks[block], *self._summary[frame_name]))
+                      for frame_name, block in self._frames.items()}
+            blocks, frame_blocks = self._write_file(filename,
+                                                    dict(meta=meta, generation=generation),
+                                                    frames,
+                                                    source=self._filename)
+            delta_file = self.delta_file(filename)
+            if os.path.isfile(delta_file):
+                logger.debug("Removing delta file: '%s'", delta_file)
+                os.remove(delta_file)
+            self._blocks = blocks
+            for frame_name, block in self._frames.items():
+                if block is not None:
+                    self._frames[frame_name] = frame_blocks[frame_name]
+            self._meta = meta
+            self._generation = generation
+            self._delta_size = None
+            self._filename = filename
+        self._changed.clear()
+        self._deleted.clear()
+
+    @classmethod
+    def write(cls, filename, meta, data):
+        """ Write a dictionary of alignments data to an indexed alignments file.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to save the indexed alignments file to
+        meta: dict
+            The alignments file meta information to store in the index
+        data: dict
+            The alignments data to write
+        """
+        cls._write_file(filename, dict(meta=meta, generation=uuid.uuid4().bytes), data)
+        delta_file = cls.delta_file(filename)
+        if os.path.isfile(delta_file):
+            logger.debug("Removing delta file: '%s'", delta_file)
+            os.remove(delta_file)
+
+    @classmethod
+    def _write_file(cls, filename, header, frames, source=None, replace=True):
+        """ Write an indexed alignments file.
+
+        The file is written to a temporary file alongside :attr:`filename` which then replaces
+        the original file, so an existing file remains intact if writing fails.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to save the indexed alignments file to
+        header: dict
+            The alignments file `meta` information and the file `generation` to store in the index
+        frames: dict
+            The frame names, in index order, with either the frame's alignments to be compressed
+            as value, or a tuple of the (offset, length) of the block holding the frame in the
+            `source` file followed by the frame's face count and video meta information, for
+            frames which are to be copied from an existing block
+        source: str, optional
+            The full path to the indexed alignments file to copy existing blocks from. Default:
+            ``None``
+        replace: bool, optional
+            ``True`` to replace :attr:`filename` with the written file. ``False`` to leave the
+            written file at the temporary location `filename`.tmp. Default: ``True``
+
+        Returns
+        -------
+        blocks: list
+            The (offset, length) of each block in the written file
+        frame_blocks: dict
+            The frame names with the index of the block holding each frame as value
+        """
+        logger.debug("Writing indexed alignments: (filename: '%s', frames: %s)",
+                     filename, len(frames))
+        copied = dict()
+        for frame_name, frame in frames.items():
+            if isinstance(frame, tuple):
+                copied.setdefault(frame[:2], []).append(frame_name)
+        to_compress = [name for name, frame in frames.items() if not isinstance(frame, tuple)]
+        blocks = []
+        frame_blocks = dict()
+        temp_file = f"{filename}.tmp"
+        try:
+            with open(temp_file, "wb") as out_file:
+                out_file.write(cls.signature)
+                if copied:
+                    with open(source, "rb") as in_file:
+                        for (offset, length), frame_names in copied.items():
+                            in_file.seek(offset)
+                            frame_blocks.update({name: len(blocks) for name in frame_names})
+                            blocks.append((out_file.tell(), length))
+                            out_file.write(in_file.read(length))
+                for start in range(0, len(to_compress), cls._block_frames):
+                    names = to_compress[start:start + cls._block_frames]
+                    block = zlib.compress(pickle.dumps({name: frames[name] for name in names}))
+                    frame_blocks.update({name: len(blocks) for name in names})
+                    blocks.append((out_file.tell(), len(block)))
+                    out_file.write(block)
+
+                index = dict(blocks=blocks,
+                             frames=[cls._frame_summary(name, frame, frame_blocks[name])
+                                     for name, frame in frames.items()],
+                             **header)
+                index = zlib.compress(pickle.dumps(index))
+                offset = out_file.tell()
+                out_file.write(index)
+                out_file.write(cls._footer.pack(offset, len(index)) + cls.signature)
+            if replace:
+                os.replace(temp_file, filename)
+        except IOError as err:
+            msg = f"Error writing to '{filename}': {err.strerror}"
+            raise FaceswapError(msg) from err
+        logger.debug("Written indexed alignments: (blocks: %s, copied: %s)",
+                     len(blocks), len(copied))
+        return blocks, frame_blocks
+
+    @staticmethod
+    def _frame_summary(frame_name, frame, block):
+        """ Obtain the index entry for a frame.
+
+        Parameters
+        ----------
+        frame_name: str
+            The name of the frame to obtain the index entry for
+        frame: dict or tuple
+            The frame's alignments or the tuple of the frame's block location, face count and
+            video meta information for frames that are copied from an existing block
+        block: int
+            The index of the block that the frame has been written to
+
+        Returns
+        -------
+        tuple
+            The frame name, block index, face count and video meta information for the frame
+        """
+        if isinstance(frame, tuple):
+            return frame_name, block, frame[2], frame[3]
+        return frame_name, block, len(frame["faces"]), frame.get("video_meta", None)
@@ -270,7 +270,7 @@ class DetectedFace():
                      self.x, self.w, self.y, self.h, self.landmarks_xy, self.mask)
 
     def to_png_meta(self):
-        """ Return the detected face formatted for insertion into a png itxt header.
+        """ Return the detected face formatted for insertion into a png header.
 
         returns: dict
             The alignments dict will be returned with the keys ``x``, ``w``, ``y``, ``h``,
@@ -685,7 +685,7 @@ class Mask():
         return retval
 
     def to_png_meta(self):
-        """ Convert the mask to a dictionary supported by png itxt headers.
+        """ Convert the mask to a dictionary supported by png headers.
 
         Returns
         -------
@@ -564,6 +564,34 @@ class ExtractArgs(ExtractConvertArgs):
             help=_("Don't run extraction in parallel. Will run each part of the extraction "
                    "process separately (one after the other) rather than all at the smae time. "
                    "Useful if VRAM is at a premium.")))
+        argument_list.append(dict(
+            opts=("-fc", "--frame-cache"),
+            action=Slider,
+            min_max=(0, 16384),
+            rounding=256,
+            type=int,
+            dest="frame_cache",
+            default=2048,
+            group=_("settings"),
+            help=_("When extraction runs in more than one pass (for example, if VRAM is limited "
+                   "or singleprocess is enabled) keep the areas around the detected faces of "
+                   "each frame between passes, rather than decoding the source again for every "
+                   "pass. This sets the amount of RAM, in megabytes, to use for holding these "
+                   "areas. Any areas beyond this amount are written to a temporary file on disk. "
+                   "Set to 0 to disable the cache and re-load the source for each pass.")))
+        argument_list.append(dict(
+            opts=("-ch", "--crop-handoff"),
+            action="store_true",
+            dest="crop_handoff",
+            default=False,
+            group=_("settings"),
+            help=_("Once faces have been detected in a frame, only pass the area around the "
+                   "detected faces on to the aligner and masker, rather than the full frame. "
+                   "This reduces the amount of RAM used to hold frames between the extraction "
+                   "plugins, which can be significant for high resolution sources. The full "
+                   "frame is still used for saving the extracted faces. This option has no "
+                   "effect if detection runs in its own pass (for example, if VRAM is limited "
+                   "or singleprocess is enabled).")))
         argument_list.append(dict(
             opts=("-s", "--skip-existing"),
             action="store_true",
@@ -579,6 +607,20 @@ class ExtractArgs(ExtractConvertArgs):
             default=False,
             group=_("settings"),
             help=_("Skip frames that already have detected faces in the alignments file")))
+        argument_list.append(dict(
+            opts=("-rs", "--resume"),
+            action="store_true",
+            dest="resume",
+            default=False,
+            group=_("settings"),
+            help=_("Resume an extraction that was interrupted. Every time the alignments file is "
+                   "saved, the frames that have been completed are recorded in a journal next to "
+                   "the alignments file. When resuming, frames in the journal are not loaded "
+                   "again and the results for the remaining frames are added to the existing "
+                   "alignments file. Use with 'save-interval' so that progress is recorded "
+                   "during long extractions. Faces that had not finished writing to disk when "
+                   "the extraction was interrupted may need to be regenerated from the "
+                   "alignments file.")))
         argument_list.append(dict(
             opts=("-ssf", "--skip-saving-faces"),
             action="store_true",
@@ -807,6 +849,61 @@ class ConvertArgs(ExtractConvertArgs):
                    "Setting this to 0 will use the maximum available. No matter what you set "
                    "this to, it will never attempt to use more processes than are available on "
                    "your system. If singleprocess is enabled this setting will be ignored.")))
+        argument_list.append(dict(
+            opts=("-pb", "--patch-backend"),
+            action=Radio,
+            type=str.lower,
+            dest="patch_backend",
+            default="threads",
+            choices=["threads", "processes"],
+            group=_("settings"),
+            help=_("R|How to run the parallel jobs that patch the swapped faces into the frames."
+                   "\nL|threads: Run the jobs in threads within the main process. Uses the least "
+                   "resources, but may not make full use of all available CPU cores."
+                   "\nL|processes: Run the jobs in separate processes, passing frames between "
+                   "processes with shared memory. Makes better use of systems with a high number "
+                   "of CPU cores, at the cost of higher start up time and memory usage. Requires "
+                   "Python 3.8 or later.")))
+        argument_list.append(dict(
+            opts=("-ab", "--adaptive-batching"),
+            action="store_true",
+            dest="adaptive_batching",
+            default=False,
+            group=_("settings"),
+            help=_("Tune the number of faces fed to the model in each batch whilst converting, "
+                   "rather than always waiting for a full batch. The batch size is adjusted from "
+                   "the measured prediction time and how far the queue of frames waiting for the "
+                   "model has backed up, up to the model's 'convert_batchsize'. Frames that do "
+                   "not contain any faces are passed straight through without waiting for a batch "
+                   "to fill. This can reduce RAM usage and stalls on footage where faces are "
+                   "sparse.")))
+        argument_list.append(dict(
+            opts=("-bw", "--batch-wait"),
+            action=Slider,
+            min_max=(0.05, 5.0),
+            rounding=2,
+            type=float,
+            dest="batch_wait",
+            default=0.5,
+            group=_("settings"),
+            help=_("The maximum number of seconds to wait for a batch of faces to fill before "
+                   "feeding the faces that have been collected so far to the model. This option "
+                   "is ignored if 'adaptive-batching' is not enabled.")))
+        argument_list.append(dict(
+            opts=("-st", "--stats-file"),
+            action=SaveFileFullPaths,
+            filetypes="log",
+            type=str,
+            dest="stats_file",
+            default=None,
+            group=_("settings"),
+            help=_("Optional path to a file to stream the pipeline statistics to. A summary of "
+                   "the throughput, busy time and blocking time of each stage of the conversion "
+                   "(load, predict, patch and save) and the fill level of the queues between them "
+                   "is always output at the end of the run. If a file is provided, these "
+                   "statistics are also written to it as JSON lines every 5 seconds whilst "
+                   "converting, which can be used to find which stage is limiting conversion "
+                   "speed.")))
         argument_list.append(dict(
             opts=("-t", "--trainer"),
             type=str.lower,
@@ -833,6 +930,18 @@ class ConvertArgs(ExtractConvertArgs):
             group=_("Frame Processing"),
             help=_("When used with --frame-ranges outputs the unchanged frames that are not "
                    "processed instead of discarding them.")))
+        argument_list.append(dict(
+            opts=("-roi", "--roi-compositing"),
+            action="store_true",
+            dest="roi_compositing",
+            default=False,
+            group=_("Frame Processing"),
+            help=_("Only process the area of the frame around each face when patching swapped "
+                   "faces back into the frame, rather than processing the whole frame. Faces are "
+                   "blended directly into the original frame, which significantly reduces "
+                   "processing time and RAM usage for high resolution frames where the faces "
+                   "only take up a small area. This option will be ignored if the selected "
+                   "writer is set to draw transparent.")))
         argument_list.append(dict(
             opts=("-s", "--swap-model"),
             action="store_true",
@@ -2,12 +2,23 @@
 """ Converter for Faceswap """
 
 import logging
+from argparse import Namespace
+from multiprocessing import get_context
+from queue import Empty as QueueEmpty, Queue
+from threading import Event
 
 import cv2
 import numpy as np
 
+from lib.align import AlignedFace, DetectedFace
+from lib.multithreading import MultiProcess, MultiThread
 from plugins.plugin_loader import PluginLoader
 
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None  # pylint:disable=invalid-name
+
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
@@ -52,6 +63,7 @@ class Converter():
         self._configfile = configfile
 
         self._scale = arguments.output_scale / 100
+        self._roi_compositing = self._get_roi_compositing()
         self._adjustments = dict(mask=None, color=None, seamless=None, sharpening=None)
 
         self._load_plugins()
@@ -63,6 +75,70 @@ class Converter():
         process """
         return self._args
 
+    @property
+    def patches_in_place(self):
+        """ bool: ``True`` if the swapped faces are patched directly into the incoming frame,
+        which is then returned as the output frame, otherwise ``False`` """
+        return self._roi_compositing and self._scale == 1
+
+    def get_output_shape(self, frame_shape):
+        """ Obtain the shape of the frame that will be output from the converter for an incoming
+        frame of the given shape.
+
+        Parameters
+        ----------
+        frame_shape: tuple
+            The (`height`, `width`, `channels`) shape of the incoming frame
+
+        Returns
+        -------
+        tuple
+            The (`height`, `width`, `channels`) shape of the patched frame prior to any writer
+            pre-encoding
+        """
+        height, width = frame_shape[:2]
+        if self._scale != 1:
+            width, height = self._get_scaled_size(width, height)
+        channels = 4 if self._draw_transparent else frame_shape[2]
+        return (height, width, channels)
+
+    def _get_scaled_size(self, width, height):
+        """ Obtain the size of a frame once the requested output scaling has been applied.
+
+        Parameters
+        ----------
+        width: int
+            The width of the frame prior to scaling
+        height: int
+            The height of the frame prior to scaling
+
+        Returns
+        -------
+        tuple
+            The (`width`, `height`) of the frame once scaling has been applied
+        """
+        return (round((width / 2 * self._scale) * 2), round((height / 2 * self._scale) * 2))
+
+    def _get_roi_compositing(self):
+        """ Obtain whether faces should be patched into only the region of interest around each
+        face rather than into a full frame placeholder.
+
+        Region of interest compositing writes directly into the original frame, so it cannot be
+        used when the writer requires a transparent layer.
+
+        Returns
+        -------
+        bool
+            ``True`` if region of interest compositing should be used otherwise ``False``
+        """
+        retval = self._args.roi_compositing
+        if retval and self._draw_transparent:
+            logger.warning("ROI compositing is not compatible with drawing to a transparent "
+                           "layer. Disabling ROI compositing.")
+            retval = False
+        logger.debug("ROI compositing: %s", retval)
+        return retval
+
     def reinitialize(self, config):
         """ Reinitialize this :class:`Converter`.
 
@@ -187,14 +263,18 @@ class Converter():
 
         """
         logger.trace("Patching image: '%s'", predicted["filename"])
-        frame_size = (predicted["image"].shape[1], predicted["image"].shape[0])
-        new_image, background = self._get_new_image(predicted, frame_size)
-        patched_face = self._post_warp_adjustments(background, new_image)
-        patched_face = self._scale_image(patched_face)
-        patched_face *= 255.0
-        patched_face = np.rint(patched_face,
-                               out=np.empty(patched_face.shape, dtype="uint8"),
-                               casting='unsafe')
+        if self._roi_compositing:
+            patched_face = self._patch_regions(predicted)
+            patched_face = self._scale_image(patched_face)
+        else:
+            frame_size = (predicted["image"].shape[1], predicted["image"].shape[0])
+            new_image, background = self._get_new_image(predicted, frame_size)
+            patched_face = self._post_warp_adjustments(background, new_image)
+            patched_face = self._scale_image(patched_face)
+            patched_face *= 255.0
+            patched_face = np.rint(patched_face,
+                                   out=np.empty(patched_face.shape, dtype="uint8"),
+                                   casting='unsafe')
         if self._writer_pre_encode is not None:
             patched_face = self._writer_pre_encode(patched_face)
         logger.trace("Patched image: '%s'", predicted["filename"])
@@ -252,6 +332,111 @@ class Converter():
 
         return placeholder, background
 
+    def _patch_regions(self, predicted):
+        """ Patch the swapped faces into the original frame, only processing the region of
+        interest around each face.
+
+        Each face is warped, sharpened and blended inside its padded bounding box within the
+        frame and the result is written straight back into the original ``uint8`` frame, so no
+        full frame sized placeholders are created. Faces are blended sequentially, so overlapping
+        faces are composited on top of each other.
+
+        Parameters
+        ----------
+        predicted: dict
+            The output from :class:`scripts.convert.Predictor`.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The original ``uint8`` frame with the swapped faces patched into it
+        """
+        frame = predicted["image"]
+        if not frame.flags.writeable or not frame.flags.c_contiguous:
+            frame = frame.copy()
+        frame_size = (frame.shape[1], frame.shape[0])
+        logger.trace("Patching regions: (filename: '%s', faces: %s)",
+                     predicted["filename"], len(predicted["swapped_faces"]))
+
+        for new_face, detected_face, reference_face in zip(predicted["swapped_faces"],
+                                                           predicted["detected_faces"],
+                                                           predicted["reference_faces"]):
+            roi = self._get_roi(reference_face, frame_size)
+            if roi is None:
+                logger.trace("Face falls outside of frame. Skipping: '%s'", predicted["filename"])
+                continue
+            left, top, right, bottom = roi
+
+            predicted_mask = new_face[:, :, -1] if new_face.shape[2] == 4 else None
+            new_face = self._pre_warp_adjustments(new_face[:, :, :3],
+                                                  detected_face,
+                                                  reference_face,
+                                                  predicted_mask)
+
+            # Offset the matrix so that the face is warped into the region of interest
+            matrix = reference_face.adjusted_matrix.copy()
+            matrix[:, 2] += matrix[:, :2] @ np.array((left, top), dtype=matrix.dtype)
+            patch = cv2.warpAffine(new_face,
+                                   matrix,
+                                   (right - left, bottom - top),
+                                   flags=cv2.WARP_INVERSE_MAP | reference_face.interpolators[1],
+                                   borderMode=cv2.BORDER_CONSTANT)
+
+            if self._adjustments["sharpening"] is not None:
+                patch = self._adjustments["sharpening"].run(patch,
+                                                            reference_width=frame_size[0])
+
+            region = frame[top:bottom, left:right]
+            foreground, mask = np.split(patch,  # pylint:disable=unbalanced-tuple-unpacking
+                                        (3, ),
+                                        axis=-1)
+            background = region / np.array(255.0, dtype="float32")
+            foreground *= mask
+            background *= (1.0 - mask)
+            background += foreground
+            np.clip(background, 0.0, 1.0, out=background)
+            background *= 255.0
+            np.rint(background, out=region, casting="unsafe")
+
+        logger.trace("Patched regions: '%s'", predicted["filename"])
+        return frame
+
+    def _get_roi(self, reference_face, frame_size):
+        """ Obtain the padded bounding box, within the frame, of the area that a swapped face will
+        be warped into.
+
+        The box is padded to allow for interpolation at the edges of the face and for the
+        sharpening kernel, so that the results are identical to processing the full frame.
+
+        Parameters
+        ----------
+        reference_face: :class:`~lib.align.AlignedFace`
+            The aligned face object sized to the model output of the original face for reference
+        frame_size: tuple
+            The (`width`, `height`) of the final frame in pixels
+
+        Returns
+        -------
+        tuple or ``None``
+            The (`left`, `top`, `right`, `bottom`) co-ordinates of the region of interest clipped
+            to the frame, or ``None`` if the face falls entirely outside of the frame
+        """
+        # Interpolation can reach 2 pixels beyond the edge of the face, in face space
+        matrix = reference_face.adjusted_matrix
+        padding = int(np.ceil(2 / np.sqrt(matrix[0, 0] ** 2 + matrix[0, 1] ** 2))) + 1
+        if self._adjustments["sharpening"] is not None:
+            sharpening = self._adjustments["sharpening"]
+            padding += sharpening.get_kernel_size(frame_size[0], sharpening.config["radius"])[1]
+
+        roi = reference_face.original_roi
+        left, top = np.maximum(roi.min(axis=0) - padding, 0)
+        right, bottom = np.minimum(roi.max(axis=0) + padding + 1, frame_size)
+        if right <= left or bottom <= top:
+            return None
+        retval = (int(left), int(top), int(right), int(bottom))
+        logger.trace("roi: %s, padding: %s, retval: %s", roi, padding, retval)
+        return retval
+
     def _pre_warp_adjustments(self, new_face, detected_face, reference_face, predicted_mask):
         """ Run any requested adjustments that can be performed on the raw output from the Faceswap
         model.
@@ -368,7 +553,8 @@ class Converter():
         Parameters
         ----------
         frame: :class:`numpy.ndarray`
-            The final frame with faces swapped
+            The final frame with faces swapped. Either a ``float32`` frame in the range 0.0 - 1.0
+            or a ``uint8`` frame if ROI compositing is being used
 
         Returns
         -------
@@ -379,9 +565,485 @@ class Converter():
             return frame
         logger.trace("source frame: %s", frame.shape)
         interp = cv2.INTER_CUBIC if self._scale > 1 else cv2.INTER_AREA
-        dims = (round((frame.shape[1] / 2 * self._scale) * 2),
-                round((frame.shape[0] / 2 * self._scale) * 2))
+        dims = self._get_scaled_size(frame.shape[1], frame.shape[0])
         frame = cv2.resize(frame, dims, interpolation=interp)
         logger.trace("resized frame: %s", frame.shape)
-        np.clip(frame, 0.0, 1.0, out=frame)
+        if frame.dtype != "uint8":
+            np.clip(frame, 0.0, 1.0, out=frame)
         return frame
+
+
+class PatchPool():
+    """ Runs the :class:`Converter` patching process in a pool of worker processes rather than in
+    threads, so that patching is not bound by the GIL.
+
+    Frames and swapped faces are passed to the worker processes through a ring of shared memory
+    slots rather than being pickled. Each worker process runs its own :class:`Converter`, and
+    writes the patched frame back into the slot that it received the frame in. Patched frames are
+    put to the output queue in the order that they were received.
+
+    The pool exposes the same interface as :class:`lib.multithreading.MultiThread` for starting,
+    joining and error checking.
+
+    Parameters
+    ----------
+    converter: :class:`Converter`
+        The converter that has been loaded in the main process. Used for calculating output frame
+        sizes and for performing any writer pre-encoding
+    converter_kwargs: dict
+        The keyword arguments that were used to create the :attr:`converter`. Used to create a
+        :class:`Converter` in each worker process
+    in_queue: :class:`queue.Queue`
+        The output from :class:`scripts.convert.Predictor`. Contains detected faces from the
+        Faceswap model as well as the frame to be patched.
+    out_queue: :class:`queue.Queue`
+        The queue to place patched frames into for writing by one of Faceswap's
+        :mod:`plugins.convert.writer` plugins.
+    processes: int
+        The number of worker processes to launch
+    """
+    def __init__(self, converter, converter_kwargs, in_queue, out_queue, processes):
+        logger.debug("Initializing %s: (converter: %s, converter_kwargs: %s, in_queue: %s, "
+                     "out_queue: %s, processes: %s)", self.__class__.__name__, converter,
+                     converter_kwargs, in_queue, out_queue, processes)
+        self._converter = converter
+        self._in_queue = in_queue
+        self._out_queue = out_queue
+        self._pre_encode = converter_kwargs.get("pre_encode")
+
+        self._slots = [None for _ in range(processes * 2)]
+        self._free_slots = Queue()
+        for idx in range(len(self._slots)):
+            self._free_slots.put(idx)
+        self._frame_count = None
+        self._dispatched = Event()
+
+        context = get_context("spawn")
+        self._task_queue = context.Queue()
+        self._result_queue = context.Queue()
+        self._workers = MultiProcess(_patch_process,
+                                     self._get_worker_kwargs(converter_kwargs),
+                                     self._task_queue,
+                                     self._result_queue,
+                                     process_count=processes,
+                                     name="patch")
+        self._threads = [MultiThread(self._dispatch, thread_count=1, name="patch_dispatch"),
+                         MultiThread(self._collect, thread_count=1, name="patch_collect")]
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    @staticmethod
+    def is_supported():
+        """ Check whether process based patching is supported on the running system.
+
+        Returns
+        -------
+        bool
+            ``True`` if shared memory is available (Python 3.8 or later) otherwise ``False``
+        """
+        return shared_memory is not None
+
+    @staticmethod
+    def _get_worker_kwargs(converter_kwargs):
+        """ Obtain the keyword arguments to create a :class:`Converter` within a worker process.
+
+        Writer pre-encoding is performed in the main process, and any un-picklable items are
+        removed from the command line arguments.
+
+        Parameters
+        ----------
+        converter_kwargs: dict
+            The keyword arguments that were used to create the main process' :class:`Converter`
+
+        Returns
+        -------
+        dict
+            The keyword arguments for creating a :class:`Converter` in a worker process
+        """
+        retval = dict(converter_kwargs)
+        retval["pre_encode"] = None
+        retval["arguments"] = Namespace(**{key: val
+                                           for key, val in vars(retval["arguments"]).items()
+                                           if not callable(val)})
+        logger.debug("Worker kwargs: %s", retval)
+        return retval
+
+    def start(self):
+        """ Start the worker processes and the dispatch and collection threads. """
+        logger.debug("Starting %s", self.__class__.__name__)
+        self._workers.start()
+        for thread in self._threads:
+            thread.start()
+        logger.debug("Started %s", self.__class__.__name__)
+
+    def check_and_raise_error(self):
+        """ Checks for errors in the worker processes and the pool's threads and raises them in
+        the caller """
+        self._workers.check_and_raise_error()
+        for thread in self._threads:
+            thread.check_and_raise_error()
+
+    def completed(self):
+        """ Return ``False`` if any of the worker processes or pool threads are alive, otherwise
+        ``True`` """
+        retval = self._workers.completed() and all(thread.completed()
+                                                   for thread in self._threads)
+        logger.debug(retval)
+        return retval
+
+    def join(self):
+        """ Join the worker processes and the pool's threads, release the shared memory and
+        re-raise any errors. """
+        logger.debug("Joining %s", self.__class__.__name__)
+        try:
+            for thread in self._threads:
+                thread.join()
+            self._workers.join()
+        finally:
+            for slot in self._slots:
+                if slot is not None:
+                    slot.close()
+                    slot.unlink()
+            self._slots = [None for _ in self._slots]
+        logger.debug("Joined %s", self.__class__.__name__)
+
+    def _get_slot(self, size):
+        """ Obtain a free shared memory slot that is at least the given size, blocking until a
+        slot becomes available.
+
+        Parameters
+        ----------
+        size: int
+            The minimum size, in bytes, that the slot must be able to hold
+
+        Returns
+        -------
+        int or ``None``
+            The index of the slot within :attr:`_slots` or ``None`` if a shutdown has been
+            requested whilst waiting for a slot
+        """
+        while True:
+            if self._in_queue.shutdown.is_set():
+                return None
+            try:
+                idx = self._free_slots.get(timeout=1)
+                break
+            except QueueEmpty:
+                continue
+        slot = self._slots[idx]
+        if slot is None or slot.size < size:
+            if slot is not None:
+                slot.close()
+                slot.unlink()
+            self._slots[idx] = shared_memory.SharedMemory(create=True, size=size)
+            logger.debug("Allocated shared memory slot %s: (name: '%s', size: %s)",
+                         idx, self._slots[idx].name, size)
+        return idx
+
+    def _dispatch(self):
+        """ Read items from the input queue, copy the frame and swapped faces into a shared
+        memory slot and pass the task to the worker processes. """
+        logger.debug("Starting patch dispatch")
+        count = 0
+        while True:
+            items = self._in_queue.get()
+            if items == "EOF":
+                logger.debug("EOF Received")
+                break
+            if isinstance(items, dict):
+                items = [items]
+            for item in items:
+                if not self._dispatch_item(count, item):
+                    logger.debug("Patch dispatch: Stop signal received. Terminating")
+                    return
+                count += 1
+
+        self._frame_count = count
+        self._dispatched.set()
+        logger.debug("Putting EOF to workers. Frames dispatched: %s", count)
+        self._task_queue.put("EOF")
+
+    def _dispatch_item(self, index, item):
+        """ Copy a single item into shared memory and pass it to the worker processes.
+
+        Parameters
+        ----------
+        index: int
+            The sequential index of the item, used for putting the patched frames out in order
+        item: dict
+            The output from :class:`scripts.convert.Predictor` for a single frame
+
+        Returns
+        -------
+        bool
+            ``True`` if the item was dispatched, ``False`` if a shutdown has been requested
+        """
+        image = item["image"]
+        faces = np.ascontiguousarray(item["swapped_faces"], dtype="float32")
+        out_shape = self._converter.get_output_shape(image.shape)
+        out_offset = image.nbytes + faces.nbytes
+        out_size = 0 if self._converter.patches_in_place else int(np.prod(out_shape))
+
+        idx = self._get_slot(out_offset + out_size)
+        if idx is None:
+            return False
+        slot = self._slots[idx]
+        np.ndarray(image.shape, dtype="uint8", buffer=slot.buf)[...] = image
+        if faces.size:
+            np.ndarray(faces.shape,
+                       dtype="float32",
+                       buffer=slot.buf,
+                       offset=image.nbytes)[...] = faces
+
+        logger.trace("Dispatching: (index: %s, filename: '%s', slot: %s)",
+                     index, item["filename"], idx)
+        self._task_queue.put(dict(index=index,
+                                  filename=item["filename"],
+                                  slot=idx,
+                                  shm_name=slot.name,
+                                  frame_shape=image.shape,
+                                  faces_shape=faces.shape,
+                                  out_offset=out_offset,
+                                  out_size=out_size,
+                                  alignments=[face.to_alignment()
+                                              for face in item["detected_faces"]]))
+        return True
+
+    def _collect(self):
+        """ Collect the patched frames from the worker processes, copy them out of shared memory
+        and put them to the output queue in the order that they were received. """
+        logger.debug("Starting patch collect")
+        pending = dict()
+        next_index = 0
+        while not self._dispatched.is_set() or next_index < self._frame_count:
+            if self._out_queue.shutdown.is_set():
+                logger.debug("Patch collect: Stop signal received. Terminating")
+                break
+            try:
+                result = self._result_queue.get(timeout=1)
+            except QueueEmpty:
+                if self._workers.has_error:
+                    logger.debug("Patch collect: Worker error detected. Terminating")
+                    break
+                continue
+            pending[result["index"]] = self._get_result_image(result)
+
+            while next_index in pending:
+                filename, image = pending.pop(next_index)
+                if self._pre_encode is not None:
+                    image = self._pre_encode(image)
+                logger.trace("Out queue put: %s", filename)
+                self._out_queue.put((filename, image))
+                next_index += 1
+        logger.debug("Completed patch collect. Frames collected: %s", next_index)
+
+    def _get_result_image(self, result):
+        """ Obtain the patched frame for a result received from a worker process and release
+        the shared memory slot that it was held in.
+
+        Parameters
+        ----------
+        result: dict
+            The result received from a worker process
+
+        Returns
+        -------
+        tuple
+            The filename and the patched frame
+        """
+        if result["image"] is not None:  # Did not fit in the slot, so was sent directly
+            image = result["image"]
+        else:
+            image = np.ndarray(result["shape"],
+                               dtype="uint8",
+                               buffer=self._slots[result["slot"]].buf,
+                               offset=result["offset"]).copy()
+        self._free_slots.put(result["slot"])
+        logger.trace("Collected: (index: %s, filename: '%s', shape: %s)",
+                     result["index"], result["filename"], image.shape)
+        return result["filename"], image
+
+
+def _patch_process(converter_kwargs, task_queue, result_queue):
+    """ The entry point for :class:`PatchPool` worker processes.
+
+    Creates a :class:`Converter` and runs its :func:`Converter.process` function, with the
+    pool's task and result queues wrapped so that frames are read from and written to shared
+    memory.
+
+    Parameters
+    ----------
+    converter_kwargs: dict
+        The keyword arguments for creating the :class:`Converter`
+    task_queue: :class:`multiprocessing.Queue`
+        The queue that the pool dispatches tasks to
+    result_queue: :class:`multiprocessing.Queue`
+        The queue that results are returned to the pool through
+    """
+    logger.debug("Starting patch process: (converter_kwargs: %s)", converter_kwargs)
+    converter = Converter(**converter_kwargs)
+    tasks = _SharedTasks(task_queue, converter_kwargs)
+    results = _SharedResults(result_queue, tasks)
+    try:
+        converter.process(tasks, results)
+    finally:
+        tasks.close()
+    logger.debug("Completed patch process")
+
+
+class _SharedTasks():
+    """ Wraps the :class:`PatchPool` task queue within a worker process, so that it can be
+    consumed by :func:`Converter.process`.
+
+    Tasks are rebuilt into the items that :func:`Converter.process` expects, with the frame and
+    swapped faces as views into the shared memory slot that they were dispatched in.
+
+    Parameters
+    ----------
+    queue: :class:`multiprocessing.Queue`
+        The queue that the pool dispatches tasks to
+    converter_kwargs: dict
+        The keyword arguments that the worker's :class:`Converter` was created with. Used for
+        creating the reference faces
+    """
+    def __init__(self, queue, converter_kwargs):
+        self._queue = queue
+        self._size = converter_kwargs["output_size"]
+        self._coverage_ratio = converter_kwargs["coverage_ratio"]
+        self._centering = converter_kwargs["centering"]
+        self._shared = dict()
+        self._current = None
+
+    @property
+    def current(self):
+        """ dict: The task that is currently being processed """
+        return self._current
+
+    def get(self):
+        """ Get the next task from the queue and build the item for the converter.
+
+        Returns
+        -------
+        dict or str
+            The item to be patched or "EOF" if there are no more items to be processed
+        """
+        task = self._queue.get()
+        if task == "EOF":
+            return task
+        self._current = task
+        buffer = self.attach(task["slot"], task["shm_name"]).buf
+        image = np.ndarray(task["frame_shape"], dtype="uint8", buffer=buffer)
+        swapped_faces = np.ndarray(task["faces_shape"],
+                                   dtype="float32",
+                                   buffer=buffer,
+                                   offset=image.nbytes)
+        detected_faces = []
+        reference_faces = []
+        for alignment in task["alignments"]:
+            face = DetectedFace()
+            face.from_alignment(alignment, image=image)
+            detected_faces.append(face)
+            reference_faces.append(AlignedFace(face.landmarks_xy,
+                                               image=image,
+                                               centering=self._centering,
+                                               size=self._size,
+                                               coverage_ratio=self._coverage_ratio,
+                                               dtype="float32"))
+        return dict(filename=task["filename"],
+                    image=image,
+                    swapped_faces=swapped_faces,
+                    detected_faces=detected_faces,
+                    reference_faces=reference_faces)
+
+    def put(self, item):
+        """ Put an item back to the queue. Used by :func:`Converter.process` for passing the "EOF"
+        signal to the other workers.
+
+        Parameters
+        ----------
+        item: str
+            The item to put back to the queue
+        """
+        self._queue.put(item)
+
+    def attach(self, slot, name):
+        """ Attach to the shared memory for the given slot, re-attaching if the slot has been
+        re-allocated by the pool.
+
+        Parameters
+        ----------
+        slot: int
+            The index of the slot
+        name: str
+            The name of the shared memory block currently allocated to the slot
+
+        Returns
+        -------
+        :class:`multiprocessing.shared_memory.SharedMemory`
+            The shared memory block for the slot
+        """
+        shared = self._shared.get(slot)
+        if shared is not None and shared.name == name:
+            return shared
+        if shared is not None:
+            shared.close()
+        # Spawned processes share the parent's resource tracker, so the memory remains owned by
+        # the pool
+        shared = shared_memory.SharedMemory(name=name)
+        self._shared[slot] = shared
+        return shared
+
+    def close(self):
+        """ Detach from all shared memory blocks. """
+        for shared in self._shared.values():
+            shared.close()
+        self._shared = dict()
+
+
+class _SharedResults():  # pylint:disable=too-few-public-methods
+    """ Wraps the :class:`PatchPool` result queue within a worker process, so that it can be
+    populated by :func:`Converter.process`.
+
+    Patched frames are written back into the task's shared memory slot, and only their location
+    is put to the queue.
+
+    Parameters
+    ----------
+    queue: :class:`multiprocessing.Queue`
+        The queue that results are returned to the pool through
+    tasks: :class:`_SharedTasks`
+        The worker's task queue wrapper, for obtaining the task that is being processed
+    """
+    def __init__(self, queue, tasks):
+        self._queue = queue
+        self._tasks = tasks
+
+    def put(self, item):
+        """ Write the patched frame into shared memory and put its location to the queue.
+
+        Parameters
+        ----------
+        item: tuple
+            The (`filename`, `image`) output from :func:`Converter.process`
+        """
+        task = self._tasks.current
+        image = item[1]
+        slot = self._tasks.attach(task["slot"], task["shm_name"])
+        in_place = np.ndarray(task["frame_shape"], dtype="uint8", buffer=slot.buf)
+        result = dict(index=task["index"],
+                      filename=task["filename"],
+                      slot=task["slot"],
+                      shape=image.shape,
+                      offset=0,
+                      image=None)
+        if np.shares_memory(image, in_place) and image.shape == in_place.shape:
+            logger.trace("Frame patched in place: '%s'", task["filename"])
+        elif image.dtype == "uint8" and image.nbytes <= task["out_size"]:
+            result["offset"] = task["out_offset"]
+            np.ndarray(image.shape,
+                       dtype="uint8",
+                       buffer=slot.buf,
+                       offset=task["out_offset"])[...] = image
+        else:
+            logger.trace("Frame does not fit in slot. Sending directly: '%s'", task["filename"])
+            result["image"] = image
+        self._queue.put(result)
@@ -2,6 +2,7 @@
 """ Utilities for working with images and videos """
 
 import logging
+import pickle
 import re
 import subprocess
 import os
@@ -10,7 +11,10 @@ import sys
 
 from ast import literal_eval
 from bisect import bisect
+from collections import deque, OrderedDict
 from concurrent import futures
+from hashlib import sha1
+from itertools import islice
 from zlib import crc32
 
 import cv2
@@ -21,10 +25,20 @@ from tqdm import tqdm
 
 from lib.multithreading import MultiThread
 from lib.queue_manager import queue_manager, QueueEmpty
+from lib.serializer import get_serializer
 from lib.utils import convert_to_secs, FaceswapError, _video_extensions, get_image_paths
 
 logger = logging.getLogger(__name__)  # pylint:disable=invalid-name
 
+# Faceswap binary png metadata. Arrays are stored for the given keys regardless of input type
+_META_CHUNK = b"fsMd"  # Private, ancillary png chunk type
+_META_VERSION = 1
+_META_ARRAYS = dict(landmarks_xy="float32", affine_matrix="float64")
+_META_CONSTANTS = {ord("N"): None, ord("T"): True, ord("F"): False}
+_META_LENGTH = struct.Struct("<I")
+_META_INT = struct.Struct("<q")
+_META_FLOAT = struct.Struct("<d")
+
 # ################### #
 # <<< IMAGE UTILS >>> #
 # ################### #
@@ -301,6 +315,8 @@ def read_image(filename, raise_error=False, with_metadata=False):
                 metadata = png_read_meta(raw_file)
             image = cv2.imdecode(np.frombuffer(raw_file, dtype="uint8"), cv2.IMREAD_UNCHANGED)
             retval = (image, metadata)
+            if image is None:
+                raise ValueError("Image is None")
     except TypeError as err:
         success = False
         msg = "Error while reading image (TypeError): '{}'".format(filename)
@@ -384,6 +400,67 @@ def read_image_batch(filenames, with_metadata=False):
     return retval
 
 
+def read_image_stream(filenames, with_metadata=False, workers=None):
+    """ Generator that loads images from the given file locations in background threads.
+
+    Images are decoded in parallel, but only a limited number of decoded images are held in
+    memory waiting to be consumed at any one time, so the whole of :attr:`filenames` can be
+    iterated over in bounded memory.
+
+    Parameters
+    ----------
+    filenames: list
+        A list of ``str`` full paths to the images to be loaded.
+    with_metadata: bool, optional
+        Only returns a value if the images loaded are extracted Faceswap faces. If ``True`` then
+        returns the Faceswap metadata stored with in a Face images .png exif header.
+        Default: ``False``
+    workers: int, optional
+        The number of threads to decode images in. ``None`` to use the default number of threads
+        for a :class:`concurrent.futures.ThreadPoolExecutor`. Default: ``None``
+
+    Yields
+    ------
+    filename: str
+        The filename of the loaded image.
+    image: numpy.ndarray
+        The loaded image in `BGR` channel order.
+    metadata: dict, (:attr:`with_metadata` is ``True`` only)
+        The Faceswap metadata associated with the loaded image.
+
+    Notes
+    -----
+    Images are yielded in the order of :attr:`filenames`. Any image that fails to load is logged
+    and skipped.
+
+    Example
+    -------
+    >>> for filename, image in read_image_stream(image_filenames):
+    >>>     <do processing>
+    """
+    workers = min(32, (os.cpu_count() or 1) + 4) if workers is None else workers
+    buffer_size = workers * 2
+    logger.debug("Streaming images: (count: %s, with_metadata: %s, workers: %s, buffer_size: %s)",
+                 len(filenames), with_metadata, workers, buffer_size)
+    to_load = iter(filenames)
+    pending = deque()
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for filename in islice(to_load, buffer_size - len(pending)):
+                pending.append((filename, executor.submit(read_image,
+                                                          filename,
+                                                          raise_error=True,
+                                                          with_metadata=with_metadata)))
+            if not pending:
+                break
+            filename, future = pending.popleft()
+            try:
+                image = future.result()
+            except Exception:  # pylint:disable=broad-except
+                continue  # Failure has already been logged by read_image
+            yield (filename, *image) if with_metadata else (filename, image)
+
+
 def read_image_meta(filename):
     """ Read the Faceswap metadata stored in an extracted face's exif header.
 
@@ -432,14 +509,12 @@ def read_image_meta(filename):
                 chunk = infile.read(8)
                 retval["width"], retval["height"] = struct.unpack(">II", chunk)
                 length -= 8
-            elif field == b"iTXt":
-                keyword, value = infile.read(length).split(b"\0", 1)
-                if keyword == b"faceswap":
-                    retval["itxt"] = literal_eval(value[4:].decode("utf-8"))
+            elif field in (b"iTXt", _META_CHUNK):
+                metadata = _unpack_png_meta(field, infile.read(length))
+                if metadata is not None:
+                    retval["itxt"] = metadata
                     break
-                else:
-                    logger.trace("Skipping iTXt chunk: '%s'", keyword.decode("latin-1", "ignore"))
-                    length = 0  # Reset marker for next chunk
+                length = 0  # Reset marker for next chunk
             infile.seek(length + 4, 1)
     logger.trace("filename: %s, metadata: %s", filename, retval)
     return retval
@@ -448,7 +523,9 @@ def read_image_meta(filename):
 def read_image_meta_batch(filenames):
     """ Read the Faceswap metadata stored in a batch extracted faces' exif headers.
 
-    Leverages multi-threading to load multiple images from disk at the same time
+    The metadata is obtained from the :class:`FaceIndex` of each folder that the images are in,
+    so only images that are new, or have changed, since the metadata was last read are loaded from
+    disk. These are loaded with multi-threading to load multiple images from disk at the same time
     leading to vastly reduced image read times. Creates a generator to retrieve filenames
     with their metadata as they are calculated.
 
@@ -465,7 +542,8 @@ def read_image_meta_batch(filenames):
     Yields
     -------
     tuple
-        (**filename** (`str`), **metadata** (`dict`) )
+        (**filename** (`str`), **metadata** (`dict`) ). The metadata is as returned from
+        :func:`read_image_meta` with the addition of the SHA1 `hash` of the image file
 
     Example
     -------
@@ -474,51 +552,372 @@ def read_image_meta_batch(filenames):
     >>>         <do something>
     """
     logger.trace("Requested batch: '%s'", filenames)
-    executor = futures.ThreadPoolExecutor()
-    with executor:
-        logger.debug("Submitting %s items to executor", len(filenames))
-        read_meta = {executor.submit(read_image_meta, filename): filename
-                     for filename in filenames}
-        logger.debug("Succesfully submitted %s items to executor", len(filenames))
-        for future in futures.as_completed(read_meta):
-            retval = (read_meta[future], future.result())
-            logger.trace("Yielding: %s", retval)
-            yield retval
+    folders = dict()
+    for filename in filenames:
+        folders.setdefault(os.path.dirname(filename), []).append(filename)
+    for folder, folder_filenames in folders.items():
+        yield from FaceIndex(folder).read(folder_filenames)
+
+
+class FaceIndex():
+    """ A persistent index of the metadata of the images within a folder.
+
+    Obtaining the metadata for a large folder of faces requires opening every image, which can
+    take minutes on network storage. The index holds the dimensions, Faceswap metadata and a SHA1
+    hash of the contents of each image that has been read, and is saved as a hidden file in the
+    folder. Each entry is validated against the image's modification time and size, so only new
+    or changed images are read on subsequent uses.
+
+    If the index cannot be saved (for example, if the folder is read only) then the metadata is
+    still returned, but will be read from the images again next time.
+
+    Parameters
+    ----------
+    folder: str
+        The full path to the folder of images to index
+    """
+    _file_name = ".faceswap_face_index.fsi"
+    _version = 1
+
+    def __init__(self, folder):
+        logger.debug("Initializing %s: (folder: '%s')", self.__class__.__name__, folder)
+        self._folder = folder
+        self._file = os.path.join(folder, self._file_name)
+        self._serializer = get_serializer("compressed")
+        self._entries = self._load()
+        self._updated = False
+        logger.debug("Initialized %s: (entries: %s)", self.__class__.__name__, len(self._entries))
+
+    def _load(self):
+        """ Load the index from disk.
+
+        Returns
+        -------
+        dict
+            The image file name as key with a tuple of the file's modification time, size, width,
+            height, hash and pickled metadata as value. An empty dictionary if the index does not
+            exist or is invalid
+        """
+        if not os.path.isfile(self._file):
+            logger.debug("No face index found in '%s'", self._folder)
+            return dict()
+        try:
+            with open(self._file, "rb") as infile:
+                data = self._serializer.unmarshal(infile.read())
+        except (OSError, FaceswapError) as err:
+            logger.debug("Unable to read face index '%s': %s", self._file, str(err))
+            return dict()
+        if (not isinstance(data, dict)
+                or data.get("version") != self._version
+                or not isinstance(data.get("entries"), dict)):
+            logger.debug("Discarding invalid face index or index with unsupported version: '%s'",
+                         self._file)
+            return dict()
+        return data["entries"]
+
+    def save(self):
+        """ Save the index to disk, if it has been updated since it was loaded or last saved.
+
+        Entries for images that no longer exist in the folder are removed prior to saving.
+        """
+        if not self._updated:
+            logger.debug("Face index not updated: '%s'", self._file)
+            return
+        existing = set(os.listdir(self._folder))
+        entries = {name: entry for name, entry in self._entries.items() if name in existing}
+        temp_file = f"{self._file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, "wb") as outfile:
+                outfile.write(self._serializer.marshal(dict(version=self._version,
+                                                            entries=entries)))
+            os.replace(temp_file, self._file)
+        except OSError as err:
+            logger.debug("Unable to save face index '%s': %s", self._file, str(err))
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return
+        self._entries = entries
+        self._updated = False
+        logger.debug("Saved face index: '%s' (entries: %s)", self._file, len(entries))
+
+    def read(self, filenames, save=True):
+        """ Obtain the metadata for images within the folder, reading only those images which are
+        not in the index or which have changed since they were indexed.
 
+        Parameters
+        ----------
+        filenames: list
+            A list of ``str`` full paths to images within the index's folder
+        save: bool, optional
+            ``True`` to save any updates to the index once all of the metadata has been read.
+            ``False`` to not save the index, in which case :func:`save` should be called once all
+            metadata has been read. Default: ``True``
 
-def pack_to_itxt(metadata):
-    """ Pack the given metadata dictionary to a PNG iTXt header field.
+        Yields
+        ------
+        tuple
+            (**filename** (`str`), **metadata** (`dict`) ). The metadata is as returned from
+            :func:`read_image_meta` with the addition of the SHA1 `hash` of the image file.
+            Indexed images are yielded first, followed by new or changed images in the order that
+            they are read
+        """
+        executor = futures.ThreadPoolExecutor()
+        with executor:
+            stale = []
+            for filename, stat in zip(filenames, executor.map(os.stat, filenames)):
+                entry = self._entries.get(os.path.basename(filename))
+                if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                    yield filename, self._to_metadata(entry)
+                else:
+                    stale.append((filename, stat))
+            logger.debug("Face index '%s': (indexed: %s, reading: %s)",
+                         self._file, len(filenames) - len(stale), len(stale))
+
+            read_meta = {executor.submit(self._read_entry, filename, stat): filename
+                         for filename, stat in stale}
+            for future in futures.as_completed(read_meta):
+                filename = read_meta[future]
+                entry = future.result()
+                self._entries[os.path.basename(filename)] = entry
+                self._updated = True
+                yield filename, self._to_metadata(entry)
+        if save:
+            self.save()
+
+    @staticmethod
+    def _read_entry(filename, stat):
+        """ Read an image from disk and obtain its index entry.
+
+        Parameters
+        ----------
+        filename: str
+            The full path to the image to read
+        stat: :class:`os.stat_result`
+            The status of the image file, obtained prior to reading it
+
+        Returns
+        -------
+        tuple
+            The file's modification time, size, width, height, hash and pickled Faceswap metadata
+            (or ``None`` if the image does not contain Faceswap metadata)
+        """
+        with open(filename, "rb") as infile:
+            raw_file = infile.read()
+        metadata = None
+        if os.path.splitext(filename)[-1].lower() == ".png":
+            if raw_file[:8] != b"\x89PNG\r\n\x1a\n":
+                raise ValueError(f"Invalid header found in png: {filename}")
+            width, height = struct.unpack(">II", raw_file[16:24])
+            metadata = png_read_meta(raw_file)
+        else:
+            logger.trace("Non png found. Decoding file for dimensions: '%s'", filename)
+            height, width = cv2.imdecode(np.frombuffer(raw_file, dtype="uint8"),
+                                         cv2.IMREAD_UNCHANGED).shape[:2]
+        return (stat.st_mtime_ns,
+                stat.st_size,
+                width,
+                height,
+                sha1(raw_file).hexdigest(),
+                None if metadata is None else pickle.dumps(metadata))
+
+    @staticmethod
+    def _to_metadata(entry):
+        """ Obtain the metadata for an image from its index entry. A new object is returned for
+        each call, so the caller is free to modify the returned metadata.
+
+        Parameters
+        ----------
+        entry: tuple
+            The index entry for an image
+
+        Returns
+        -------
+        dict
+            The `width`, `height` and `hash` of the image, and the Faceswap metadata as `itxt`
+            if the image contains Faceswap metadata
+        """
+        retval = dict(width=entry[2], height=entry[3], hash=entry[4])
+        if entry[5] is not None:
+            retval["itxt"] = pickle.loads(entry[5])
+        return retval
+
+
+def _encode_meta_value(value, parts, dtype=None):
+    """ Recursively encode a metadata value into Faceswap's binary png metadata format.
+
+    Each value is stored as a single byte type code followed by the value's data. Integers and
+    floats are stored as 64 bit values, strings and bytes are stored with their length, lists,
+    tuples and dictionaries are stored with their item count followed by their items, and numpy
+    arrays are stored with their data type and shape followed by their raw data.
 
     Parameters
     ----------
-    metadata: dict or bytes
-        The dictionary to write to the header. Can be pre-encoded as utf-8.
+    value: object
+        The value to encode. Must be ``None``, a `bool`, `int`, `float`, `str`, `bytes`, `list`,
+        `tuple`, `dict` or :class:`numpy.ndarray` (or a numpy scalar)
+    parts: list
+        The list of encoded `bytes` that the encoded value should be appended to
+    dtype: str, optional
+        A numpy data type that a list, tuple or array value should be packed as. Default:
+        ``None``
+    """
+    if dtype is not None and isinstance(value, (list, tuple, np.ndarray)):
+        value = np.asarray(value, dtype=dtype)
+    if value is None:
+        parts.append(b"N")
+    elif isinstance(value, (bool, np.bool_)):
+        parts.append(b"T" if value else b"F")
+    elif isinstance(value, (int, np.integer)):
+        parts.append(b"i" + _META_INT.pack(int(value)))
+    elif isinstance(value, (float, np.floating)):
+        parts.append(b"f" + _META_FLOAT.pack(float(value)))
+    elif isinstance(value, str):
+        value = value.encode("utf-8")
+        parts.append(b"s" + _META_LENGTH.pack(len(value)) + value)
+    elif isinstance(value, (bytes, bytearray)):
+        parts.append(b"b" + _META_LENGTH.pack(len(value)) + bytes(value))
+    elif isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+        value = np.ascontiguousarray(value, dtype=value.dtype.newbyteorder("<"))
+        type_code = value.dtype.str.encode("ascii")
+        parts.append(b"a" + bytes([len(type_code)]) + type_code + bytes([value.ndim]))
+        parts.append(struct.pack(f"<{value.ndim}I", *value.shape) + value.tobytes())
+    elif isinstance(value, dict):
+        parts.append(b"d" + _META_LENGTH.pack(len(value)))
+        for key, item in value.items():
+            _encode_meta_value(key, parts)
+            _encode_meta_value(item, parts, dtype=_META_ARRAYS.get(key))
+    elif isinstance(value, (list, tuple)):
+        parts.append((b"l" if isinstance(value, list) else b"t") + _META_LENGTH.pack(len(value)))
+        for item in value:
+            _encode_meta_value(item, parts)
+    else:
+        raise TypeError(f"Unsupported type for png metadata: {type(value)}")
+
+
+def _decode_meta_value(data, offset):
+    """ Recursively decode a value from Faceswap's binary png metadata format.
+
+    Parameters
+    ----------
+    data: bytes
+        The binary encoded metadata
+    offset: int
+        The position within :attr:`data` that the value to decode starts at
 
     Returns
     -------
-    bytes
-        A byte encoded PNG iTXt field, including chunk header and CRC
+    value: object
+        The decoded value. Lists, tuples and dicts are returned as their original types and
+        packed arrays are returned as :class:`numpy.ndarray`
+    offset: int
+        The position within :attr:`data` that the next value starts at
     """
-    if not isinstance(metadata, bytes):
-        metadata = str(metadata).encode("utf-8", "strict")
-    key = "faceswap".encode("latin-1", "strict")
+    code = data[offset]
+    offset += 1
+    if code in _META_CONSTANTS:
+        return _META_CONSTANTS[code], offset
+    if code == ord("i"):
+        return _META_INT.unpack_from(data, offset)[0], offset + _META_INT.size
+    if code == ord("f"):
+        return _META_FLOAT.unpack_from(data, offset)[0], offset + _META_FLOAT.size
+    if code == ord("a"):
+        type_code = data[offset + 1:offset + 1 + data[offset]].decode("ascii")
+        offset += 1 + data[offset]
+        shape = struct.unpack_from(f"<{data[offset]}I", data, offset + 1)
+        offset += 1 + 4 * len(shape)
+        retval = np.frombuffer(data, dtype=type_code, count=int(np.prod(shape)), offset=offset)
+        return retval.reshape(shape).copy(), offset + retval.nbytes
+
+    length = _META_LENGTH.unpack_from(data, offset)[0]
+    offset += _META_LENGTH.size
+    if code == ord("s"):
+        return data[offset:offset + length].decode("utf-8"), offset + length
+    if code == ord("b"):
+        return data[offset:offset + length], offset + length
+    if code == ord("d"):
+        retval = dict()
+        for _ in range(length):
+            key, offset = _decode_meta_value(data, offset)
+            retval[key], offset = _decode_meta_value(data, offset)
+        return retval, offset
+    if code in (ord("l"), ord("t")):
+        retval = []
+        for _ in range(length):
+            item, offset = _decode_meta_value(data, offset)
+            retval.append(item)
+        return (retval if code == ord("l") else tuple(retval)), offset
+    raise ValueError(f"Invalid type code in png metadata: {chr(code)}")
+
+
+def pack_to_png_meta(metadata):
+    """ Pack the given metadata dictionary to a Faceswap binary metadata PNG chunk.
+
+    The chunk data is the metadata format version followed by the binary encoded metadata.
+    Landmarks and mask affine matrices are packed as arrays rather than as lists of numbers.
 
-    chunk = key + b"\0\0\0\0\0" + metadata
-    crc = struct.pack(">I", crc32(chunk, crc32(b"iTXt")) & 0xFFFFFFFF)
+    Parameters
+    ----------
+    metadata: dict
+        The dictionary to write to the header
+
+    Returns
+    -------
+    bytes
+        A byte encoded PNG chunk, including chunk header and CRC
+    """
+    parts = [bytes([_META_VERSION])]
+    _encode_meta_value(metadata, parts)
+    chunk = b"".join(parts)
+    crc = struct.pack(">I", crc32(chunk, crc32(_META_CHUNK)) & 0xFFFFFFFF)
     length = struct.pack(">I", len(chunk))
-    retval = length + b"iTXt" + chunk + crc
+    retval = length + _META_CHUNK + chunk + crc
     return retval
 
 
+def _unpack_png_meta(field, data):
+    """ Obtain the Faceswap metadata from a PNG chunk, if the chunk holds Faceswap metadata.
+
+    Both the binary metadata chunk and the legacy Faceswap iTXt chunk, which holds the metadata
+    as the string representation of a dictionary, are supported.
+
+    Parameters
+    ----------
+    field: bytes
+        The PNG chunk type
+    data: bytes
+        The PNG chunk data
+
+    Returns
+    -------
+    dict or ``None``
+        The Faceswap metadata stored in the chunk or ``None`` if the chunk does not hold Faceswap
+        metadata
+    """
+    if field == _META_CHUNK:
+        if data[0] > _META_VERSION:
+            raise FaceswapError("The face metadata was written by a newer version of Faceswap. "
+                                "Please update Faceswap to read this face.")
+        return _decode_meta_value(data, 1)[0]
+    if field == b"iTXt":
+        keyword, value = data.split(b"\0", 1)
+        if keyword == b"faceswap":
+            return literal_eval(value[4:].decode("utf-8"))
+        logger.trace("Skipping iTXt chunk: '%s'", keyword.decode("latin-1", "ignore"))
+    return None
+
+
 def update_existing_metadata(filename, metadata):
     """ Update the png header metadata for an existing .png extracted face file on the filesystem.
 
+    The metadata is always written in the binary format, replacing any existing Faceswap metadata
+    in either the binary or legacy iTXt format.
+
     Parameters
     ----------
     filename: str
         The full path to the face to be updated
-    metadata: dict or bytes
-        The dictionary to write to the header. Can be pre-encoded as utf-8.
+    metadata: dict
+        The dictionary to write to the header
     """
 
     tmp_filename = filename + "~"
@@ -527,6 +926,7 @@ def update_existing_metadata(filename, metadata):
         if chunk != b"\x89PNG\r\n\x1a\n":
             raise ValueError(f"Invalid header found in png: {filename}")
         tmp.write(chunk)
+        written = False
 
         while True:
             chunk = png.read(8)
@@ -534,25 +934,30 @@ def update_existing_metadata(filename, metadata):
             logger.trace("Read chunk: (chunk: %s, length: %s, field: %s)", chunk, length, field)
 
             if field == b"IDAT":  # Write out all remaining data
+                if not written:
+                    logger.trace("Adding faceswap metadata chunk")
+                    tmp.write(pack_to_png_meta(metadata))
                 logger.trace("Writing image data and closing png")
                 tmp.write(chunk + png.read())
                 break
 
-            if field != b"iTXt":  # Write non iTXt chunk straight out
+            if field not in (b"iTXt", _META_CHUNK):  # Write non metadata chunk straight out
                 logger.trace("Copying existing chunk")
                 tmp.write(chunk + png.read(length + 4))  # Header + CRC
                 continue
 
-            keyword, value = png.read(length).split(b"\0", 1)
-            if keyword != b"faceswap":
+            data = png.read(length)
+            if field == b"iTXt" and data.split(b"\0", 1)[0] != b"faceswap":
                 # Write existing non fs-iTXt data + CRC
-                logger.trace("Copying non-faceswap iTXt chunk: %s", keyword)
-                tmp.write(keyword + b"\0" + value + png.read(4))
+                logger.trace("Copying non-faceswap iTXt chunk: %s", data.split(b"\0", 1)[0])
+                tmp.write(chunk + data + png.read(4))
                 continue
 
-            logger.trace("Updating faceswap iTXt chunk")
-            tmp.write(pack_to_itxt(metadata))
             png.seek(4, 1)  # Skip old CRC
+            if not written:
+                logger.trace("Updating faceswap metadata chunk")
+                tmp.write(pack_to_png_meta(metadata))
+                written = True
 
     os.replace(tmp_filename, filename)
 
@@ -568,7 +973,7 @@ def encode_image(image, extension, metadata=None):
         A compatible `cv2` image file extension that the final image is to be saved to.
     metadata: dict, optional
         Metadata for the image. If provided, and the extension is png, this information will be
-        written to the PNG itxt header. Default:``None``
+        written to the PNG header. Default:``None``
 
     Returns
     -------
@@ -590,20 +995,20 @@ def encode_image(image, extension, metadata=None):
 
 
 def png_write_meta(png, data):
-    """ Write Faceswap information to a png's iTXt field.
+    """ Write Faceswap information to a png's header.
 
     Parameters
     ----------
     png: bytes
         The bytes encoded png file to write header data to
-    data: dict or bytes
-        The dictionary to write to the header. Can be pre-encoded as utf-8.
+    data: dict
+        The dictionary to write to the header
 
     Notes
     -----
     This is a fairly stripped down and non-robust header writer to fit a very specific task. OpenCV
-    will not write any iTXt headers to the PNG file, so we make the assumption that the only iTXt
-    header that exists is the one that we created for storing alignments.
+    will not write any metadata to the PNG file, so we make the assumption that the png does not
+    already hold Faceswap metadata.
 
     References
     ----------
@@ -611,12 +1016,12 @@ def png_write_meta(png, data):
 
     """
     split = png.find(b"IDAT") - 4
-    retval = png[:split] + pack_to_itxt(data) + png[split:]
+    retval = png[:split] + pack_to_png_meta(data) + png[split:]
     return retval
 
 
 def png_read_meta(png):
-    """ Read the Faceswap information stored in a png's iTXt field.
+    """ Read the Faceswap information stored in a png's header.
 
     Parameters
     ----------
@@ -631,23 +1036,20 @@ def png_read_meta(png):
     Notes
     -----
     This is a very stripped down, non-robust and non-secure header reader to fit a very specific
-    task. OpenCV will not write any iTXt headers to the PNG file, so we make the assumption that
-    the only iTXt header that exists is the one that Faceswap created for storing alignments.
+    task. Only the chunks prior to the image data are inspected for Faceswap metadata, which
+    may be stored in either the binary or legacy iTXt format.
     """
     retval = None
-    pointer = 0
-    while True:
-        pointer = png.find(b"iTXt", pointer) - 4
-        if pointer < 0:
+    pointer = 8
+    while pointer + 8 <= len(png):
+        length, field = struct.unpack_from(">I4s", png, pointer)
+        if field == b"IDAT":
             logger.trace("No metadata in png")
             break
-        length = struct.unpack(">I", png[pointer:pointer + 4])[0]
         pointer += 8
-        keyword, value = png[pointer:pointer + length].split(b"\0", 1)
-        if keyword == b"faceswap":
-            retval = literal_eval(value[4:].decode("utf-8"))
+        retval = _unpack_png_meta(field, png[pointer:pointer + length])
+        if retval is not None:
             break
-        logger.trace("Skipping iTXt chunk: '%s'", keyword.decode("latin-1", "ignore"))
         pointer += length + 4
     return retval
 
@@ -836,6 +1238,151 @@ def count_frames(filename, fast=False):
     return frames
 
 
+class VideoFrameReader():
+    """ Random access to the frames of a video file.
+
+    Frames are retrieved by seeking to the key frame that precedes the requested frame and then
+    decoding forward to the requested frame. Decoded frames are held in a least recently used
+    cache of groups of pictures (all of the frames from one key frame up to the next), so moving
+    backwards and forwards around recently viewed frames does not require any further decoding.
+
+    Parameters
+    ----------
+    filename: str
+        Full path to the video file to read frames from
+    video_meta_data: dict, optional
+        Existing video meta information containing the `pts_time` and `keyframes` for the given
+        video. Providing this means that the video does not need to be scanned. Set to ``None``
+        if the video is to be scanned, which happens the first time that the reader is accessed.
+        Default: ``None``
+    cache_size: int, optional
+        The maximum amount of memory, in megabytes, to use for holding decoded frames.
+        Default: `512`
+
+    Example
+    -------
+    >>> reader = VideoFrameReader("/path/to/video.mp4")
+    >>> image = reader.get_frame(1000)
+    """
+    def __init__(self, filename, video_meta_data=None, cache_size=512):
+        logger.debug("Initializing %s: (filename: %s, video_meta_data: %s, cache_size: %s)",
+                     self.__class__.__name__, filename, video_meta_data, cache_size)
+        self._filename = filename
+        self._video_meta_data = dict() if video_meta_data is None else video_meta_data
+        self._cache_size = cache_size * 1024 * 1024
+        self._reader = None
+        self._count = None
+        self._keyframes = None
+        self._position = -1
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    @property
+    def count(self):
+        """ int: The number of frames in the video file. """
+        self._initialize()
+        return self._count
+
+    @property
+    def video_meta_data(self):
+        """ dict: The `pts_time` holding a list of time stamps for each frame and `keyframes`
+        holding the frame index of each key frame within the video file. """
+        self._initialize()
+        return self._video_meta_data
+
+    def _initialize(self):
+        """ Open the video file and obtain the key frame information, scanning the video if the
+        information has not been provided. """
+        if self._reader is not None:
+            return
+        self._reader = imageio.get_reader(self._filename, "ffmpeg")
+        self._reader.use_patch = True
+        self._count, self._video_meta_data = self._reader.get_frame_info(
+            frame_pts=self._video_meta_data.get("pts_time", None),
+            keyframes=self._video_meta_data.get("keyframes", None))
+        keyframes = list(self._video_meta_data["keyframes"])
+        # The first frame of a video can always be decoded without seeking
+        self._keyframes = keyframes if keyframes and keyframes[0] == 0 else [0] + keyframes
+        logger.debug("Initialized reader: (count: %s, keyframes: %s)",
+                     self._count, len(self._keyframes))
+
+    def get_frame(self, index):
+        """ Obtain a single frame from the video file.
+
+        Parameters
+        ----------
+        index: int
+            The index number (frame number) of the frame to retrieve. NB: The first frame is
+            index `0`
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The requested frame in `BGR` channel order
+        """
+        self._initialize()
+        if not 0 <= index < self._count:
+            raise IndexError(f"Frame index {index} is out of range for a video of {self._count} "
+                             "frames")
+        keyframe = self._keyframes[bisect(self._keyframes, index) - 1]
+        frames = self._cache.setdefault(keyframe, [])
+        self._cache.move_to_end(keyframe)
+        if index - keyframe < len(frames):
+            logger.trace("Returning cached frame: %s", index)
+            return frames[index - keyframe].copy()
+
+        # Carry on decoding if the reader is already within the group, otherwise seek back to the
+        # group's key frame
+        start = self._position + 1 if keyframe <= self._position < index else keyframe
+        logger.trace("Decoding frames: (keyframe: %s, start: %s, index: %s)",
+                     keyframe, start, index)
+        for frame_index in range(start, index + 1):
+            image = np.ascontiguousarray(np.asarray(self._reader.get_data(frame_index))[..., ::-1])
+            self._position = frame_index
+            is_cached = (frame_index - keyframe == len(frames)
+                         and self._make_room(image.nbytes, keyframe))
+            if is_cached:
+                frames.append(image)
+        return image.copy() if is_cached else image
+
+    def _make_room(self, size, keyframe):
+        """ Evict the least recently used groups of frames from the cache until there is room to
+        add a frame of the given size.
+
+        Parameters
+        ----------
+        size: int
+            The size, in bytes, of the frame that is to be added to the cache
+        keyframe: int
+            The key frame of the group that the frame is to be added to. This group is never
+            evicted
+
+        Returns
+        -------
+        bool
+            ``True`` if the frame can be added to the cache, ``False`` if the group currently
+            being decoded already fills the cache
+        """
+        while self._cached_bytes + size > self._cache_size:
+            oldest = next(iter(self._cache))
+            if oldest == keyframe:
+                return False
+            self._cached_bytes -= sum(frame.nbytes for frame in self._cache.pop(oldest))
+        self._cached_bytes += size
+        return True
+
+    def close(self):
+        """ Close the video file and empty the frame cache. """
+        logger.debug("Closing %s", self.__class__.__name__)
+        if self._reader is not None:
+            self._reader.close()
+        self._reader = None
+        self._position = -1
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+
+
 class ImageIO():
     """ Perform disk IO for images or videos in a background thread.
 
@@ -974,6 +1521,7 @@ class ImagesLoader(ImageIO):
 
         super().__init__(path, queue_size=queue_size)
         self._skip_list = set() if skip_list is None else set(skip_list)
+        self._keyframe_info = None
         self._is_video = self._check_for_video()
         self._fps = self._get_fps()
 
@@ -1024,6 +1572,28 @@ class ImagesLoader(ImageIO):
         logger.debug(skip_list)
         self._skip_list = set(skip_list)
 
+    def add_video_meta_data(self, video_meta_data):
+        """ Add the known key frame information for a video to this :class:`ImagesLoader`.
+
+        When provided, the loader seeks past long runs of frames in the :attr:`skip_list` using
+        the video's key frames, rather than decoding and discarding them.
+
+        Parameters
+        ----------
+        video_meta_data: dict
+            The video meta information, as stored in an alignments file, containing the keys
+            `pts_time` holding a list of time stamps for each frame and `keyframes` holding the
+            frame index of each key frame. If either value is ``None`` then the information is
+            ignored.
+        """
+        if not self._is_video or any(video_meta_data.get(key) is None
+                                     for key in ("pts_time", "keyframes")):
+            logger.debug("No video meta data to add")
+            return
+        logger.debug("Adding video meta data: (frames: %s, keyframes: %s)",
+                     len(video_meta_data["pts_time"]), len(video_meta_data["keyframes"]))
+        self._keyframe_info = video_meta_data
+
     def _check_for_video(self):
         """ Check whether the input is a video
 
@@ -1132,10 +1702,7 @@ class ImagesLoader(ImageIO):
         """
         logger.debug("Loading frames from video: '%s'", self.location)
         reader = imageio.get_reader(self.location, "ffmpeg")
-        for idx, frame in enumerate(reader):
-            if idx in self._skip_list:
-                logger.trace("Skipping frame %s due to skip list", idx)
-                continue
+        for idx, frame in self._iterate_video(reader):
             # Convert to BGR for cv2 compatibility
             frame = frame[:, :, ::-1]
             filename = self._dummy_video_framename(idx)
@@ -1143,6 +1710,52 @@ class ImagesLoader(ImageIO):
             yield filename, frame
         reader.close()
 
+    def _iterate_video(self, reader):
+        """ Iterate through the frames of a video that are not in the :attr:`skip_list`.
+
+        If the video's key frames have been provided with :func:`add_video_meta_data` then frames
+        in the skip list are not requested from the reader. Short gaps are skipped by the reader
+        decoding and discarding the frames, whilst longer gaps (more than 100 frames) cause the
+        reader to seek to the key frame preceding the next required frame. Otherwise every frame
+        is decoded in order, as seeking by timestamp is not guaranteed to land on the correct
+        frame for variable frame rate videos.
+
+        Parameters
+        ----------
+        reader: :class:`imageio.plugins.ffmpeg.FfmpegFormat.Reader`
+            The reader for the video file
+
+        Yields
+        ------
+        index: int
+            The index of the frame within the video
+        frame: :class:`numpy.ndarray`
+            The frame in RGB order
+        """
+        if not self._skip_list or self._keyframe_info is None:
+            for idx, frame in enumerate(reader):
+                if idx in self._skip_list:
+                    logger.trace("Skipping frame %s due to skip list", idx)
+                    continue
+                yield idx, frame
+            return
+
+        logger.debug("Seeking past %s skipped frames", len(self._skip_list))
+        reader.use_patch = True
+        reader.get_frame_info(frame_pts=self._keyframe_info["pts_time"],
+                              keyframes=self._keyframe_info["keyframes"])
+        idx = 0
+        while True:
+            if idx in self._skip_list:
+                idx += 1
+                continue
+            try:
+                frame = reader.get_data(idx)
+            except (IndexError, StopIteration):
+                break
+            yield idx, frame
+            idx += 1
+
     def _dummy_video_framename(self, index):
         """ Return a dummy filename for video files
 
@@ -1295,12 +1908,9 @@ class SingleFrameLoader(ImagesLoader):
 
     def _get_count_and_filelist(self, fast_count, count):
         if self._is_video:
-            self._reader = imageio.get_reader(self.location, "ffmpeg")
-            self._reader.use_patch = True
-            count, video_meta_data = self._reader.get_frame_info(
-                frame_pts=self._video_meta_data.get("pts_time", None),
-                keyframes=self._video_meta_data.get("keyframes", None))
-            self._video_meta_data = video_meta_data
+            self._reader = VideoFrameReader(self.location, video_meta_data=self._video_meta_data)
+            count = self._reader.count
+            self._video_meta_data = self._reader.video_meta_data
         super()._get_count_and_filelist(fast_count, count)
 
     def image_from_index(self, index):
@@ -1321,16 +1931,16 @@ class SingleFrameLoader(ImagesLoader):
 
         Notes
         -----
-        Retrieving frames from video files can be slow as the whole video file needs to be
-        iterated to retrieve the requested frame. If a frame has already been retrieved, then
-        retrieving frames of a higher index will be quicker than retrieving frames of a lower
-        index, as iteration needs to start from the beginning again when navigating backwards.
+        Frames from video files are retrieved with a :class:`VideoFrameReader`, which seeks to the
+        key frame preceding the requested frame and decodes forward from there. Recently decoded
+        groups of frames are cached, so navigating around recently viewed frames is fast in
+        either direction.
 
         We do not use a background thread for this task, as it is assumed that requesting an image
         by index will be done when required.
         """
         if self.is_video:
-            image = self._reader.get_data(index)[..., ::-1]
+            image = self._reader.get_frame(index)
             filename = self._dummy_video_framename(index)
         else:
             filename = self.file_list[index]
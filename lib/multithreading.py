@@ -2,11 +2,14 @@
 """ Multithreading/processing utils for faceswap """
 
 import logging
+import multiprocessing as mp
+from logging.handlers import QueueHandler, QueueListener
 from multiprocessing import cpu_count
 
 import queue as Queue
 import sys
 import threading
+import traceback
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -122,6 +125,174 @@ class MultiThread():
         logger.debug("Joined all Threads: '%s'", self._name)
 
 
+def _run_process(target, name, log_queue, loglevel, error_queue, args, kwargs):
+    """ The entry point for processes launched by :class:`MultiProcess`.
+
+    Routes all log records from the child process into the parent's log queue, runs the target
+    and passes any errors back to the parent process.
+
+    Parameters
+    ----------
+    target: python function
+        The function to run in the child process. Must be importable from a module
+    name: str
+        The name of the child process
+    log_queue: :class:`multiprocessing.Queue`
+        The queue to place log records into
+    loglevel: int
+        The numeric log level of the parent process' root logger
+    error_queue: :class:`multiprocessing.Queue`
+        The queue to place any errors into
+    args: tuple
+        The positional arguments to pass to the target
+    kwargs: dict
+        The keyword arguments to pass to the target
+    """
+    import lib.logger  # noqa pylint:disable=import-outside-toplevel,unused-import
+    rootlogger = logging.getLogger()
+    for handler in rootlogger.handlers[:]:
+        rootlogger.removeHandler(handler)
+    rootlogger.addHandler(QueueHandler(log_queue))
+    rootlogger.setLevel(loglevel)
+    try:
+        target(*args, **kwargs)
+    except Exception as err:  # pylint: disable=broad-except
+        logger.debug("Error in process (%s): %s", name, str(err))
+        error_queue.put((name, str(err), traceback.format_exc()))
+        sys.exit(1)
+
+
+class MultiProcess():
+    """ Processing for CPU heavy ops that would otherwise be bound by the GIL.
+
+    Processes are always started with the "spawn" method, so the target must be an importable
+    function and all arguments must be picklable. Log records are routed back to the parent's
+    log handlers and errors are caught in the child processes and re-raised in the parent.
+
+    Parameters
+    ----------
+    target: python function
+        The function to run in each process
+    args: tuple
+        The positional arguments to pass to the target
+    process_count: int, optional
+        The number of processes to launch. Default: `1`
+    name: str, optional
+        The name to give the processes. ``None`` to use the name of the target. Default: ``None``
+    kwargs: dict
+        The keyword arguments to pass to the target
+    """
+    def __init__(self, target, *args, process_count=1, name=None, **kwargs):
+        self._name = name if name else target.__name__
+        logger.debug("Initializing %s: (target: '%s', process_count: %s)",
+                     self.__class__.__name__, self._name, process_count)
+        logger.trace("args: %s, kwargs: %s", args, kwargs)
+        self._context = mp.get_context("spawn")
+        self._process_count = process_count
+        self._processes = list()
+        self._target = target
+        self._args = args
+        self._kwargs = kwargs
+        self._error_queue = self._context.Queue()
+        self._log_queue = self._context.Queue()
+        self._log_listener = None
+        self._errors = list()
+        logger.debug("Initialized %s: '%s'", self.__class__.__name__, self._name)
+
+    @property
+    def has_error(self):
+        """ Return true if a process has errored, otherwise false """
+        self._collect_errors()
+        return bool(self._errors)
+
+    @property
+    def errors(self):
+        """ Return a list of process errors as (`name`, `message`, `traceback`) tuples """
+        self._collect_errors()
+        return self._errors
+
+    @property
+    def name(self):
+        """ Return process name """
+        return self._name
+
+    def _collect_errors(self):
+        """ Move any errors that have been raised by the child processes from the error queue
+        into :attr:`_errors`. Child processes which have died without reporting an error are
+        also collected. """
+        while True:
+            try:
+                self._errors.append(self._error_queue.get(block=False))
+            except Queue.Empty:
+                break
+        for process in self._processes:
+            if (process.exitcode not in (None, 0) and
+                    not any(err[0] == process.name for err in self._errors)):
+                self._errors.append((process.name,
+                                     "Process exited with code {}".format(process.exitcode),
+                                     ""))
+
+    def check_and_raise_error(self):
+        """ Checks for errors in the processes and raises them in caller """
+        if not self.has_error:
+            return
+        name, message, trace = self._errors[0]
+        logger.debug("Process error caught: %s", self._errors)
+        if trace:
+            logger.error("Traceback from process '%s':\n%s", name, trace)
+        raise RuntimeError("Error in process '{}': {}".format(name, message))
+
+    def is_alive(self):
+        """ Return true if any process is alive else false """
+        return any(process.is_alive() for process in self._processes)
+
+    def start(self):
+        """ Start the processes with the given method and args """
+        logger.debug("Starting process(es): '%s'", self._name)
+        rootlogger = logging.getLogger()
+        self._log_listener = QueueListener(self._log_queue,
+                                           *rootlogger.handlers,
+                                           respect_handler_level=True)
+        self._log_listener.start()
+        for idx in range(self._process_count):
+            name = "{}_{}".format(self._name, idx)
+            logger.debug("Starting process %s of %s: '%s'",
+                         idx + 1, self._process_count, name)
+            process = self._context.Process(target=_run_process,
+                                            name=name,
+                                            args=(self._target,
+                                                  name,
+                                                  self._log_queue,
+                                                  rootlogger.level,
+                                                  self._error_queue,
+                                                  self._args,
+                                                  self._kwargs),
+                                            daemon=True)
+            process.start()
+            self._processes.append(process)
+        logger.debug("Started all processes '%s': %s", self._name, len(self._processes))
+
+    def completed(self):
+        """ Return False if there are any alive processes else True """
+        retval = all(not process.is_alive() for process in self._processes)
+        logger.debug(retval)
+        return retval
+
+    def join(self):
+        """ Join the running processes, catching and re-raising any errors """
+        logger.debug("Joining Processes: '%s'", self._name)
+        for process in self._processes:
+            logger.debug("Joining Process: '%s'", process.name)
+            process.join()
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+        if self.has_error:
+            logger.error("Caught exception in process: '%s'", self._errors[0][0])
+            self.check_and_raise_error()
+        logger.debug("Joined all Processes: '%s'", self._name)
+
+
 class BackgroundGenerator(MultiThread):
     """ Run a queue in the background. From:
         https://stackoverflow.com/questions/7323664/ """
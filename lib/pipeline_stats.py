@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+""" Per stage throughput and queue statistics for Faceswap's threaded pipelines.
+
+Collects the statistics recorded by :class:`lib.queue_manager.MonitoredQueue` for each stage of a
+pipeline, samples how full each of the queues between the stages are, and outputs a summary at
+the end of the run. The statistics can optionally be streamed to a JSON lines file whilst the
+pipeline is running.
+"""
+import json
+import logging
+import threading
+
+from time import perf_counter, time
+
+from lib.queue_manager import queue_manager
+
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class PipelineStats():
+    """ Collect throughput, busy time and blocking time for each stage of a pipeline, along with
+    the fill level of the queues that connect the stages.
+
+    A stage is defined by the queue that it takes its items from and the queue that it puts its
+    items to. The threads that belong to a stage are those that have taken a (non "EOF") item
+    from the stage's input queue or, for stages without an input queue, put an item to the
+    stage's output queue. Threads which have put items to a stage's output queue are also
+    assigned to the stage, if they have not already been assigned to an earlier stage.
+
+    Parameters
+    ----------
+    stages: list
+        (`name`, `input queue name`, `output queue name`) for each stage of the pipeline in
+        processing order. The queue names are the names of queues held by
+        :mod:`lib.queue_manager`, which must have been added with ``monitored=True`` for their
+        activity to be recorded. ``None`` should be passed for a stage which does not take its
+        input from, or put its output to, a queue
+    stats_file: str, optional
+        Full path to a file to stream the statistics to as JSON lines. ``None`` to not stream the
+        statistics. Default: ``None``
+    interval: float, optional
+        The number of seconds between each entry written to :attr:`stats_file`. Default: `5.0`
+    """
+    _sample_interval = 0.25
+
+    def __init__(self, stages, stats_file=None, interval=5.0):
+        logger.debug("Initializing %s: (stages: %s, stats_file: %s, interval: %s)",
+                     self.__class__.__name__, stages, stats_file, interval)
+        self._stages = stages
+        self._stats_file = stats_file
+        self._interval = interval
+        self._queue_names = sorted(set(name for _, in_queue, out_queue in stages
+                                       for name in (in_queue, out_queue) if name is not None))
+        self._fill = {name: dict(samples=0, total=0, max=0) for name in self._queue_names}
+        self._start = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    def start(self):
+        """ Start sampling the queues and, if requested, streaming the statistics to file. """
+        logger.debug("Starting %s", self.__class__.__name__)
+        self._start = perf_counter()
+        self._thread = threading.Thread(target=self._monitor, name="pipeline_stats", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop monitoring, write the final statistics to file and output the summary. """
+        logger.debug("Stopping %s", self.__class__.__name__)
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._output_summary(self.get_stats())
+
+    def _monitor(self):
+        """ Sample the queue sizes and periodically write the statistics to :attr:`stats_file`
+        until :func:`stop` is called. """
+        outfile = None
+        if self._stats_file:
+            try:
+                outfile = open(self._stats_file, "w", encoding="utf-8")
+            except OSError as err:
+                logger.warning("Unable to open pipeline statistics file '%s'. Statistics will "
+                               "not be streamed: %s", self._stats_file, str(err))
+        try:
+            next_write = perf_counter() + self._interval
+            while not self._stop_event.wait(self._sample_interval):
+                self._sample_queues()
+                if outfile is not None and perf_counter() >= next_write:
+                    self._write(outfile)
+                    next_write += self._interval
+            if outfile is not None:
+                self._write(outfile)
+        finally:
+            if outfile is not None:
+                outfile.close()
+
+    def _sample_queues(self):
+        """ Record the current size of each of the pipeline's queues. """
+        for name in self._queue_names:
+            queue = queue_manager.queues.get(name)
+            if queue is None:
+                continue
+            size = queue.qsize()
+            fill = self._fill[name]
+            fill["samples"] += 1
+            fill["total"] += size
+            fill["max"] = max(fill["max"], size)
+
+    def _write(self, outfile):
+        """ Write the current statistics as a line of JSON.
+
+        Parameters
+        ----------
+        outfile: file object
+            The open file to write the statistics to
+        """
+        stats = self.get_stats()
+        stats["timestamp"] = time()
+        outfile.write(json.dumps(stats) + "\n")
+        outfile.flush()
+
+    def _get_stage_threads(self):
+        """ Assign the threads which have accessed the pipeline's queues to their stages.
+
+        Returns
+        -------
+        dict
+            The stage name as key, with a `set` of thread identifiers as value
+        """
+        assigned = set()
+        retval = dict()
+        for name, in_queue, out_queue in self._stages:
+            threads = set()
+            if in_queue is not None:
+                threads.update(ident for ident, stats in self._thread_stats(in_queue).items()
+                               if stats.gets)
+            else:
+                threads.update(ident for ident, stats in self._thread_stats(out_queue).items()
+                               if stats.puts)
+            if out_queue is not None:
+                threads.update(ident for ident, stats in self._thread_stats(out_queue).items()
+                               if stats.puts and ident not in assigned)
+            assigned.update(threads)
+            retval[name] = threads
+        return retval
+
+    @classmethod
+    def _thread_stats(cls, queue_name):
+        """ Obtain the per thread statistics for a queue.
+
+        Parameters
+        ----------
+        queue_name: str or ``None``
+            The name of the queue to obtain statistics for
+
+        Returns
+        -------
+        dict
+            The thread identifier as key, :class:`lib.queue_manager._ThreadStats` as value. An
+            empty dictionary if the queue does not exist
+        """
+        queue = queue_manager.queues.get(queue_name) if queue_name is not None else None
+        if queue is None or not hasattr(queue, "thread_stats"):
+            return dict()
+        return queue.thread_stats
+
+    def get_stats(self):
+        """ Obtain the current statistics for each stage and queue of the pipeline.
+
+        Returns
+        -------
+        dict
+            `elapsed` the number of seconds since monitoring started. `stages`: a dictionary of
+            stage name to a dictionary containing the `threads`, `items`, `items_per_second`,
+            `busy` (seconds), `utilization` (percentage of the stage's available thread time
+            spent busy), `input_wait` and `output_wait` (seconds). `queues`: a dictionary of
+            queue name to a dictionary containing the `maxsize`, `size`, `mean_fill` and
+            `max_fill`
+        """
+        stage_threads = self._get_stage_threads()
+        stages = dict()
+        for name, in_queue, out_queue in self._stages:
+            threads = stage_threads[name]
+            in_stats = self._thread_stats(in_queue)
+            out_stats = self._thread_stats(out_queue)
+            windows = dict()
+            for stats in (in_stats, out_stats):
+                for ident in threads.intersection(stats):
+                    first, last = windows.get(ident, (stats[ident].first, stats[ident].last))
+                    windows[ident] = (min(first, stats[ident].first),
+                                      max(last, stats[ident].last))
+
+            items = (sum(in_stats[ident].gets for ident in threads.intersection(in_stats))
+                     if in_queue is not None else
+                     sum(out_stats[ident].puts for ident in threads.intersection(out_stats)))
+            input_wait = sum(in_stats[ident].get_wait for ident in threads.intersection(in_stats))
+            output_wait = sum(out_stats[ident].put_wait
+                              for ident in threads.intersection(out_stats))
+            active = sum(last - first for first, last in windows.values())
+            wall = (max(last for _, last in windows.values()) -
+                    min(first for first, _ in windows.values())) if windows else 0.0
+            busy = max(0.0, active - input_wait - output_wait)
+            available = wall * len(threads)
+            stages[name] = dict(threads=len(threads),
+                                items=items,
+                                items_per_second=items / wall if wall else 0.0,
+                                busy=busy,
+                                utilization=100 * busy / available if available else 0.0,
+                                input_wait=input_wait,
+                                output_wait=output_wait)
+
+        queues = dict()
+        for name in self._queue_names:
+            queue = queue_manager.queues.get(name)
+            fill = self._fill[name]
+            queues[name] = dict(maxsize=queue.maxsize if queue is not None else 0,
+                                size=queue.qsize() if queue is not None else 0,
+                                mean_fill=fill["total"] / max(fill["samples"], 1),
+                                max_fill=fill["max"])
+        elapsed = perf_counter() - self._start if self._start is not None else 0.0
+        return dict(elapsed=elapsed, stages=stages, queues=queues)
+
+    @classmethod
+    def _output_summary(cls, stats):
+        """ Output the summary of the pipeline statistics to the logger.
+
+        Parameters
+        ----------
+        stats: dict
+            The statistics, as returned from :func:`get_stats`
+        """
+        logger.info("-------------------------")
+        logger.info("Pipeline statistics (%.1fs):", stats["elapsed"])
+        logger.info("%-10s %7s %8s %9s %8s %12s %13s",
+                    "Stage", "Threads", "Items", "Items/s", "Busy %", "Input wait", "Output wait")
+        for name, stage in stats["stages"].items():
+            logger.info("%-10s %7s %8s %9.2f %8.1f %11.1fs %12.1fs",
+                        name, stage["threads"], stage["items"], stage["items_per_second"],
+                        stage["utilization"], stage["input_wait"], stage["output_wait"])
+        logger.info("%-15s %8s %10s %9s", "Queue", "Max size", "Mean fill", "Max fill")
+        for name, queue in stats["queues"].items():
+            logger.info("%-15s %8s %10.1f %9s",
+                        name, queue["maxsize"], queue["mean_fill"], queue["max_fill"])
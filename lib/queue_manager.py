@@ -8,11 +8,126 @@ import logging
 import threading
 
 from queue import Queue, Empty as QueueEmpty  # pylint: disable=unused-import; # noqa
-from time import sleep
+from time import perf_counter, sleep
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
+class _ThreadStats():  # pylint:disable=too-few-public-methods
+    """ The activity of a single thread on a :class:`MonitoredQueue`.
+
+    Attributes
+    ----------
+    gets: int
+        The number of items, excluding "EOF", that the thread has taken from the queue. Lists of
+        items count as the number of items within the list
+    get_wait: float
+        The total time, in seconds, that the thread has spent blocked waiting to get from the
+        queue
+    puts: int
+        The number of items, excluding "EOF", that the thread has put to the queue. Lists of items
+        count as the number of items within the list
+    put_wait: float
+        The total time, in seconds, that the thread has spent blocked waiting to put to the queue
+    first: float
+        The :func:`time.perf_counter` time that the thread first accessed the queue
+    last: float
+        The :func:`time.perf_counter` time that the thread last accessed the queue
+    """
+    def __init__(self, start):
+        self.gets = 0
+        self.get_wait = 0.0
+        self.puts = 0
+        self.put_wait = 0.0
+        self.first = start
+        self.last = start
+
+
+class MonitoredQueue(Queue):
+    """ A standard :class:`queue.Queue` that records, for each thread that accesses it, the
+    number of items transferred and the amount of time spent blocked waiting on the queue.
+
+    Parameters
+    ----------
+    maxsize: int, optional
+        The maximum queue size. Set to `0` for unlimited. Default: `0`
+    """
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize=maxsize)
+        self._thread_stats = dict()
+
+    @property
+    def thread_stats(self):
+        """ dict: The thread identifier as key, with the :class:`_ThreadStats` for that thread as
+        value """
+        return dict(self._thread_stats)
+
+    @classmethod
+    def _count(cls, item):
+        """ Obtain the number of items that a queue item represents.
+
+        Parameters
+        ----------
+        item: object
+            The item that has been put to or taken from the queue
+
+        Returns
+        -------
+        int
+            `0` for "EOF", the length of the list for a list of items, otherwise `1`
+        """
+        if isinstance(item, str) and item == "EOF":
+            return 0
+        return len(item) if isinstance(item, list) else 1
+
+    def _get_stats(self, start):
+        """ Obtain the stats object for the calling thread.
+
+        Parameters
+        ----------
+        start: float
+            The time that the current queue operation started
+
+        Returns
+        -------
+        :class:`_ThreadStats`
+            The stats for the calling thread
+        """
+        ident = threading.get_ident()
+        retval = self._thread_stats.get(ident)
+        if retval is None:
+            retval = _ThreadStats(start)
+            self._thread_stats[ident] = retval
+        return retval
+
+    def get(self, block=True, timeout=None):
+        """ Remove and return an item from the queue, recording the time spent blocked.
+
+        See :func:`queue.Queue.get` """
+        start = perf_counter()
+        stats = self._get_stats(start)
+        try:
+            item = super().get(block=block, timeout=timeout)
+        finally:
+            stats.last = perf_counter()
+            stats.get_wait += stats.last - start
+        stats.gets += self._count(item)
+        return item
+
+    def put(self, item, block=True, timeout=None):
+        """ Put an item into the queue, recording the time spent blocked.
+
+        See :func:`queue.Queue.put` """
+        start = perf_counter()
+        stats = self._get_stats(start)
+        try:
+            super().put(item, block=block, timeout=timeout)
+        finally:
+            stats.last = perf_counter()
+            stats.put_wait += stats.last - start
+        stats.puts += self._count(item)
+
+
 class QueueManager():
     """ Manage queues for availabilty across processes
         Don't import this class directly, instead
@@ -24,7 +139,7 @@ class QueueManager():
         self.queues = dict()
         logger.debug("Initialized %s", self.__class__.__name__)
 
-    def add_queue(self, name, maxsize=0, create_new=False):
+    def add_queue(self, name, maxsize=0, create_new=False, monitored=False):
         """ Add a queue to the manager.
 
         Adds an event "shutdown" to the queue that can be used to indicate to a process that any
@@ -41,14 +156,19 @@ class QueueManager():
             raised preventing the creation of duplicate queues. If this value is ``True`` and
             the given name exists then an integer is appended to the end of the queue name and
             incremented until the given name is unique. Default: ``False``
+        monitored: bool, optional
+            ``True`` to create a :class:`MonitoredQueue` which records the activity of each thread
+            that accesses it, for queues that are reported on by
+            :class:`lib.pipeline_stats.PipelineStats`. ``False`` to create a standard
+            :class:`queue.Queue`. Default: ``False``
 
         Returns
         -------
         str
             The final generated name for the queue
         """
-        logger.debug("QueueManager adding: (name: '%s', maxsize: %s, create_new: %s)",
-                     name, maxsize, create_new)
+        logger.debug("QueueManager adding: (name: '%s', maxsize: %s, create_new: %s, "
+                     "monitored: %s)", name, maxsize, create_new, monitored)
         if not create_new and name in self.queues:
             raise ValueError("Queue '{}' already exists.".format(name))
         if create_new and name in self.queues:
@@ -57,7 +177,7 @@ class QueueManager():
                 name = f"{name}{i}"
             logger.debug("Duplicate queue name. Updated to: '%s'", name)
 
-        queue = Queue(maxsize=maxsize)
+        queue = MonitoredQueue(maxsize=maxsize) if monitored else Queue(maxsize=maxsize)
 
         setattr(queue, "shutdown", self.shutdown)
         self.queues[name] = queue
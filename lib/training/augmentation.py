@@ -2,9 +2,11 @@
 """ Processes the augmentation of images for feeding into a Faceswap model. """
 import logging
 
+from threading import local
+
 import cv2
 import numpy as np
-from scipy.interpolate import griddata
+from scipy.spatial import Delaunay
 
 from lib.image import batch_convert_color
 
@@ -44,6 +46,12 @@ class ImageAugmentation():
     is_display: bool
         Flag to indicate whether these augmentations are for time-lapses/preview images (``True``)
         or standard training data (``False``)
+
+    Notes
+    -----
+    Augmentation is performed on whole batches at a time. Intermediate arrays are written into
+    buffers that are reused between iterations. As the training data generator runs in multiple
+    threads, these buffers are held per thread.
     """
     def __init__(self, batchsize, is_display, input_size, output_shapes, coverage_ratio, config):
         logger.debug("Initializing %s: (batchsize: %s, is_display: %s, input_size: %s, "
@@ -68,6 +76,9 @@ class ImageAugmentation():
         self._coverage_ratio = coverage_ratio
         self._scale = 5  # Normal random variable scale
 
+        # Re-usable arrays, local to each thread that calls the augmentation functions
+        self._thread_cache = local()
+
         logger.debug("Initialized %s", self.__class__.__name__)
 
     def initialize(self, training_size):
@@ -112,7 +123,8 @@ class ImageAugmentation():
         edge_anchors = np.array([(0, 0), (0, p_mx), (p_mx, p_mx), (p_mx, 0),
                                  (p_hf, 0), (p_hf, p_mx), (p_mx, p_hf), (0, p_hf)]).astype("int32")
         edge_anchors = np.broadcast_to(edge_anchors, (self._batchsize, 8, 2))
-        grids = np.mgrid[0:p_mx:complex(self._training_size), 0:p_mx:complex(self._training_size)]
+        # Only the area that is cropped for feeding the model needs to be warped
+        grids = np.mgrid[tgt_slices, tgt_slices].reshape(2, -1).astype("float64")
 
         self._constants = dict(clahe_base_contrast=clahe_base_contrast,
                                tgt_slices=tgt_slices,
@@ -126,6 +138,32 @@ class ImageAugmentation():
         logger.debug("Initialized constants: %s", {k: str(v) if isinstance(v, np.ndarray) else v
                                                    for k, v in self._constants.items()})
 
+    def _get_buffer(self, name, shape, dtype="uint8"):
+        """ Obtain a re-usable array for the calling thread, creating it if it does not exist or
+        if the requested shape or data type has changed.
+
+        Parameters
+        ----------
+        name: str
+            The name of the buffer to obtain
+        shape: tuple
+            The required shape of the buffer
+        dtype: str, optional
+            The required data type of the buffer. Default: `"uint8"`
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            An uninitialized array of the requested shape and data type
+        """
+        buffers = self._thread_cache.__dict__.setdefault("buffers", {})
+        retval = buffers.get(name)
+        if retval is None or retval.shape != shape or retval.dtype != dtype:
+            logger.debug("Creating buffer: (name: %s, shape: %s, dtype: %s)", name, shape, dtype)
+            retval = np.empty(shape, dtype=dtype)
+            buffers[name] = retval
+        return retval
+
     # <<< TARGET IMAGES >>> #
     def get_targets(self, batch):
         """ Returns the target images, and masks, if required.
@@ -156,11 +194,14 @@ class ImageAugmentation():
         """
         logger.trace("Compiling targets: batch shape: %s", batch.shape)
         slices = self._constants["tgt_slices"]
-        target_batch = [np.array([cv2.resize(image[slices, slices, :],
-                                             (size, size),
-                                             cv2.INTER_AREA)
-                                  for image in batch], dtype='float32') / 255.
-                        for size in self._output_sizes]
+        target_batch = []
+        for size in self._output_sizes:
+            resized = self._get_buffer(f"target_{size}",
+                                       (batch.shape[0], size, size, batch.shape[-1]),
+                                       dtype=batch.dtype)
+            for image, dst in zip(batch, resized):
+                cv2.resize(image[slices, slices, :], (size, size), dst=dst)
+            target_batch.append(np.divide(resized, 255., dtype="float32"))
         logger.trace("Target image shapes: %s",
                      [tgt_images.shape for tgt_images in target_batch])
 
@@ -262,13 +303,14 @@ class ImageAugmentation():
             (np.random.rand(self._batchsize, 1, 1, 3).astype("float32") * (adjust * 2)) - adjust)
         logger.trace("Random LAB adjustments: %s", randoms)
 
-        for image, rand in zip(batch, randoms):
-            for idx in range(rand.shape[-1]):
-                adjustment = rand[:, :, idx]
-                if adjustment >= 0:
-                    image[:, :, idx] = ((255 - image[:, :, idx]) * adjustment) + image[:, :, idx]
-                else:
-                    image[:, :, idx] = image[:, :, idx] * (1 + adjustment)
+        # The adjustment only depends on the pixel value, so calculate a look up table for every
+        # image and channel at once. Positive adjustments move towards 255, negative towards 0
+        values = np.arange(256, dtype="uint8")[:, None]
+        luts = np.where(randoms >= 0,
+                        ((255 - values) * randoms) + values,
+                        values * (1 + randoms)).astype("uint8")
+        for image, lut in zip(batch, luts):
+            cv2.LUT(image, lut, dst=image)
         return batch
 
     # <<< IMAGE AUGMENTATION >>> #
@@ -306,21 +348,50 @@ class ImageAugmentation():
             shift_range,
             size=(self._batchsize, 2)).astype("float32") * self._training_size
 
-        mats = np.array(
-            [cv2.getRotationMatrix2D((self._training_size // 2, self._training_size // 2),
-                                     rot,
-                                     scl)
-             for rot, scl in zip(rotation, scale)]).astype("float32")
+        mats = self._get_rotation_matrices(rotation, scale)
         mats[..., 2] += tform
 
-        batch = np.array([cv2.warpAffine(image,
-                                         mat,
-                                         (self._training_size, self._training_size),
-                                         borderMode=cv2.BORDER_REPLICATE)
-                          for image, mat in zip(batch, mats)])
+        retval = self._get_buffer("transform", batch.shape, dtype=batch.dtype)
+        for image, mat, dst in zip(batch, mats, retval):
+            cv2.warpAffine(image,
+                           mat,
+                           (self._training_size, self._training_size),
+                           dst=dst,
+                           borderMode=cv2.BORDER_REPLICATE)
 
         logger.trace("Randomly transformed image")
-        return batch
+        return retval
+
+    def _get_rotation_matrices(self, rotation, scale):
+        """ Obtain the rotation matrices for a batch about the center of the training image.
+
+        This is a vectorized implementation of :func:`cv2.getRotationMatrix2D`.
+
+        Parameters
+        ----------
+        rotation: :class:`numpy.ndarray`
+            The rotation, in degrees, for each image in the batch
+        scale: :class:`numpy.ndarray`
+            The scaling factor for each image in the batch
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (`batchsize`, 2, 3) `float32` rotation matrices
+        """
+        center = self._training_size // 2
+        angle = rotation.astype("float64") * (np.pi / 180)
+        alpha = np.cos(angle) * scale
+        beta = np.sin(angle) * scale
+
+        retval = np.empty((rotation.shape[0], 2, 3), dtype="float64")
+        retval[:, 0, 0] = alpha
+        retval[:, 0, 1] = beta
+        retval[:, 0, 2] = (1 - alpha) * center - beta * center
+        retval[:, 1, 0] = -beta
+        retval[:, 1, 1] = alpha
+        retval[:, 1, 2] = beta * center + (1 - alpha) * center
+        return retval.astype("float32")
 
     def random_flip(self, batch):
         """ Perform random horizontal flipping on the passed in batch.
@@ -373,8 +444,8 @@ class ImageAugmentation():
             A 4-dimensional array of the same shape as :attr:`batch` with warping applied.
         """
         if to_landmarks:
-            return self._random_warp_landmarks(batch, **kwargs).astype("float32") / 255.0
-        return self._random_warp(batch).astype("float32") / 255.0
+            return np.divide(self._random_warp_landmarks(batch, **kwargs), 255.0, dtype="float32")
+        return np.divide(self._random_warp(batch), 255.0, dtype="float32")
 
     def _random_warp(self, batch):
         """ Randomly warp the input batch """
@@ -387,10 +458,19 @@ class ImageAugmentation():
         rands = np.random.normal(size=(self._batchsize, 2, 5, 5),
                                  scale=self._scale).astype("float32")
         batch_maps = np.stack((mapx, mapy), axis=1) + rands
-        batch_interp = np.array([[cv2.resize(map_, (pad, pad))[slices, slices] for map_ in maps]
-                                 for maps in batch_maps])
-        warped_batch = np.array([cv2.remap(image, interp[0], interp[1], cv2.INTER_LINEAR)
-                                 for image, interp in zip(batch, batch_interp)])
+
+        interp = self._get_buffer("warp_interp", (2, pad, pad), dtype="float32")
+        size = interp[0, slices, slices].shape
+        warped_batch = self._get_buffer("warp", (batch.shape[0], *size, batch.shape[-1]),
+                                        dtype=batch.dtype)
+        for image, maps, dst in zip(batch, batch_maps, warped_batch):
+            cv2.resize(maps[0], (pad, pad), dst=interp[0])
+            cv2.resize(maps[1], (pad, pad), dst=interp[1])
+            cv2.remap(image,
+                      interp[0, slices, slices],
+                      interp[1, slices, slices],
+                      cv2.INTER_LINEAR,
+                      dst=dst)
 
         logger.trace("Warped image shape: %s", warped_batch.shape)
         return warped_batch
@@ -399,47 +479,219 @@ class ImageAugmentation():
         """ From dfaker. Warp the image to a similar set of landmarks from the opposite side """
         logger.trace("Randomly warping landmarks")
         edge_anchors = self._constants["warp_lm_edge_anchors"]
-        grids = self._constants["warp_lm_grids"]
         slices = self._constants["tgt_slices"]
+        size = slices.stop - slices.start
 
         batch_dst = (batch_dst_points + np.random.normal(size=batch_dst_points.shape,
                                                          scale=2.0))
 
-        face_cores = [cv2.convexHull(np.concatenate([src[17:], dst[17:]], axis=0))
+        face_cores = [cv2.convexHull(np.concatenate([src[17:], dst[17:]], axis=0))[:, 0]
                       for src, dst in zip(batch_src_points.astype("int32"),
                                           batch_dst.astype("int32"))]
 
         batch_src = np.append(batch_src_points, edge_anchors, axis=1)
         batch_dst = np.append(batch_dst, edge_anchors, axis=1)
 
-        rem_indices = [list(set(idx for fpl in (src, dst)
-                                for idx, (pty, ptx) in enumerate(fpl)
-                                if cv2.pointPolygonTest(face_core, (pty, ptx), False) >= 0))
-                       for src, dst, face_core in zip(batch_src[:, :18, :],
-                                                      batch_dst[:, :18, :],
-                                                      face_cores)]
-        batch_src = [np.delete(src, idxs, axis=0) for idxs, src in zip(rem_indices, batch_src)]
-        batch_dst = [np.delete(dst, idxs, axis=0) for idxs, dst in zip(rem_indices, batch_dst)]
-
-        grid_z = np.array([griddata(dst, src, (grids[0], grids[1]), method="linear")
-                           for src, dst in zip(batch_src, batch_dst)])
-        maps = grid_z.reshape((self._batchsize,
-                               self._training_size,
-                               self._training_size,
-                               2)).astype("float32")
-        warped_batch = np.array([cv2.remap(image,
-                                           map_[..., 1],
-                                           map_[..., 0],
-                                           cv2.INTER_LINEAR,
-                                           cv2.BORDER_TRANSPARENT)
-                                 for image, map_ in zip(batch, maps)])
-        warped_batch = np.array([cv2.resize(image[slices, slices, :],
-                                            (self._input_size, self._input_size),
-                                            cv2.INTER_AREA)
-                                 for image in warped_batch])
+        maps = self._get_buffer("warp_lm_maps", (2, size, size), dtype="float32")
+        warped = self._get_buffer("warp_lm", (size, size, batch.shape[-1]), dtype=batch.dtype)
+        warped_batch = self._get_buffer("warp_lm_resized",
+                                        (batch.shape[0], self._input_size, self._input_size,
+                                         batch.shape[-1]),
+                                        dtype=batch.dtype)
+        for image, src, dst, face_core, out in zip(batch,
+                                                   batch_src,
+                                                   batch_dst,
+                                                   face_cores,
+                                                   warped_batch):
+            keep = np.ones((src.shape[0], ), dtype="bool")
+            keep[:18] = ~(self._points_in_hull(src[:18], face_core) |
+                          self._points_in_hull(dst[:18], face_core))
+            self._interpolate_landmarks(src[keep], dst[keep], maps)
+            cv2.remap(image, maps[1], maps[0], cv2.INTER_LINEAR, warped, cv2.BORDER_TRANSPARENT)
+            cv2.resize(warped, (self._input_size, self._input_size), dst=out)
         logger.trace("Warped batch shape: %s", warped_batch.shape)
         return warped_batch
 
+    @staticmethod
+    def _points_in_hull(points, hull):
+        """ Vectorized test for whether points lie inside, or on the edge of, a convex hull.
+
+        Parameters
+        ----------
+        points: :class:`numpy.ndarray`
+            The (`N`, 2) points to test
+        hull: :class:`numpy.ndarray`
+            The (`M`, 2) ordered vertices of the convex hull, as returned from
+            :func:`cv2.convexHull`
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            Boolean array of length `N`. ``True`` for points that are inside the hull
+        """
+        edges = np.roll(hull, -1, axis=0) - hull
+        offsets = points[:, None, :] - hull[None, :, :]
+        cross = edges[:, 0] * offsets[..., 1] - edges[:, 1] * offsets[..., 0]
+        return np.all(cross >= 0, axis=1) | np.all(cross <= 0, axis=1)
+
+    def _interpolate_landmarks(self, src_points, dst_points, maps):
+        """ Linearly interpolate the source landmark positions over the cropped training area,
+        based on a Delaunay triangulation of the destination landmarks.
+
+        This is equivalent to :func:`scipy.interpolate.griddata` in linear mode, but rather than
+        searching the triangulation for every point of the grid, each triangle is rasterized and
+        the points within it are interpolated with the triangle's affine transformation. Only
+        points on the edges of the triangles, where rasterization is ambiguous, are validated from
+        their barycentric co-ordinates and searched for if they are in the wrong triangle.
+
+        Parameters
+        ----------
+        src_points: :class:`numpy.ndarray`
+            The (`N`, 2) source points to interpolate
+        dst_points: :class:`numpy.ndarray`
+            The (`N`, 2) destination points for triangulation
+        maps: :class:`numpy.ndarray`
+            The (2, `height`, `width`) array to populate with the interpolated points for the
+            cropped training area
+        """
+        grids = self._constants["warp_lm_grids"]
+        origin = self._constants["tgt_slices"].start
+        triangulation = Delaunay(dst_points)
+        simplices = triangulation.simplices
+
+        # Grid points are (row, column) so swap the vertex co-ordinates for drawing. The area is
+        # padded by 1 pixel so that points on the border can be compared with their neighbours.
+        # Triangles are drawn largest first so thin triangles are not hidden by their neighbours
+        vertices = dst_points[simplices][..., ::-1] - (origin - 1)
+        edges = vertices[:, 1:] - vertices[:, :1]
+        areas = np.abs(edges[:, 0, 0] * edges[:, 1, 1] - edges[:, 0, 1] * edges[:, 1, 0])
+        triangles = np.rint(vertices * 256).astype("int32")
+        labels = self._get_buffer("warp_lm_labels",
+                                  (maps.shape[1] + 2, maps.shape[2] + 2),
+                                  dtype="int32")
+        labels.fill(-1)
+        for idx in np.argsort(-areas):
+            cv2.fillConvexPoly(labels, triangles[idx], int(idx), shift=8)
+
+        # Rasterization is only ambiguous where neighbouring points belong to different triangles
+        float_labels = labels.astype("float32")
+        check = cv2.dilate(float_labels, None) != cv2.erode(float_labels, None)
+        labels = labels[1:-1, 1:-1].ravel().astype("intp")
+        check = np.flatnonzero(check[1:-1, 1:-1].ravel() | (labels < 0))
+
+        # Inverse barycentric transform, origin and source vertices for each triangle
+        lookup = np.concatenate([triangulation.transform.reshape(-1, 6),
+                                 src_points[simplices].reshape(-1, 6)], axis=1).T.copy()
+        interpolated = self._affine_interpolate(grids, lookup, labels)
+
+        check_labels = labels[check]
+        values, bary = self._barycentric_interpolate(grids[:, check], lookup, check_labels)
+        invalid = self._get_invalid(check_labels, bary)
+        if invalid.size:
+            # Points that are rasterized into the wrong triangle lie on the edge of the given
+            # triangle, so will generally be found in the neighbour opposite the negative vertex
+            check_labels[invalid] = triangulation.neighbors[check_labels[invalid],
+                                                            np.argmin(bary[:, invalid], axis=0)]
+            values[:, invalid], bary = self._barycentric_interpolate(grids[:, check[invalid]],
+                                                                     lookup,
+                                                                     check_labels[invalid])
+            invalid = invalid[self._get_invalid(check_labels[invalid], bary)]
+        if invalid.size:
+            check_labels[invalid] = triangulation.find_simplex(grids[:, check[invalid]].T)
+            values[:, invalid] = self._barycentric_interpolate(grids[:, check[invalid]],
+                                                               lookup,
+                                                               check_labels[invalid])[0]
+            values[:, invalid[check_labels[invalid] < 0]] = np.nan
+        interpolated[:, check] = values
+        maps[0] = interpolated[0].reshape(maps.shape[1:])
+        maps[1] = interpolated[1].reshape(maps.shape[1:])
+
+    @staticmethod
+    def _affine_interpolate(points, lookup, labels):
+        """ Interpolate the source points at the given grid points from the affine transformation
+        of each point's triangle.
+
+        Parameters
+        ----------
+        points: :class:`numpy.ndarray`
+            The (2, `N`) grid points to interpolate at
+        lookup: :class:`numpy.ndarray`
+            The (12, `T`) barycentric transform, origin and source vertices for each triangle
+        labels: :class:`numpy.ndarray`
+            The triangle index for each of the `N` grid points
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (2, `N`) interpolated points
+        """
+        transform = lookup[:4].T.reshape(-1, 2, 2)
+        vertices = lookup[6:].T.reshape(-1, 3, 2)
+        matrices = np.stack([vertices[:, 0] - vertices[:, 2],
+                             vertices[:, 1] - vertices[:, 2]], axis=-1) @ transform
+        offsets = vertices[:, 2] - np.einsum("nij,nj->ni", matrices, lookup[4:6].T)
+        coefficients = np.concatenate([matrices, offsets[..., None]], axis=-1).reshape(-1, 6).T
+        coefficients = coefficients.copy()
+        retval = np.empty_like(points)
+        for idx in range(2):
+            retval[idx] = (coefficients[idx * 3].take(labels) * points[0] +
+                           coefficients[idx * 3 + 1].take(labels) * points[1] +
+                           coefficients[idx * 3 + 2].take(labels))
+        return retval
+
+    @staticmethod
+    def _barycentric_interpolate(points, lookup, labels):
+        """ Interpolate the source points at the given grid points from the barycentric
+        co-ordinates of each point within its triangle.
+
+        Parameters
+        ----------
+        points: :class:`numpy.ndarray`
+            The (2, `N`) grid points to interpolate at
+        lookup: :class:`numpy.ndarray`
+            The (12, `T`) barycentric transform, origin and source vertices for each triangle
+        labels: :class:`numpy.ndarray`
+            The triangle index for each of the `N` grid points
+
+        Returns
+        -------
+        interpolated: :class:`numpy.ndarray`
+            The (2, `N`) interpolated points
+        barycentric: :class:`numpy.ndarray`
+            The (3, `N`) barycentric co-ordinates of each point within its given triangle
+        """
+        delta_x = points[0] - lookup[4].take(labels)
+        delta_y = points[1] - lookup[5].take(labels)
+        bary = np.empty((3, points.shape[1]), dtype="float64")
+        bary[0] = lookup[0].take(labels) * delta_x + lookup[1].take(labels) * delta_y
+        bary[1] = lookup[2].take(labels) * delta_x + lookup[3].take(labels) * delta_y
+        bary[2] = 1. - bary[0] - bary[1]
+
+        interpolated = np.zeros_like(points)
+        for idx in range(3):
+            interpolated[0] += bary[idx] * lookup[6 + idx * 2].take(labels)
+            interpolated[1] += bary[idx] * lookup[7 + idx * 2].take(labels)
+        return interpolated, bary
+
+    @staticmethod
+    def _get_invalid(labels, barycentric):
+        """ Obtain the indices of points that do not lie within their given triangle.
+
+        Parameters
+        ----------
+        labels: :class:`numpy.ndarray`
+            The triangle index for each point. `-1` for points without a triangle
+        barycentric: :class:`numpy.ndarray`
+            The (3, `N`) barycentric co-ordinates of each point within its given triangle
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The indices of the points that are not within their given triangle
+        """
+        eps = 100 * np.finfo("float64").eps
+        return np.flatnonzero((labels < 0) | np.any(barycentric < -eps, axis=0))
+
     def skip_warp(self, batch):
         """ Returns the images resized and cropped for feeding the model, if warping has been
         disabled.
@@ -457,9 +709,14 @@ class ImageAugmentation():
         """
         logger.trace("Compiling skip warp images: batch shape: %s", batch.shape)
         slices = self._constants["tgt_slices"]
-        retval = np.array([cv2.resize(image[slices, slices, :],
-                                      (self._input_size, self._input_size),
-                                      cv2.INTER_AREA)
-                           for image in batch], dtype='float32') / 255.
+        resized = self._get_buffer("skip_warp",
+                                   (batch.shape[0], self._input_size, self._input_size,
+                                    batch.shape[-1]),
+                                   dtype=batch.dtype)
+        for image, dst in zip(batch, resized):
+            cv2.resize(image[slices, slices, :],
+                       (self._input_size, self._input_size),
+                       dst=dst)
+        retval = np.divide(resized, 255., dtype="float32")
         logger.trace("feed batch shape: %s", retval.shape)
         return retval
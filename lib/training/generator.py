@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 """ Handles Data Augmentation for feeding Faceswap Models """
 
+import atexit
+import json
 import logging
 import os
 
-from random import shuffle, choice
+from hashlib import sha1
+from multiprocessing import get_context
+from queue import Empty as QueueEmpty
+from random import shuffle, choice, seed
 from threading import Lock
 from zlib import decompress
 
@@ -12,15 +17,22 @@ import numpy as np
 import cv2
 from tqdm import tqdm
 from lib.align import AlignedFace, DetectedFace, get_centered_size
-from lib.image import read_image_batch, read_image_meta_batch
-from lib.multithreading import BackgroundGenerator
+from lib.image import FaceIndex, read_image_batch, read_image_meta_batch
+from lib.multithreading import BackgroundGenerator, MultiProcess
 from lib.utils import FaceswapError
 
 from . import ImageAugmentation
 
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None  # pylint:disable=invalid-name
+
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 _FACE_CACHES = dict()
+_CLOSEST_MATCHES = dict()
+_MATCHES_LOCK = Lock()
 
 
 def _get_cache(side, filenames, config):
@@ -48,6 +60,29 @@ def _get_cache(side, filenames, config):
     return _FACE_CACHES[side]
 
 
+def _get_closest_matches(side, folder):
+    """ Obtain the :class:`_ClosestMatches` object for the given side. If the object does not
+    pre-exist then create it.
+
+    Parameters
+    ----------
+    side: str
+        `"a"` or `"b"`. The side of the model to obtain the closest matches for
+    folder: str
+        The full path to the folder containing the training images for the given side
+
+    Returns
+    -------
+    :class:`_ClosestMatches`
+        The closest matching landmarks from the opposite side for each face in the given side
+    """
+    with _MATCHES_LOCK:
+        if not _CLOSEST_MATCHES.get(side):
+            logger.debug("Creating closest matches. Side: %s", side)
+            _CLOSEST_MATCHES[side] = _ClosestMatches(side, folder)
+    return _CLOSEST_MATCHES[side]
+
+
 def _check_reset(face_cache):
     """ Check whether a given cache needs to be reset because a face centering change has been
     detected in the other cache.
@@ -98,6 +133,8 @@ class _Cache():
         self._extract_version = None
         self._has_reset = False
         self._size = None
+        self._store = None
+        self._face_index = None
 
         self._centering = config["centering"]
         self._config = config
@@ -141,6 +178,12 @@ class _Cache():
         """ int: The pixel size of the cropped aligned face """
         return self._size
 
+    @property
+    def store(self):
+        """ :class:`_FaceStore`: The pre-decoded face store for this side, or ``None`` if the face
+        store is not in use. """
+        return self._store
+
     def check_reset(self):
         """ Check whether this cache has been reset due to a face centering change, and reset the
         flag if it has.
@@ -173,6 +216,49 @@ class _Cache():
         """
         return [self._cache[os.path.basename(filename)] for filename in filenames]
 
+    def load_store(self, filenames, side):
+        """ Load the pre-decoded face store for this side, building it if it does not exist or
+        if the contents of the faces folder have changed since it was created.
+
+        If the store cannot be created then a warning is output and faces will continue to be
+        read from disk.
+
+        Parameters
+        ----------
+        filenames: list
+            The list of full paths to the training images for this side
+        side: str
+            `"a"` or `"b"`. The side of the model being cached. Used for info output
+        """
+        with self._lock:
+            if self._store is not None:
+                return
+            store = _FaceStore(filenames)
+            try:
+                store.load(side)
+            except OSError as err:
+                logger.warning("Unable to create the face store for side %s. Faces will be read "
+                               "from disk. Error: %s", side.upper(), str(err))
+                return
+            self._store = store
+
+    def read_batch(self, filenames):
+        """ Read a batch of images, either from the face store, if it is in use, or from disk.
+
+        Parameters
+        ----------
+        filenames: list
+            List of full paths to image file names
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The batch of face images
+        """
+        if self._store is not None:
+            return self._store.get_batch(filenames)
+        return read_image_batch(filenames)
+
     def cache_metadata(self, filenames):
         """ Obtain the batch with metadata for items that need caching and cache them to
         :attr:`_cache`.
@@ -200,9 +286,19 @@ class _Cache():
             if not needs_cache:
                 # Don't bother reading the metadata if no images in this batch need caching
                 logger.debug("All metadata already cached for: %s", keys)
-                return read_image_batch(filenames)
-
-            batch, metadata = read_image_batch(filenames, with_metadata=True)
+                return self.read_batch(filenames)
+
+            if self._store is not None:
+                # Images are already decoded, so only obtain the metadata for items requiring
+                # caching from the face index. The index is saved once the cache is full
+                batch = self._store.get_batch(filenames)
+                if self._face_index is None:
+                    self._face_index = FaceIndex(os.path.dirname(filenames[0]))
+                indexed = dict(self._face_index.read(needs_cache, save=False))
+                metadata = [indexed[filename].get("itxt", {}) if filename in indexed else None
+                            for filename in filenames]
+            else:
+                batch, metadata = read_image_batch(filenames, with_metadata=True)
 
             if len(batch.shape) == 1:
                 folder = os.path.dirname(filenames[0])
@@ -239,6 +335,8 @@ class _Cache():
             if cache_full:
                 logger.verbose("Cache filled: '%s'", os.path.dirname(filenames[0]))
                 self._cache_full = cache_full
+                if self._face_index is not None:
+                    self._face_index.save()
 
         return batch
 
@@ -426,6 +524,710 @@ class _Cache():
             as_zip=True)
 
 
+class _FaceStore():
+    """ A pre-decoded store of training faces held in a memory-mapped array on disk.
+
+    Decoding the same png images on every iteration is expensive, and can become the bottleneck
+    when training at higher batch sizes. The face store decodes each face for a side once into a
+    `uint8` memory-mapped :class:`numpy.ndarray` saved alongside the faces, so that subsequent
+    batches can be gathered straight out of the store.
+
+    A fingerprint of the folder contents (file names, sizes and modification times) is saved with
+    the store. If the fingerprint does not match the current contents of the folder then the
+    store is rebuilt.
+
+    Parameters
+    ----------
+    filenames: list
+        The full paths to the training images for one side of the model
+    """
+    _file_name = ".faceswap_face_store"
+
+    def __init__(self, filenames):
+        logger.debug("Initializing %s: (filenames: %s)", self.__class__.__name__, len(filenames))
+        self._filenames = sorted(filenames)
+        self._folder = os.path.dirname(self._filenames[0])
+        self._index = {os.path.basename(filename): idx
+                       for idx, filename in enumerate(self._filenames)}
+        self._data = None
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    @property
+    def _store_file(self):
+        """ str: The full path to the memory-mapped image store """
+        return os.path.join(self._folder, f"{self._file_name}.npy")
+
+    @property
+    def _meta_file(self):
+        """ str: The full path to the store's meta information file """
+        return os.path.join(self._folder, f"{self._file_name}.json")
+
+    def _get_fingerprint(self):
+        """ Obtain a fingerprint for the current contents of the faces folder.
+
+        Returns
+        -------
+        str
+            A hash of the file names, sizes and modification times of the training images
+        """
+        hasher = sha1()
+        for filename in self._filenames:
+            stat = os.stat(filename)
+            hasher.update(f"{os.path.basename(filename)}:{stat.st_size}:"
+                          f"{stat.st_mtime_ns}\n".encode("utf-8"))
+        retval = hasher.hexdigest()
+        logger.debug("Fingerprint for '%s': %s", self._folder, retval)
+        return retval
+
+    def _is_valid(self, fingerprint):
+        """ Check whether a store exists on disk for the current folder contents.
+
+        Parameters
+        ----------
+        fingerprint: str
+            The fingerprint of the current contents of the faces folder
+
+        Returns
+        -------
+        bool
+            ``True`` if a complete store exists for the current folder contents otherwise
+            ``False``
+        """
+        if not os.path.isfile(self._store_file) or not os.path.isfile(self._meta_file):
+            logger.debug("No existing face store found in '%s'", self._folder)
+            return False
+        try:
+            with open(self._meta_file, "r", encoding="utf-8") as infile:
+                meta = json.load(infile)
+        except (OSError, ValueError) as err:
+            logger.debug("Unable to read face store meta file: %s", str(err))
+            return False
+        retval = meta.get("fingerprint") == fingerprint
+        logger.debug("Existing face store valid: %s", retval)
+        return retval
+
+    def load(self, side):
+        """ Load the face store from disk, building it first if required.
+
+        Parameters
+        ----------
+        side: str
+            `"a"` or `"b"`. The side of the model that the store is for. Used for info output
+        """
+        fingerprint = self._get_fingerprint()
+        if not self._is_valid(fingerprint):
+            self._build(fingerprint, side)
+        self._data = np.load(self._store_file, mmap_mode="r")
+        logger.verbose("Loaded face store for side %s: '%s' (shape: %s)",
+                       side.upper(), self._store_file, self._data.shape)
+
+    def _build(self, fingerprint, side):
+        """ Decode all of the faces into a new memory-mapped store and save it, along with its
+        fingerprint, to the faces folder.
+
+        The meta file is only written once all faces have been decoded, so an interrupted build
+        will be rebuilt on next use.
+
+        Parameters
+        ----------
+        fingerprint: str
+            The fingerprint of the current contents of the faces folder
+        side: str
+            `"a"` or `"b"`. The side of the model that the store is for. Used for info output
+
+        Raises
+        ------
+        FaceswapError
+            If the images in the faces folder are not all of the same dimensions
+        """
+        logger.info("Building face store for side %s. This is a one time operation...",
+                    side.upper())
+        if os.path.isfile(self._meta_file):
+            os.remove(self._meta_file)
+
+        shape = read_image_batch(self._filenames[:1])[0].shape
+        data = np.lib.format.open_memmap(self._store_file,
+                                         mode="w+",
+                                         dtype="uint8",
+                                         shape=(len(self._filenames), *shape))
+        chunk_size = 256
+        with tqdm(desc=f"Building Face Store ({side.upper()})",
+                  total=len(self._filenames),
+                  leave=False) as pbar:
+            for start in range(0, len(self._filenames), chunk_size):
+                filenames = self._filenames[start:start + chunk_size]
+                batch = read_image_batch(filenames)
+                if batch.ndim == 1 or batch.shape[1:] != shape:
+                    del data
+                    os.remove(self._store_file)
+                    raise FaceswapError(
+                        f"There are mismatched image sizes in the folder '{self._folder}'. All "
+                        "training images for each side must have the same dimensions.")
+                data[start:start + len(filenames)] = batch
+                pbar.update(len(filenames))
+        data.flush()
+        del data
+
+        with open(self._meta_file, "w", encoding="utf-8") as outfile:
+            json.dump(dict(fingerprint=fingerprint, count=len(self._filenames)), outfile)
+        logger.debug("Built face store: '%s'", self._store_file)
+
+    def get_batch(self, filenames):
+        """ Obtain a batch of images from the face store.
+
+        Parameters
+        ----------
+        filenames: list
+            List of full paths to image file names
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The batch of face images, returned in the order of :attr:`filenames`
+        """
+        indices = [self._index[os.path.basename(filename)] for filename in filenames]
+        # Fancy indexing returns a copy, so the batch can safely be augmented in place
+        return self._data[indices]
+
+
+class _ClosestMatches():
+    """ Holds the closest matching landmarks from the opposite side for each face in a side, for
+    use with Warp to Landmarks.
+
+    The closest matches for every face are calculated up front, in vectorized chunks, and saved
+    to the training images folder so that they can be re-used in future sessions. A fingerprint
+    of the landmarks of both sides is saved with the matches, so they will be recalculated if
+    either set of faces changes.
+
+    Parameters
+    ----------
+    side: str
+        `"a"` or `"b"`. The side of the model to obtain the closest matches for
+    folder: str
+        The full path to the folder containing the training images for the given side
+    """
+    _num_matches = 10
+
+    def __init__(self, side, folder):
+        logger.debug("Initializing %s: (side: '%s', folder: '%s')",
+                     self.__class__.__name__, side, folder)
+        self._side = side
+        self._file = os.path.join(folder, f".faceswap_wtl_matches_{side}.npz")
+
+        src_landmarks = _FACE_CACHES[side].aligned_landmarks
+        self._landmarks = self._get_opposite_landmarks()
+        self._src_names = list(src_landmarks)
+        self._dst_names = list(self._landmarks)
+
+        src = np.array([src_landmarks[name] for name in self._src_names], dtype="float64")
+        dst = np.array([self._landmarks[name] for name in self._dst_names], dtype="float64")
+        self._matches = self._load_or_compute(src, dst)
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    @property
+    def landmarks(self):
+        """ dict: The filename as key, the aligned landmarks, scaled to this side's training image
+        size, as value for the opposite side """
+        return self._landmarks
+
+    def get(self, filename):
+        """ Obtain the closest matches from the opposite side for the given face.
+
+        Parameters
+        ----------
+        filename: str
+            The file name of the face to obtain the matches for. This can either be the full path
+            or the base name
+
+        Returns
+        -------
+        tuple
+            The file names of the closest matching faces from the opposite side
+        """
+        return self._matches[os.path.basename(filename)]
+
+    def _get_opposite_landmarks(self):
+        """ Obtain the aligned landmarks for the opposite side, resized to the training image
+        size of this side if the sides have been extracted at different sizes.
+
+        Returns
+        -------
+        dict
+            The filename as key, aligned landmarks as value for the opposite side
+        """
+        lm_side = "a" if self._side == "b" else "b"
+        retval = _FACE_CACHES[lm_side].aligned_landmarks
+        sizes = {side: cache.crop_size for side, cache in _FACE_CACHES.items()}
+        if len(set(sizes.values())) > 1:
+            scale = sizes[self._side] / sizes[lm_side]
+            logger.debug("Scaling landmarks for side '%s' by %s", lm_side, scale)
+            retval = {key: lms * scale for key, lms in retval.items()}
+        return retval
+
+    def _load_or_compute(self, src, dst):
+        """ Load the closest matches from disk if they exist for the given landmarks, otherwise
+        calculate them and save them to disk.
+
+        Parameters
+        ----------
+        src: :class:`numpy.ndarray`
+            The (`N`, 68, 2) aligned landmarks for this side
+        dst: :class:`numpy.ndarray`
+            The (`M`, 68, 2) aligned landmarks for the opposite side
+
+        Returns
+        -------
+        dict
+            The filename as key, tuple of closest matching opposite side file names as value
+        """
+        hasher = sha1()
+        for item in (src, dst):
+            hasher.update(item.tobytes())
+        for names in (self._src_names, self._dst_names):
+            hasher.update("\n".join(names).encode("utf-8"))
+        fingerprint = hasher.hexdigest()
+
+        indices = self._load(fingerprint)
+        if indices is None:
+            indices = self._compute(src, dst)
+            self._save(fingerprint, indices)
+        return {name: tuple(self._dst_names[idx] for idx in matches)
+                for name, matches in zip(self._src_names, indices)}
+
+    def _load(self, fingerprint):
+        """ Load previously calculated matches from disk.
+
+        Parameters
+        ----------
+        fingerprint: str
+            The fingerprint of the landmarks that the matches must have been calculated for
+
+        Returns
+        -------
+        :class:`numpy.ndarray` or ``None``
+            The indices of the closest matches for each face in this side, or ``None`` if valid
+            matches do not exist on disk
+        """
+        if not os.path.isfile(self._file):
+            return None
+        try:
+            with np.load(self._file) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    logger.debug("Landmarks have changed. Recalculating: '%s'", self._file)
+                    return None
+                retval = data["matches"]
+        except (OSError, ValueError, KeyError) as err:
+            logger.debug("Unable to load closest matches: '%s' (%s)", self._file, str(err))
+            return None
+        logger.verbose("Loaded closest matching landmarks for side %s from '%s'",
+                       self._side.upper(), self._file)
+        return retval
+
+    def _save(self, fingerprint, indices):
+        """ Save the calculated matches to disk.
+
+        Parameters
+        ----------
+        fingerprint: str
+            The fingerprint of the landmarks that the matches have been calculated for
+        indices: :class:`numpy.ndarray`
+            The indices of the closest matches for each face in this side
+        """
+        try:
+            with open(self._file, "wb") as outfile:
+                np.savez(outfile, fingerprint=np.array(fingerprint), matches=indices)
+        except OSError as err:
+            logger.warning("Unable to save closest matching landmarks to '%s'. They will be "
+                           "recalculated next session. Error: %s", self._file, str(err))
+            return
+        logger.debug("Saved closest matches: '%s'", self._file)
+
+    def _compute(self, src, dst):
+        """ Calculate the closest matches, by mean squared distance, of every face in this side
+        against every face in the opposite side.
+
+        The distances are calculated for chunks of faces at a time with a matrix multiplication,
+        and only the top matches are partitioned out and sorted.
+
+        Parameters
+        ----------
+        src: :class:`numpy.ndarray`
+            The (`N`, 68, 2) aligned landmarks for this side
+        dst: :class:`numpy.ndarray`
+            The (`M`, 68, 2) aligned landmarks for the opposite side
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (`N`, `k`) indices into the opposite side of the closest matches for each face
+            in this side, ordered from closest to furthest
+        """
+        src = src.reshape(src.shape[0], -1)
+        dst = dst.reshape(dst.shape[0], -1)
+        num_matches = min(self._num_matches, dst.shape[0])
+        dst_squared = np.sum(np.square(dst), axis=1)
+        chunk_size = max(1, 2 ** 22 // dst.shape[0])
+
+        retval = np.empty((src.shape[0], num_matches), dtype="int32")
+        for start in tqdm(range(0, src.shape[0], chunk_size),
+                          desc=f"WTL: Matching Landmarks ({self._side.upper()})",
+                          leave=False):
+            chunk = src[start:start + chunk_size]
+            # Squared distance, less the (constant per row) squared magnitude of the source
+            distances = dst_squared[None, :] - 2 * (chunk @ dst.T)
+            if num_matches < dst.shape[0]:
+                indices = np.argpartition(distances, num_matches - 1, axis=1)[:, :num_matches]
+            else:
+                indices = np.broadcast_to(np.arange(dst.shape[0]), distances.shape)
+            order = np.argsort(np.take_along_axis(distances, indices, axis=1), axis=1)
+            retval[start:start + chunk.shape[0]] = np.take_along_axis(indices, order, axis=1)
+        return retval
+
+
+class _BatchRing():
+    """ A ring buffer of shared memory slots for passing augmented batches from
+    :class:`_ProcessLoader` worker processes back to the training process without pickling them.
+
+    Every batch that is generated for a side has the same layout, so the ring is allocated from
+    an example batch. Workers take a free slot, write their batch into it and put the slot index
+    to the ready queue. The slot is returned to the free queue once the batch has been consumed,
+    so the number of slots is the maximum number of batches that can be held.
+
+    Parameters
+    ----------
+    batch: dict
+        An example batch, as generated by :func:`TrainingDataGenerator._process_batch`
+    slot_count: int
+        The number of slots to allocate for the ring
+    context: :class:`multiprocessing.context.SpawnContext`
+        The multiprocessing context that the worker processes are launched with
+    """
+    _alignment = 64
+
+    def __init__(self, batch, slot_count, context):
+        logger.debug("Initializing %s: (batch: %s, slot_count: %s)",
+                     self.__class__.__name__,
+                     {key: [arr.shape for arr in val] if isinstance(val, list) else val.shape
+                      for key, val in batch.items()},
+                     slot_count)
+        self._layout, size = self._get_layout(batch)
+        self._slots = [shared_memory.SharedMemory(create=True, size=size)
+                       for _ in range(slot_count)]
+        self._names = [slot.name for slot in self._slots]
+        self._shared = dict()
+        self._free = context.Queue()
+        self._ready = context.Queue()
+        for idx in range(slot_count):
+            self._free.put(idx)
+        logger.debug("Initialized %s: (slot_size: %s, names: %s)",
+                     self.__class__.__name__, size, self._names)
+
+    def __getstate__(self):
+        """ Only the names of the shared memory slots are passed to worker processes. The
+        worker attaches to them on first use. """
+        retval = self.__dict__.copy()
+        retval["_slots"] = None
+        retval["_shared"] = dict()
+        return retval
+
+    @classmethod
+    def _flatten(cls, batch):
+        """ Flatten a batch into a list of its arrays.
+
+        Parameters
+        ----------
+        batch: dict
+            A batch generated by :func:`TrainingDataGenerator._process_batch`
+
+        Returns
+        -------
+        list
+            (`key`, `is_list`, `array`) for each array in the batch
+        """
+        return [(key, isinstance(value, list), array)
+                for key, value in batch.items()
+                for array in (value if isinstance(value, list) else [value])]
+
+    def _get_layout(self, batch):
+        """ Obtain the location of each of the arrays of a batch within a slot.
+
+        Parameters
+        ----------
+        batch: dict
+            An example batch
+
+        Returns
+        -------
+        layout: list
+            (`key`, `is_list`, `shape`, `dtype`, `offset`) for each array in the batch
+        size: int
+            The size, in bytes, required to hold a batch
+        """
+        layout = []
+        offset = 0
+        for key, is_list, array in self._flatten(batch):
+            layout.append((key, is_list, array.shape, array.dtype.str, offset))
+            offset += -(-array.nbytes // self._alignment) * self._alignment
+        return layout, max(offset, 1)
+
+    def _buffer(self, index):
+        """ Obtain the buffer for a slot, attaching to the shared memory from within a worker
+        process.
+
+        Parameters
+        ----------
+        index: int
+            The index of the slot to obtain the buffer for
+
+        Returns
+        -------
+        :class:`memoryview`
+            The buffer of the requested slot
+        """
+        if self._slots is not None:
+            return self._slots[index].buf
+        if index not in self._shared:
+            # Spawned processes share the parent's resource tracker, so the memory remains owned
+            # by the training process
+            self._shared[index] = shared_memory.SharedMemory(name=self._names[index])
+        return self._shared[index].buf
+
+    def put(self, batch, shutdown):
+        """ Place a batch into the next free slot, blocking until a slot becomes available.
+        Called from the worker processes.
+
+        Parameters
+        ----------
+        batch: dict
+            The batch to place into the ring
+        shutdown: :class:`multiprocessing.Event`
+            Event that is set if the worker should stop waiting for a free slot
+
+        Returns
+        -------
+        bool
+            ``True`` if the batch was placed into the ring, ``False`` if shutdown was requested
+        """
+        while True:
+            if shutdown.is_set():
+                return False
+            try:
+                index = self._free.get(timeout=1)
+                break
+            except QueueEmpty:
+                continue
+        buffer = self._buffer(index)
+        arrays = [array for _, _, array in self._flatten(batch)]
+        for (_, _, shape, dtype, offset), array in zip(self._layout, arrays):
+            np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)[...] = array
+        self._ready.put(index)
+        return True
+
+    def get(self, timeout=None):
+        """ Obtain the index of the next slot that holds a ready batch.
+
+        Parameters
+        ----------
+        timeout: float, optional
+            The number of seconds to wait for a batch. Default: ``None`` (block)
+
+        Returns
+        -------
+        int
+            The index of the slot holding the batch
+
+        Raises
+        ------
+        :class:`queue.Empty`
+            If no batch became ready within the given timeout
+        """
+        return self._ready.get(timeout=timeout)
+
+    def read(self, index):
+        """ Obtain the batch held in a slot.
+
+        Parameters
+        ----------
+        index: int
+            The index of the slot to obtain the batch from
+
+        Returns
+        -------
+        dict
+            The batch. The arrays are views into the slot's shared memory
+        """
+        buffer = self._buffer(index)
+        retval = dict()
+        for key, is_list, shape, dtype, offset in self._layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            if is_list:
+                retval.setdefault(key, []).append(array)
+            else:
+                retval[key] = array
+        return retval
+
+    def release(self, index):
+        """ Return a slot to the ring once its batch has been consumed.
+
+        Parameters
+        ----------
+        index: int
+            The index of the slot to release
+        """
+        self._free.put(index)
+
+    def close(self):
+        """ Detach from the shared memory, releasing it if called from the owning process. """
+        if self._slots is None:
+            for shared in self._shared.values():
+                shared.close()
+            self._shared = dict()
+            return
+        for slot in self._slots:
+            try:
+                slot.close()
+            except BufferError:  # The final batch is still referenced
+                logger.debug("Shared memory still in use: '%s'", slot.name)
+            slot.unlink()
+        self._slots = []
+        logger.debug("Released shared memory: %s", self._names)
+
+
+class _ProcessLoader():
+    """ Generates training batches for a side in worker processes and returns them through a
+    :class:`_BatchRing`.
+
+    Each worker runs its own :class:`TrainingDataGenerator` over the full list of images with its
+    own random seed, so the workers do not need to coordinate. The ring holds
+    :attr:`prefetch` batches ready to be consumed, plus the batch that is currently being consumed.
+
+    Parameters
+    ----------
+    generator_kwargs: dict
+        The keyword arguments for creating a :class:`TrainingDataGenerator` in the workers
+    minibatch_args: tuple
+        The (`images`, `side`, `do_shuffle`, `batchsize`) arguments for generating batches
+    closest_matches: :class:`_ClosestMatches` or ``None``
+        The closest matches from the opposite side, if Warp to Landmarks is enabled otherwise
+        ``None``
+    batch: dict
+        An example batch for allocating the ring buffer
+    processes: int
+        The number of worker processes to launch
+    prefetch: int
+        The number of batches to hold ready for consumption
+    """
+    def __init__(self, generator_kwargs, minibatch_args, closest_matches, batch, processes,
+                 prefetch):
+        logger.debug("Initializing %s: (side: '%s', processes: %s, prefetch: %s)",
+                     self.__class__.__name__, minibatch_args[1], processes, prefetch)
+        context = get_context("spawn")
+        self._ring = _BatchRing(batch, prefetch + 1, context)
+        self._shutdown = context.Event()
+        seeds = context.Queue()
+        base_seed = np.random.randint(0, 2 ** 31)
+        for idx in range(processes):
+            seeds.put(base_seed + idx)
+        self._workers = MultiProcess(_loader_process,
+                                     generator_kwargs,
+                                     minibatch_args,
+                                     closest_matches,
+                                     self._ring,
+                                     seeds,
+                                     self._shutdown,
+                                     process_count=processes,
+                                     name=f"loader_{minibatch_args[1]}")
+        self._closed = False
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    @staticmethod
+    def is_supported():
+        """ Check whether process based data loading is supported on the running system.
+
+        Returns
+        -------
+        bool
+            ``True`` if shared memory is available (Python 3.8 or later) otherwise ``False``
+        """
+        return shared_memory is not None
+
+    def start(self):
+        """ Launch the worker processes. """
+        logger.debug("Starting %s", self.__class__.__name__)
+        atexit.register(self.close)
+        self._workers.start()
+
+    def iterator(self):
+        """ Iterate over the batches generated by the worker processes.
+
+        Yields
+        ------
+        dict
+            The augmented batch. The arrays are views into shared memory, and are only valid
+            until the next batch is requested
+        """
+        while True:
+            try:
+                index = self._ring.get(timeout=1)
+            except QueueEmpty:
+                self._workers.check_and_raise_error()
+                continue
+            yield self._ring.read(index)
+            self._ring.release(index)
+
+    def close(self):
+        """ Signal the worker processes to stop, wait for them to exit and release the shared
+        memory. """
+        if self._closed:
+            return
+        logger.debug("Closing %s", self.__class__.__name__)
+        self._closed = True
+        atexit.unregister(self.close)
+        self._shutdown.set()
+        try:
+            self._workers.join()
+        except RuntimeError as err:
+            # Errors are raised to the training loop by iterator(), so are not raised on close
+            logger.debug("Loader process error on close: %s", str(err))
+        self._ring.close()
+
+
+def _loader_process(generator_kwargs, minibatch_args, closest_matches, ring, seeds, shutdown):
+    """ The entry point for :class:`_ProcessLoader` worker processes.
+
+    Seeds this worker's random number generators, then generates batches into the ring buffer
+    until shutdown is requested.
+
+    Parameters
+    ----------
+    generator_kwargs: dict
+        The keyword arguments for creating the :class:`TrainingDataGenerator`
+    minibatch_args: tuple
+        The (`images`, `side`, `do_shuffle`, `batchsize`) arguments for generating batches
+    closest_matches: :class:`_ClosestMatches` or ``None``
+        The closest matches from the opposite side, if Warp to Landmarks is enabled otherwise
+        ``None``
+    ring: :class:`_BatchRing`
+        The ring buffer to place generated batches into
+    seeds: :class:`multiprocessing.Queue`
+        Queue holding a unique random seed for each worker
+    shutdown: :class:`multiprocessing.Event`
+        Event that is set when the worker should stop generating batches
+    """
+    worker_seed = seeds.get()
+    logger.debug("Starting loader process: (side: '%s', seed: %s)",
+                 minibatch_args[1], worker_seed)
+    seed(worker_seed)
+    np.random.seed(worker_seed)
+    generator = TrainingDataGenerator(**generator_kwargs)
+    try:
+        generator._run_worker(  # pylint:disable=protected-access
+            minibatch_args, closest_matches, ring, shutdown)
+    finally:
+        ring.close()
+    logger.debug("Completed loader process: (side: '%s')", minibatch_args[1])
+
+
 class TrainingDataGenerator():  # pylint:disable=too-few-public-methods
     """ A Training Data Generator for compiling data for feeding to a model.
 
@@ -486,7 +1288,7 @@ class TrainingDataGenerator():  # pylint:disable=too-few-public-methods
         # from lib.training_data
         self._batchsize = 0
         self._face_cache = None
-        self._nearest_landmarks = dict()
+        self._closest_matches = None
         self._processing = None
         logger.debug("Initialized %s", self.__class__.__name__)
 
@@ -547,23 +1349,127 @@ class TrainingDataGenerator():  # pylint:disable=too-few-public-methods
         logger.debug("Queue batches: (image_count: %s, batchsize: %s, side: '%s', do_shuffle: %s, "
                      "is_preview, %s, is_timelapse: %s)", len(images), batchsize, side, do_shuffle,
                      is_preview, is_timelapse)
+        self._setup(images, batchsize, side, is_preview or is_timelapse)
+        args = (images, side, do_shuffle, batchsize)
+
+        processes = self._config.get("loader_processes", 0)
+        if processes and not (is_preview or is_timelapse):
+            if _ProcessLoader.is_supported():
+                return self._process_minibatch(*args, processes)
+            logger.warning("Loading training data with processes requires Python 3.8 or later. "
+                           "Falling back to threads.")
+
+        batcher = BackgroundGenerator(self._minibatch, thread_count=2, args=args)
+        return batcher.iterator()
+
+    # << INTERNAL METHODS >> #
+    def _setup(self, images, batchsize, side, is_display, pre_fill=True):
+        """ Prepare the face cache and the augmentation processor for generating batches.
+
+        Parameters
+        ----------
+        images: list
+            A list of image paths that will be used to compile the final augmented data from.
+        batchsize: int
+            The batchsize for generated batches
+        side: {'a' or 'b'}
+            The side of the model that batches are being generated for
+        is_display: bool
+            ``True`` if batches are being generated for preview or time-lapse images otherwise
+            ``False``
+        pre_fill: bool, optional
+            ``True`` if the cache should be pre-filled with landmarks when Warp to Landmarks is
+            enabled. ``False`` if the closest matches will be provided. Default: ``True``
+        """
         self._batchsize = batchsize
         self._face_cache = _get_cache(side, images, self._config)
         self._processing = ImageAugmentation(batchsize,
-                                             is_preview or is_timelapse,
+                                             is_display,
                                              self._model_input_size,
                                              self._model_output_shapes,
                                              self._coverage_ratio,
                                              self._config)
 
-        if self._warp_to_landmarks and not self._face_cache.partially_loaded:
+        if self._config.get("face_store", False):
+            self._face_cache.load_store(images, side)
+
+        if pre_fill and self._warp_to_landmarks and not self._face_cache.partially_loaded:
             self._face_cache.pre_fill(images, side)
 
-        args = (images, side, do_shuffle, batchsize)
-        batcher = BackgroundGenerator(self._minibatch, thread_count=2, args=args)
-        return batcher.iterator()
+    def _process_minibatch(self, images, side, do_shuffle, batchsize, processes):
+        """ A generator function that yields the augmented, target and sample images from worker
+        processes. See :func:`minibatch_ab` for more details on the output.
+
+        The first batch is generated within this process. This gives the layout of the batches
+        for allocating the shared memory ring buffer, and ensures that any information that the
+        workers need from both sides (the closest matches for Warp to Landmarks) has been
+        collected prior to launching them.
+
+        Parameters
+        ----------
+        images: list
+            A list of image paths that will be used to compile the final augmented data from.
+        side: {'a' or 'b'}
+            The side of the model that this iterator is for.
+        do_shuffle: bool
+            Whether data should be shuffled prior to loading from disk
+        batchsize: int
+            The batchsize for this iterator
+        processes: int
+            The number of worker processes to launch
+
+        Yields
+        ------
+        dict
+            The augmented batch. **NB:** The arrays are views into shared memory, and are only
+            valid until the next batch is requested
+        """
+        batch = next(self._minibatch(images, side, do_shuffle, batchsize))
+        generator_kwargs = dict(model_input_size=self._model_input_size,
+                                model_output_shapes=self._model_output_shapes,
+                                coverage_ratio=self._coverage_ratio,
+                                color_order=self._color_order,
+                                augment_color=self._augment_color,
+                                no_flip=self._no_flip,
+                                no_warp=self._no_warp,
+                                warp_to_landmarks=self._warp_to_landmarks,
+                                config=self._config)
+        loader = _ProcessLoader(generator_kwargs,
+                                (images, side, do_shuffle, batchsize),
+                                self._closest_matches,
+                                batch,
+                                processes,
+                                self._config.get("loader_prefetch", 4))
+        loader.start()
+        try:
+            yield batch
+            yield from loader.iterator()
+        finally:
+            loader.close()
+
+    def _run_worker(self, minibatch_args, closest_matches, ring, shutdown):
+        """ Generate batches within a :class:`_ProcessLoader` worker process, placing them into
+        the shared memory ring buffer until shutdown is requested.
+
+        Parameters
+        ----------
+        minibatch_args: tuple
+            The (`images`, `side`, `do_shuffle`, `batchsize`) arguments for generating batches
+        closest_matches: :class:`_ClosestMatches` or ``None``
+            The closest matches from the opposite side, if Warp to Landmarks is enabled otherwise
+            ``None``
+        ring: :class:`_BatchRing`
+            The ring buffer to place generated batches into
+        shutdown: :class:`multiprocessing.Event`
+            Event that is set when the worker should stop generating batches
+        """
+        images, side, do_shuffle, batchsize = minibatch_args
+        self._setup(images, batchsize, side, False, pre_fill=closest_matches is None)
+        self._closest_matches = closest_matches
+        for batch in self._minibatch(images, side, do_shuffle, batchsize):
+            if not ring.put(batch, shutdown):
+                break
 
-    # << INTERNAL METHODS >> #
     def _validate_samples(self, data):
         """ Ensures that the total number of images within :attr:`images` is greater or equal to
         the selected :attr:`batchsize`. Raises an exception if this is not the case. """
@@ -620,7 +1526,7 @@ class TrainingDataGenerator():  # pylint:disable=too-few-public-methods
         if not self._face_cache.cache_full:
             batch = self._face_cache.cache_metadata(filenames)
         else:
-            batch = read_image_batch(filenames)
+            batch = self._face_cache.read_batch(filenames)
 
         cache = self._face_cache.get_items(filenames)
         batch, landmarks = self._crop_to_center(filenames, cache, batch, side)
@@ -806,34 +1712,10 @@ class TrainingDataGenerator():  # pylint:disable=too-few-public-methods
         matched 68 point landmarks from the opposite training set. """
         logger.trace("Retrieving closest matched landmarks: (filenames: '%s', src_points: '%s'",
                      filenames, batch_src_points)
-        lm_side = "a" if side == "b" else "b"
-        landmarks = _FACE_CACHES[lm_side].aligned_landmarks
-
-        closest_matches = [self._nearest_landmarks.get(os.path.basename(filename))
-                           for filename in filenames]
-        if None in closest_matches:
-            # Resize mismatched training image size landmarks
-            sizes = {side: cache.crop_size for side, cache in _FACE_CACHES.items()}
-            if len(set(sizes.values())) > 1:
-                scale = sizes[side] / sizes[lm_side]
-                landmarks = {key: lms * scale for key, lms in landmarks.items()}
-            closest_matches = self._cache_closest_matches(filenames, batch_src_points, landmarks)
-
-        batch_dst_points = np.array([landmarks[choice(fname)] for fname in closest_matches])
+        if self._closest_matches is None:
+            self._closest_matches = _get_closest_matches(side, os.path.dirname(filenames[0]))
+        landmarks = self._closest_matches.landmarks
+        batch_dst_points = np.array([landmarks[choice(self._closest_matches.get(filename))]
+                                     for filename in filenames])
         logger.trace("Returning: (batch_dst_points: %s)", batch_dst_points.shape)
         return batch_dst_points
-
-    def _cache_closest_matches(self, filenames, batch_src_points, landmarks):
-        """ Cache the nearest landmarks for this batch """
-        logger.trace("Caching closest matches")
-        dst_landmarks = list(landmarks.items())
-        dst_points = np.array([lm[1] for lm in dst_landmarks])
-        batch_closest_matches = list()
-
-        for filename, src_points in zip(filenames, batch_src_points):
-            closest = (np.mean(np.square(src_points - dst_points), axis=(1, 2))).argsort()[:10]
-            closest_matches = tuple(dst_landmarks[i][0] for i in closest)
-            self._nearest_landmarks[os.path.basename(filename)] = closest_matches
-            batch_closest_matches.append(closest_matches)
-        logger.trace("Cached closest matches")
-        return batch_closest_matches
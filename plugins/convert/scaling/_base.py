@@ -37,12 +37,15 @@ class Adjustment():
         logger.debug("Config: %s", retval)
         return retval
 
-    def process(self, new_face):
+    def process(self, new_face, reference_width=None):
         """ Override for specific scaling adjustment process """
         raise NotImplementedError
 
-    def run(self, new_face):
-        """ Perform selected adjustment on face """
+    def run(self, new_face, reference_width=None):
+        """ Perform selected adjustment on face.
+
+        `reference_width` should be passed in when only a region of the frame is being adjusted,
+        so that any size dependent parameters are calculated from the full frame width """
         logger.trace("Performing scaling adjustment")
         # Remove Mask for processing
         reinsert_mask = False
@@ -50,7 +53,7 @@ class Adjustment():
             reinsert_mask = True
             final_mask = new_face[:, :, -1]
             new_face = new_face[:, :, :3]
-        new_face = self.process(new_face)
+        new_face = self.process(new_face, reference_width=reference_width)
         new_face = np.clip(new_face, 0.0, 1.0)
         if reinsert_mask and new_face.shape[2] != 4:
             # Reinsert Mask
@@ -5,6 +5,7 @@
 import logging
 import os
 import sys
+import threading
 
 from tensorflow.python.framework import errors_impl as tf_errors
 
@@ -53,6 +54,11 @@ class Extractor():
     - :func:`predict` - Feed the data through the model
     - :func:`process_output()` - Perform any data post-processing
 
+    If :attr:`replicas` is greater than 1, then a model is loaded for each replica and the
+    :func:`predict` function runs in a separate thread for each model, all fed from the same
+    queue. Batches are put back into the order that they were created prior to
+    :func:`process_output()`.
+
     Parameters
     ----------
     git_model_id: int
@@ -110,6 +116,8 @@ class Extractor():
 
         self._instance = instance
         self._exclude_gpus = exclude_gpus
+        self._replica = threading.local()
+        self._models = [None]
         self.config = _get_config(".".join(self.__module__.split(".")[-2:]), configfile=configfile)
         """ dict: Config for this plugin, loaded from ``extract.ini`` configfile """
 
@@ -129,9 +137,9 @@ class Extractor():
         self.queue_size = 1
         """ int: Queue size for all internal queues. Set in :func:`initialize()` """
 
-        self.model = None
-        """varies: The model for this plugin.
-        Set in the plugin's :func:`init_model()` method """
+        self.replicas = self.config.get("replicas", 1)
+        """ int: The number of model instances to load for this plugin, each with their own
+        predict thread. Updated by :mod:`~plugins.extract.pipeline` to fit the available VRAM """
 
         # For detectors that support batching, this should be set to  the calculated batch size
         # that the amount of available VRAM will support.
@@ -156,6 +164,19 @@ class Extractor():
 
         logger.debug("Initialized _base %s", self.__class__.__name__)
 
+    @property
+    def model(self):
+        """varies: The model for this plugin. Set in the plugin's :func:`init_model()` method.
+
+        Where the plugin has been replicated, this is the model that belongs to the calling
+        predict thread. All other threads receive the first model. """
+        return self._models[getattr(self._replica, "index", 0)]
+
+    @model.setter
+    def model(self, value):
+        """ Set the model for the current replica. """
+        self._models[getattr(self._replica, "index", 0)] = value
+
     # <<< OVERIDABLE METHODS >>> #
     def init_model(self):
         """ **Override method**
@@ -385,7 +406,7 @@ class Extractor():
                          ["predict_{}".format(name), "post_{}".format(name)])
         self._compile_threads()
         try:
-            self.init_model()
+            self._init_models()
         except tf_errors.UnknownError as err:
             if "failed to get convolution algorithm" in str(err).lower():
                 msg = ("Tensorflow raised an unknown error. This is most likely caused by a "
@@ -398,8 +419,18 @@ class Extractor():
                        "option to `True`.")
                 raise FaceswapError(msg) from err
             raise err
-        logger.info("Initialized %s (%s) with batchsize of %s",
-                    self.name, self._plugin_type.title(), self.batchsize)
+        logger.info("Initialized %s (%s) with batchsize of %s%s",
+                    self.name, self._plugin_type.title(), self.batchsize,
+                    "" if self.replicas == 1 else f" and {self.replicas} replicas")
+
+    def _init_models(self):
+        """ Initialize the plugin's model once for each of the plugin's :attr:`replicas`. """
+        self._models = [None for _ in range(self.replicas)]
+        for replica in range(self.replicas):
+            logger.debug("Initializing model for %s replica %s", self.name, replica)
+            self._replica.index = replica
+            self.init_model()
+        self._replica.index = 0
 
     def _add_queues(self, in_queue, out_queue, queues):
         """ Add the queues
@@ -422,45 +453,47 @@ class Extractor():
                          self._process_input,
                          self._queues["in"],
                          self._queues["predict_{}".format(name)])
-        self._add_thread("{}_predict".format(base_name),
-                         self._predict,
-                         self._queues["predict_{}".format(name)],
-                         self._queues["post_{}".format(name)])
+        for replica in range(self.replicas):
+            suffix = "" if self.replicas == 1 else "_{}".format(replica)
+            self._add_thread("{}_predict{}".format(base_name, suffix),
+                             self._predict,
+                             self._queues["predict_{}".format(name)],
+                             self._queues["post_{}".format(name)],
+                             replica=replica)
         self._add_thread("{}_output".format(base_name),
                          self._process_output,
                          self._queues["post_{}".format(name)],
                          self._queues["out"])
         logger.debug("Compiled %s threads: %s", self._plugin_type, self._threads)
 
-    def _add_thread(self, name, function, in_queue, out_queue):
+    def _add_thread(self, name, function, in_queue, out_queue, replica=0):
         """ Add a MultiThread thread to self._threads """
-        logger.debug("Adding thread: (name: %s, function: %s, in_queue: %s, out_queue: %s)",
-                     name, function, in_queue, out_queue)
+        logger.debug("Adding thread: (name: %s, function: %s, in_queue: %s, out_queue: %s, "
+                     "replica: %s)", name, function, in_queue, out_queue, replica)
         self._threads.append(MultiThread(target=self._thread_process,
                                          name=name,
                                          function=function,
                                          in_queue=in_queue,
-                                         out_queue=out_queue))
+                                         out_queue=out_queue,
+                                         replica=replica))
         logger.debug("Added thread: %s", name)
 
-    def _thread_process(self, function, in_queue, out_queue):
-        """ Perform a plugin function in a thread """
+    def _thread_process(self, function, in_queue, out_queue, replica=0):
+        """ Perform a plugin function in a thread
+
+        Batches are passed between the plugin's internal queues with the sequence number that they
+        were created in, so that batches which have been predicted by different replicas can be
+        output in order. """
         func_name = function.__name__
-        logger.debug("threading: (function: '%s')", func_name)
-        while True:
-            if func_name == "_process_input":
-                # Process input items to batches
-                exhausted, batch = self.get_batch(in_queue)
-                if exhausted:
-                    if batch:
-                        # Put the final batch
-                        batch = function(batch)
-                        out_queue.put(batch)
-                    break
-            else:
-                batch = self._get_item(in_queue)
-                if batch == "EOF":
-                    break
+        logger.debug("threading: (function: '%s', replica: %s)", func_name, replica)
+        self._replica.index = replica
+        if func_name == "_process_input":
+            batches = self._get_input_batches(in_queue)
+        elif func_name == "_process_output":
+            batches = self._get_ordered_batches(in_queue)
+        else:
+            batches = self._get_queued_batches(in_queue)
+        for sequence, batch in batches:
             try:
                 batch = function(batch)
             except tf_errors.UnknownError as err:
@@ -480,9 +513,88 @@ class Extractor():
                 for item in self.finalize(batch):
                     out_queue.put(item)
             else:
-                out_queue.put(batch)
-        logger.debug("Putting EOF")
-        out_queue.put("EOF")
+                out_queue.put((sequence, batch))
+        # Each predict replica requires an EOF from the input thread
+        eof_count = self.replicas if func_name == "_process_input" else 1
+        logger.debug("Putting EOF: %s", eof_count)
+        for _ in range(eof_count):
+            out_queue.put("EOF")
+
+    def _get_input_batches(self, queue):
+        """ Collect batches from the plugin's input queue.
+
+        Parameters
+        ----------
+        queue: queue.Queue()
+            The plugin's input queue
+
+        Yields
+        ------
+        sequence: int
+            The order that the batch was created in
+        batch: dict
+            The batch of items for :attr:`batchsize`
+        """
+        sequence = 0
+        while True:
+            exhausted, batch = self.get_batch(queue)
+            if exhausted:
+                if batch:
+                    # Put the final batch
+                    yield sequence, batch
+                break
+            yield sequence, batch
+            sequence += 1
+
+    def _get_queued_batches(self, queue):
+        """ Collect batches from one of the plugin's internal queues until EOF is received.
+
+        Parameters
+        ----------
+        queue: queue.Queue()
+            The internal queue to collect batches from
+
+        Yields
+        ------
+        sequence: int
+            The order that the batch was created in
+        batch: dict
+            The batch from the internal queue
+        """
+        while True:
+            item = self._get_item(queue)
+            if item == "EOF":
+                break
+            yield item
+
+    def _get_ordered_batches(self, queue):
+        """ Collect batches from the plugin's post-predict queue in the order that they were
+        created, until EOF has been received from every predict replica.
+
+        Parameters
+        ----------
+        queue: queue.Queue()
+            The internal queue that the predict threads put their output to
+
+        Yields
+        ------
+        sequence: int
+            The order that the batch was created in
+        batch: dict
+            The batch from the internal queue
+        """
+        pending = dict()
+        next_sequence = 0
+        eof_count = 0
+        while eof_count < self.replicas:
+            item = self._get_item(queue)
+            if item == "EOF":
+                eof_count += 1
+                continue
+            pending[item[0]] = item[1]
+            while next_sequence in pending:
+                yield next_sequence, pending.pop(next_sequence)
+                next_sequence += 1
 
     # <<< QUEUE METHODS >>> #
     def _get_item(self, queue):
@@ -31,3 +31,13 @@ class Config(FaceswapConfig):
                  "This option prevents Tensorflow from allocating all of the GPU VRAM at launch "
                  "but can lead to higher VRAM fragmentation and slower performance. Should only "
                  "be enabled if you are having problems running extraction.")
+        self.add_item(
+            section=section, title="replicas", datatype=int, default=1, min_max=(1, 4),
+            rounding=1, group="settings",
+            info="The number of copies of each plugin's model to run at the same time. Each copy "
+                 "predicts its own batches from the plugin's queue, which can increase "
+                 "throughput when the model's predictions are the slowest part of extraction and "
+                 "VRAM is available. Every copy uses the full amount of VRAM for the plugin. If "
+                 "there is not enough VRAM available, the number of copies is reduced "
+                 "automatically. Plugins which do not use a model (e.g. the 'components' and "
+                 "'extended' maskers) are never copied.")
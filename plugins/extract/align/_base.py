@@ -107,7 +107,8 @@ class Aligner(Extractor):  # pylint:disable=abstract-method
 
         >>> {'filename': [<filenames of source frames>],
         >>>  'image': [<source images>],
-        >>>  'detected_faces': [[<lib.align.DetectedFace objects]]}
+        >>>  'detected_faces': [[<lib.align.DetectedFace objects]],
+        >>>  'image_offsets': [<(left, top) of each source image within its frame>]}
 
         Parameters
         ----------
@@ -136,10 +137,16 @@ class Aligner(Extractor):  # pylint:disable=abstract-method
                 continue
 
             converted_image = item.get_image_copy(self.color_format)
+            # Rolled over items do not carry the offset, so take it from the original item
+            offset = self._extract_media[item.filename].image_offset
             for f_idx, face in enumerate(item.detected_faces):
+                # Move the face into the co-ordinate space of the (potentially cropped) image
+                face.x -= offset[0]
+                face.y -= offset[1]
                 batch.setdefault("image", []).append(converted_image)
                 batch.setdefault("detected_faces", []).append(face)
                 batch.setdefault("filename", []).append(item.filename)
+                batch.setdefault("image_offsets", []).append(offset)
                 idx += 1
                 if idx == self.batchsize:
                     frame_faces = len(item.detected_faces)
@@ -188,7 +195,7 @@ class Aligner(Extractor):  # pylint:disable=abstract-method
         ----------
         batch : dict
             The final ``dict`` from the `plugin` process. It must contain the `keys`:
-            ``detected_faces``, ``landmarks``, ``filename``
+            ``detected_faces``, ``landmarks``, ``filename``, ``image_offsets``
 
         Yields
         ------
@@ -197,10 +204,15 @@ class Aligner(Extractor):  # pylint:disable=abstract-method
             and landmarks for the detected faces found in the frame.
         """
 
-        for face, landmarks in zip(batch["detected_faces"], batch["landmarks"]):
+        for face, landmarks, offset in zip(batch["detected_faces"],
+                                           batch["landmarks"],
+                                           batch["image_offsets"]):
             if not isinstance(landmarks, np.ndarray):
                 landmarks = np.array(landmarks)
-            face.landmarks_xy = landmarks
+            # Return the face to the co-ordinate space of the original frame
+            face.x += offset[0]
+            face.y += offset[1]
+            face.landmarks_xy = landmarks + np.array(offset, dtype=landmarks.dtype)
 
         logger.trace("Item out: %s", {key: val.shape if isinstance(val, np.ndarray) else val
                                       for key, val in batch.items()})
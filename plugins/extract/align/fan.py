@@ -44,84 +44,110 @@ class Align(Aligner):
         faces = self.crop(batch)
         logger.trace("Aligned image around center")
         faces = self._normalize_faces(faces)
-        batch["feed"] = np.array(faces, dtype="float32")[..., :3] / 255.0
+        faces = faces if isinstance(faces, np.ndarray) else np.array(faces)
+        batch["feed"] = np.divide(faces[..., :3], 255.0, dtype="float32")
         return batch
 
     def get_center_scale(self, detected_faces):
-        """ Get the center and set scale of bounding box """
+        """ Get the center and set scale of bounding box
+
+        Parameters
+        ----------
+        detected_faces: list
+            The :class:`~lib.align.DetectedFace` objects to obtain the center and scale for
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (`N`, 3) `x` center, `y` center and scale for each face
+        """
         logger.debug("Calculating center and scale")
-        center_scale = np.empty((len(detected_faces), 68, 3), dtype='float32')
-        for index, face in enumerate(detected_faces):
-            x_center = (face.left + face.right) / 2.0
-            y_center = (face.top + face.bottom) / 2.0 - face.h * 0.12
-            scale = (face.w + face.h) * self.reference_scale
-            center_scale[index, :, 0] = np.full(68, x_center, dtype='float32')
-            center_scale[index, :, 1] = np.full(68, y_center, dtype='float32')
-            center_scale[index, :, 2] = np.full(68, scale, dtype='float32')
+        boxes = np.array([(face.left, face.top, face.right, face.bottom)
+                          for face in detected_faces], dtype="float64")
+        widths = boxes[:, 2] - boxes[:, 0]
+        heights = boxes[:, 3] - boxes[:, 1]
+        center_scale = np.empty((len(boxes), 3), dtype="float32")
+        center_scale[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2.0
+        center_scale[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2.0 - heights * 0.12
+        center_scale[:, 2] = (widths + heights) * self.reference_scale
         logger.trace("Calculated center and scale: %s", center_scale)
         return center_scale
 
-    def crop(self, batch):  # pylint:disable=too-many-locals
-        """ Crop image around the center point """
+    def crop(self, batch):
+        """ Crop image around the center point
+
+        The crop box for every face is obtained by transforming the corners of the model input
+        through each face's matrix in a single pass. Each crop is then scaled straight into a
+        pre-allocated batch.
+
+        Parameters
+        ----------
+        batch: dict
+            The batch being processed, containing the ``image`` and ``center_scale`` for each face
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (`N`, :attr:`input_size`, :attr:`input_size`, 3) cropped faces
+        """
         logger.debug("Cropping images")
         sizes = (self.input_size, self.input_size)
-        batch_shape = batch["center_scale"].shape[:2]
-        resolutions = np.full(batch_shape, self.input_size, dtype='float32')
-        matrix_ones = np.ones(batch_shape + (3,), dtype='float32')
-        matrix_size = np.full(batch_shape + (3,), self.input_size, dtype='float32')
-        matrix_size[..., 2] = 1.0
-        upper_left = self.transform(matrix_ones, batch["center_scale"], resolutions)
-        bot_right = self.transform(matrix_size, batch["center_scale"], resolutions)
-
-        # TODO second pass .. convert to matrix
-        new_images = []
-        for image, top_left, bottom_right in zip(batch["image"], upper_left, bot_right):
+        corners = np.array([[1, 1], [self.input_size, self.input_size]], dtype="float32")
+        corners = np.broadcast_to(corners, (len(batch["center_scale"]), 2, 2))
+        boxes = self.transform(corners, batch["center_scale"], self.input_size).astype("int32")
+
+        retval = np.empty((len(boxes), self.input_size, self.input_size, 3), dtype="uint8")
+        for image, ((left, top), (right, bottom)), face in zip(batch["image"], boxes, retval):
             height, width = image.shape[:2]
-            channels = 3 if image.ndim > 2 else 1
-            bottom_right_width, bottom_right_height = bottom_right[0].astype('int32')
-            top_left_width, top_left_height = top_left[0].astype('int32')
-            new_dim = (bottom_right_height - top_left_height,
-                       bottom_right_width - top_left_width,
-                       channels)
-            new_img = np.empty(new_dim, dtype=np.uint8)
-
-            new_x = slice(max(0, -top_left_width), min(bottom_right_width, width) - top_left_width)
-            new_y = slice(max(0, -top_left_height),
-                          min(bottom_right_height, height) - top_left_height)
-            old_x = slice(max(0, top_left_width), min(bottom_right_width, width))
-            old_y = slice(max(0, top_left_height), min(bottom_right_height, height))
-            new_img[new_y, new_x] = image[old_y, old_x]
-
-            interp = cv2.INTER_CUBIC if new_dim[0] < self.input_size else cv2.INTER_AREA
-            new_images.append(cv2.resize(new_img, dsize=sizes, interpolation=interp))
+            new_img = image[max(0, top):min(bottom, height), max(0, left):min(right, width)]
+            if new_img.size == 0:
+                face[...] = 0
+                continue
+            if left < 0 or top < 0 or right > width or bottom > height:
+                new_img = cv2.copyMakeBorder(new_img,
+                                             max(0, -top),
+                                             max(0, bottom - height),
+                                             max(0, -left),
+                                             max(0, right - width),
+                                             cv2.BORDER_CONSTANT)
+            interp = cv2.INTER_CUBIC if bottom - top < self.input_size else cv2.INTER_AREA
+            cv2.resize(new_img, dsize=sizes, dst=face, interpolation=interp)
         logger.trace("Cropped images")
-        return new_images
+        return retval
 
     @staticmethod
-    def transform(points, center_scales, resolutions):
-        """ Transform Image """
+    def transform(points, center_scales, resolution):
+        """ Transform points from the model's input or output space into the original image
+
+        Parameters
+        ----------
+        points: :class:`numpy.ndarray`
+            The (`N`, `M`, 2) points to transform
+        center_scales: :class:`numpy.ndarray`
+            The (`N`, 3) center and scale of each face, from :func:`get_center_scale`
+        resolution: int
+            The size of the space that the points are in
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (`N`, `M`, 2) transformed points
+        """
         logger.debug("Transforming Points")
-        num_images, num_landmarks = points.shape[:2]
-        transform_matrix = np.eye(3, dtype='float32')
-        transform_matrix = np.repeat(transform_matrix[None, :], num_landmarks, axis=0)
-        transform_matrix = np.repeat(transform_matrix[None, :, :], num_images, axis=0)
-        scales = center_scales[:, :, 2] / resolutions
-        translations = center_scales[..., 2:3] * -0.5 + center_scales[..., :2]
-        transform_matrix[:, :, 0, 0] = scales  # x scale
-        transform_matrix[:, :, 1, 1] = scales  # y scale
-        transform_matrix[:, :, 0, 2] = translations[:, :, 0]  # x translation
-        transform_matrix[:, :, 1, 2] = translations[:, :, 1]  # y translation
-        new_points = np.einsum('abij, abj -> abi', transform_matrix, points, optimize='greedy')
-        retval = new_points[:, :, :2].astype('float32')
+        matrices = np.zeros((len(center_scales), 2, 3), dtype="float32")
+        scales = center_scales[:, 2] / resolution
+        matrices[:, 0, 0] = scales  # x scale
+        matrices[:, 1, 1] = scales  # y scale
+        matrices[:, :, 2] = center_scales[:, 2:3] * -0.5 + center_scales[:, :2]  # translation
+        retval = points * matrices[:, None, (0, 1), (0, 1)] + matrices[:, None, :, 2]
+        retval = retval.astype("float32")
         logger.trace("Transformed Points: %s", retval)
         return retval
 
     def predict(self, batch):
         """ Predict the 68 point landmarks """
         logger.debug("Predicting Landmarks")
-        # TODO Remove lazy transpose and change points from predict to use the correct
-        # order
-        retval = self.model.predict(batch)[-1].transpose(0, 3, 1, 2)
+        retval = self.model.predict(batch)[-1]
         logger.trace(retval.shape)
         return retval
 
@@ -131,27 +157,29 @@ class Align(Aligner):
         return batch
 
     def get_pts_from_predict(self, batch):
-        """ Get points from predictor """
+        """ Get points from predictor
+
+        The heatmaps are decoded for all faces and landmarks in a single pass, directly from the
+        model's (`N`, `height`, `width`, `landmarks`) output.
+        """
         logger.debug("Obtain points from prediction")
-        num_images, num_landmarks, height, width = batch["prediction"].shape
-        image_slice = np.repeat(np.arange(num_images)[:, None], num_landmarks, axis=1)
-        landmark_slice = np.repeat(np.arange(num_landmarks)[None, :], num_images, axis=0)
-        resolution = np.full((num_images, num_landmarks), 64, dtype='int32')
-        subpixel_landmarks = np.ones((num_images, num_landmarks, 3), dtype='float32')
-
-        flat_indices = batch["prediction"].reshape(num_images, num_landmarks, -1).argmax(-1)
-        indices = np.array(np.unravel_index(flat_indices, (height, width)))
-        min_clipped = np.minimum(indices + 1, height - 1)
-        max_clipped = np.maximum(indices - 1, 0)
-        offsets = [(image_slice, landmark_slice, indices[0], min_clipped[1]),
-                   (image_slice, landmark_slice, indices[0], max_clipped[1]),
-                   (image_slice, landmark_slice, min_clipped[0], indices[1]),
-                   (image_slice, landmark_slice, max_clipped[0], indices[1])]
-        x_subpixel_shift = batch["prediction"][offsets[0]] - batch["prediction"][offsets[1]]
-        y_subpixel_shift = batch["prediction"][offsets[2]] - batch["prediction"][offsets[3]]
+        num_images, height, width, num_landmarks = batch["prediction"].shape
+        heatmaps = batch["prediction"].reshape(num_images, height * width, num_landmarks)
+        image_slice = np.arange(num_images)[:, None]
+        landmark_slice = np.arange(num_landmarks)[None, :]
+
+        rows, cols = np.divmod(heatmaps.argmax(axis=1), width)
+        heat_right = heatmaps[image_slice, rows * width + np.minimum(cols + 1, width - 1),
+                              landmark_slice]
+        heat_left = heatmaps[image_slice, rows * width + np.maximum(cols - 1, 0), landmark_slice]
+        heat_down = heatmaps[image_slice, np.minimum(rows + 1, height - 1) * width + cols,
+                             landmark_slice]
+        heat_up = heatmaps[image_slice, np.maximum(rows - 1, 0) * width + cols, landmark_slice]
+
         # TODO improve rudimentary sub-pixel logic to centroid of 3x3 window algorithm
-        subpixel_landmarks[:, :, 0] = indices[1] + np.sign(x_subpixel_shift) * 0.25 + 0.5
-        subpixel_landmarks[:, :, 1] = indices[0] + np.sign(y_subpixel_shift) * 0.25 + 0.5
+        subpixel_landmarks = np.empty((num_images, num_landmarks, 2), dtype="float32")
+        subpixel_landmarks[:, :, 0] = cols + np.sign(heat_right - heat_left) * 0.25 + 0.5
+        subpixel_landmarks[:, :, 1] = rows + np.sign(heat_down - heat_up) * 0.25 + 0.5
 
-        batch["landmarks"] = self.transform(subpixel_landmarks, batch["center_scale"], resolution)
+        batch["landmarks"] = self.transform(subpixel_landmarks, batch["center_scale"], width)
         logger.trace("Obtained points from prediction: %s", batch["landmarks"])
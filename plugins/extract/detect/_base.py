@@ -71,11 +71,24 @@ class Detector(Extractor):  # pylint:disable=abstract-method
                          **kwargs)
         self.rotation = self._get_rotation_angles(rotation)
         self.min_size = min_size
+        self._frame_store = None
 
         self._plugin_type = "detect"
 
         logger.debug("Initialized _base %s", self.__class__.__name__)
 
+    def set_frame_store(self, frame_store):
+        """ Set a frame store to hold each frame once its faces have been detected, so that only
+        the area of the frame containing the faces is passed on to the next plugin.
+
+        Parameters
+        ----------
+        frame_store: :class:`~plugins.extract.pipeline.FrameStore`
+            The store to park the full frames in
+        """
+        logger.debug("Setting frame store: %s", frame_store)
+        self._frame_store = frame_store
+
     # <<< QUEUE METHODS >>> #
     def get_batch(self, queue):
         """ Get items for inputting to the detector plugin in batches
@@ -186,6 +199,8 @@ class Detector(Extractor):  # pylint:disable=abstract-method
         for item in batch:
             output = self._extract_media.pop(item["filename"])
             output.add_detected_faces(item["detected_faces"])
+            if self._frame_store is not None:
+                self._frame_store.park(output)
             logger.trace("final output: (filename: '%s', image shape: %s, detected_faces: %s, "
                          "item: %s", output.filename, output.image_shape, output.detected_faces,
                          output)
@@ -202,14 +217,22 @@ class Detector(Extractor):  # pylint:disable=abstract-method
     # <<< PROTECTED ACCESS METHODS >>> #
     # <<< PREDICT WRAPPER >>> #
     def _predict(self, batch):
-        """ Wrap models predict function in rotations """
+        """ Wrap models predict function in rotations
+
+        The full batch is predicted in its upright state. For each subsequent rotation angle, only
+        the images that do not yet have any detected faces are rotated and predicted, as a
+        compacted sub-batch. The results are then merged back into the full batch.
+        """
         batch["rotmat"] = [np.array([]) for _ in range(len(batch["feed"]))]
         found_faces = [np.array([]) for _ in range(len(batch["feed"]))]
         for angle in self.rotation:
-            # Rotate the batch and insert placeholders for already found faces
-            self._rotate_batch(batch, angle)
+            unmatched = [idx for idx, faces in enumerate(found_faces) if not faces.any()]
             try:
-                batch = self.predict(batch)
+                if angle == 0:
+                    batch = self.predict(batch)
+                    sub_batch = batch
+                else:
+                    sub_batch = self.predict(self._get_rotated_batch(batch, unmatched, angle))
             except tf_errors.ResourceExhaustedError as err:
                 msg = ("You do not have enough GPU memory available to run detection at the "
                        "selected batch size. You can try a number of things:"
@@ -238,11 +261,12 @@ class Detector(Extractor):  # pylint:disable=abstract-method
                         raise FaceswapError(msg) from err
                 raise
 
-            if angle != 0 and any([face.any() for face in batch["prediction"]]):
+            if angle != 0 and any([face.any() for face in sub_batch["prediction"]]):
                 logger.verbose("found face(s) by rotating image %s degrees", angle)
 
-            found_faces = [face if not found.any() else found
-                           for face, found in zip(batch["prediction"], found_faces)]
+            for idx, position in enumerate(unmatched):
+                found_faces[position] = sub_batch["prediction"][idx]
+                batch["rotmat"][position] = sub_batch["rotmat"][idx]
 
             if all([face.any() for face in found_faces]):
                 logger.trace("Faces found for all images")
@@ -373,26 +397,39 @@ class Detector(Extractor):  # pylint:disable=abstract-method
         logger.debug("Rotation Angles: %s", rotation_angles)
         return rotation_angles
 
-    def _rotate_batch(self, batch, angle):
-        """ Rotate images in a batch by given angle
-            if any faces have already been detected for a batch, store the existing rotation
-            matrix and replace the feed image with a placeholder """
-        if angle == 0:
-            # Set the initial batch so we always rotate from zero
-            batch["initial_feed"] = batch["feed"].copy()
-            return
+    def _get_rotated_batch(self, batch, indices, angle):
+        """ Compile a sub-batch of the given images, rotated by the given angle.
 
+        Parameters
+        ----------
+        batch: dict
+            The full batch that is being predicted
+        indices: list
+            The indices of the images within the full batch that are to be rotated and predicted
+        angle: int
+            The angle, in degrees, to rotate the images by
+
+        Returns
+        -------
+        dict
+            The sub-batch containing the rotated feed images and their rotation matrices, along
+            with the metadata (filename, scale, padding etc.) of each selected image
+        """
+        batch_size = len(batch["feed"])
         retval = dict()
-        for img, faces, rotmat in zip(batch["initial_feed"], batch["prediction"], batch["rotmat"]):
-            if faces.any():
-                image = np.zeros_like(img)
-                matrix = rotmat
-            else:
-                image, matrix = self._rotate_image_by_angle(img, angle)
-            retval.setdefault("feed", []).append(image)
-            retval.setdefault("rotmat", []).append(matrix)
-        batch["feed"] = np.array(retval["feed"], dtype="float32")
-        batch["rotmat"] = retval["rotmat"]
+        for key, val in batch.items():
+            if key in ("feed", "prediction"):
+                continue
+            if isinstance(val, np.ndarray) and val.shape[0] == batch_size:
+                val = val[indices]
+            elif isinstance(val, list) and len(val) == batch_size:
+                val = [val[idx] for idx in indices]
+            retval[key] = val
+        rotated = [self._rotate_image_by_angle(batch["feed"][idx], angle) for idx in indices]
+        retval["feed"] = np.array([image for image, _ in rotated], dtype="float32")
+        retval["rotmat"] = [matrix for _, matrix in rotated]
+        logger.trace("Rotated sub-batch: (angle: %s, indices: %s)", angle, indices)
+        return retval
 
     @staticmethod
     def _rotate_face(face, rotation_matrix):
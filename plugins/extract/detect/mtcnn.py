@@ -209,7 +209,6 @@ class ONet(KSession):
 
 class MTCNN():
     """ MTCNN Detector for face alignment """
-    # TODO Batching for r-net and o-net
 
     def __init__(self, model_path, allow_growth, exclude_gpus, minsize, threshold, factor):
         """
@@ -286,62 +285,66 @@ class MTCNN():
 
     def detect_rnet(self, images, rectangle_batch, height, width):
         """ second stage - refinement of face candidates with r-net """
-        ret = []
-        # TODO: batching
-        for idx, rectangles in enumerate(rectangle_batch):
-            if not rectangles:
-                ret.append([])
-                continue
-            image = images[idx]
-            crop_number = 0
-            predict_24_batch = []
-            for rect in rectangles:
-                crop_img = image[int(rect[1]):int(rect[3]), int(rect[0]):int(rect[2])]
-                scale_img = cv2.resize(crop_img, (24, 24))
-                predict_24_batch.append(scale_img)
-                crop_number += 1
-            predict_24_batch = np.array(predict_24_batch)
-            output = self.rnet.predict(predict_24_batch, batch_size=128)
-            cls_prob = output[0]
-            cls_prob = np.array(cls_prob)
-            roi_prob = output[1]
-            roi_prob = np.array(roi_prob)
-            ret.append(filter_face_24net(
-                cls_prob, roi_prob, rectangles, width, height, self.threshold[1]
-            ))
-        return ret
+        crops, splits = self._crop_candidates(images, rectangle_batch, 24)
+        if not crops.shape[0]:
+            return [[] for _ in rectangle_batch]
+        output = self.rnet.predict(crops, batch_size=128)
+        cls_probs = np.split(np.array(output[0]), splits)
+        roi_probs = np.split(np.array(output[1]), splits)
+        return [filter_face_24net(cls_prob, roi_prob, rectangles, width, height, self.threshold[1])
+                if rectangles else []
+                for rectangles, cls_prob, roi_prob in zip(rectangle_batch, cls_probs, roi_probs)]
 
     def detect_onet(self, images, rectangle_batch, height, width):
         """ third stage - further refinement and facial landmarks positions with o-net """
-        ret = []
-        # TODO: batching
-        for idx, rectangles in enumerate(rectangle_batch):
-            if not rectangles:
-                ret.append([])
-                continue
-            image = images[idx]
-            crop_number = 0
-            predict_batch = []
+        crops, splits = self._crop_candidates(images, rectangle_batch, 48)
+        if not crops.shape[0]:
+            return [[] for _ in rectangle_batch]
+        output = self.onet.predict(crops, batch_size=128)
+        cls_probs, roi_probs, pts_probs = [np.split(out, splits) for out in output[:3]]
+        return [filter_face_48net(cls_prob,
+                                  roi_prob,
+                                  pts_prob,
+                                  rectangles,
+                                  width,
+                                  height,
+                                  self.threshold[2])
+                if rectangles else []
+                for rectangles, cls_prob, roi_prob, pts_prob in zip(rectangle_batch,
+                                                                    cls_probs,
+                                                                    roi_probs,
+                                                                    pts_probs)]
+
+    @staticmethod
+    def _crop_candidates(images, rectangle_batch, size):
+        """ Crop and resize the candidate face boxes for every image in the batch into a single
+        array, so that each refinement stage only needs to be predicted once per batch.
+
+        Parameters
+        ----------
+        images: :class:`numpy.ndarray`
+            The batch of images that the candidates were detected in
+        rectangle_batch: list
+            The candidate face boxes for each image in the batch
+        size: int
+            The size, in pixels, to resize each crop to
+
+        Returns
+        -------
+        crops: :class:`numpy.ndarray`
+            The resized crops for every candidate in the batch, in image order
+        splits: :class:`numpy.ndarray`
+            The indices to split the predictions for the crops back into the individual images
+        """
+        counts = [len(rectangles) for rectangles in rectangle_batch]
+        crops = np.empty((sum(counts), size, size, 3), dtype="float32")
+        idx = 0
+        for image, rectangles in zip(images, rectangle_batch):
             for rect in rectangles:
                 crop_img = image[int(rect[1]):int(rect[3]), int(rect[0]):int(rect[2])]
-                scale_img = cv2.resize(crop_img, (48, 48))
-                predict_batch.append(scale_img)
-                crop_number += 1
-            predict_batch = np.array(predict_batch)
-            output = self.onet.predict(predict_batch, batch_size=128)
-            cls_prob = output[0]
-            roi_prob = output[1]
-            pts_prob = output[2]  # index
-            ret.append(filter_face_48net(
-                cls_prob,
-                roi_prob,
-                pts_prob,
-                rectangles,
-                width,
-                height,
-                self.threshold[2]
-            ))
-        return ret
+                crops[idx] = cv2.resize(crop_img, (size, size))
+                idx += 1
+        return crops, np.cumsum(counts)[:-1]
 
 
 def detect_face_12net(cls_prob, roi, out_side, scale, width, height, threshold):
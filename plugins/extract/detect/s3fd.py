@@ -390,42 +390,63 @@ class S3fd(KSession):
     def finalize_predictions(self, bounding_boxes_scales):
         """ Process the output from the model to obtain faces
 
+        The candidate boxes for every image in the batch are thresholded and decoded together,
+        and Non-Maximum Suppression is then run for the whole batch at once.
+
         Parameters
         ----------
         bounding_boxes_scales: list
             The output predictions from the S3FD model
+
+        Returns
+        -------
+        list
+            A :class:`numpy.ndarray` of (`left`, `top`, `right`, `bottom`, `score`) rows for the
+            faces found in each image of the batch. Images without any faces contain a single row
+            of zeros
         """
-        ret = []
-        batch_size = range(bounding_boxes_scales[0].shape[0])
-        for img in batch_size:
-            bboxlist = [scale[img:img+1] for scale in bounding_boxes_scales]
-            boxes = self._post_process(bboxlist)
-            bboxlist = self._nms(boxes, 0.5)
-            ret.append(bboxlist)
-        return ret
+        batch_size = bounding_boxes_scales[0].shape[0]
+        indices, boxes = self._post_process(bounding_boxes_scales)
+        return self._nms(indices, boxes, batch_size, 0.5)
 
     def _post_process(self, bboxlist):
-        """ Perform post processing on output
-            TODO: do this on the batch.
+        """ Threshold and decode the candidate boxes for every scale of the whole batch.
+
+        Parameters
+        ----------
+        bboxlist: list
+            The output predictions from the S3FD model
+
+        Returns
+        -------
+        indices: :class:`numpy.ndarray`
+            The index of the image within the batch that each candidate box belongs to, in
+            ascending order
+        boxes: :class:`numpy.ndarray`
+            The decoded (`left`, `top`, `right`, `bottom`, `score`) candidate boxes, grouped by
+            image
         """
-        retval = []
+        indices = []
+        locations = []
+        priors = []
+        scores = []
         for i in range(len(bboxlist) // 2):
-            bboxlist[i * 2] = self.softmax(bboxlist[i * 2], axis=3)
-        for i in range(len(bboxlist) // 2):
-            ocls, oreg = bboxlist[i * 2], bboxlist[i * 2 + 1]
+            ocls = self.softmax(bboxlist[i * 2], axis=3)[..., 1]
+            oreg = bboxlist[i * 2 + 1]
             stride = 2 ** (i + 2)    # 4,8,16,32,64,128
-            poss = zip(*np.where(ocls[:, :, :, 1] > 0.05))
-            for _, hindex, windex in poss:
-                axc, ayc = stride / 2 + windex * stride, stride / 2 + hindex * stride
-                score = ocls[0, hindex, windex, 1]
-                if score >= self.confidence:
-                    loc = np.ascontiguousarray(oreg[0, hindex, windex, :]).reshape((1, 4))
-                    priors = np.array([[axc / 1.0, ayc / 1.0, stride * 4 / 1.0, stride * 4 / 1.0]])
-                    box = self.decode(loc, priors)
-                    x_1, y_1, x_2, y_2 = box[0] * 1.0
-                    retval.append([x_1, y_1, x_2, y_2, score])
-        return_numpy = np.array(retval) if len(retval) != 0 else np.zeros((1, 5))
-        return return_numpy
+            img_idx, hindex, windex = np.nonzero((ocls > 0.05) & (ocls >= self.confidence))
+            indices.append(img_idx)
+            locations.append(oreg[img_idx, hindex, windex])
+            scores.append(ocls[img_idx, hindex, windex])
+            priors.append(np.stack([stride / 2 + windex * stride,
+                                    stride / 2 + hindex * stride,
+                                    np.full(windex.shape, stride * 4 / 1.0),
+                                    np.full(windex.shape, stride * 4 / 1.0)], axis=1))
+        indices = np.concatenate(indices)
+        order = np.argsort(indices, kind="stable")
+        boxes = self.decode(np.concatenate(locations)[order], np.concatenate(priors)[order])
+        boxes = np.concatenate([boxes, np.concatenate(scores)[order, None]], axis=1)
+        return indices[order], boxes
 
     @staticmethod
     def softmax(inp, axis):
@@ -457,29 +478,71 @@ class S3fd(KSession):
         return boxes
 
     @staticmethod
-    def _nms(boxes, threshold):
-        """ Perform Non-Maximum Suppression """
-        retained_box_indices = []
-
-        areas = (boxes[:, 2] - boxes[:, 0] + 1) * (boxes[:, 3] - boxes[:, 1] + 1)
-        ranked_indices = boxes[:, 4].argsort()[::-1]
-        while ranked_indices.size > 0:
-            best = ranked_indices[0]
-            rest = ranked_indices[1:]
-
-            max_of_xy = np.maximum(boxes[best, :2], boxes[rest, :2])
-            min_of_xy = np.minimum(boxes[best, 2:4], boxes[rest, 2:4])
+    def _nms(indices, boxes, batch_size, threshold):
+        """ Perform Non-Maximum Suppression for every image in the batch at once.
+
+        Each image's boxes are padded to the largest number of boxes found in any image, and the
+        greedy suppression steps through the ranked boxes of every image together. Each retained
+        box is replaced by the score weighted average of the boxes that it suppresses.
+
+        Parameters
+        ----------
+        indices: :class:`numpy.ndarray`
+            The index of the image within the batch that each box belongs to, in ascending order
+        boxes: :class:`numpy.ndarray`
+            The (`left`, `top`, `right`, `bottom`, `score`) boxes, grouped by image
+        batch_size: int
+            The number of images in the batch
+        threshold: float
+            The Intersection over Union above which boxes are suppressed
+
+        Returns
+        -------
+        list
+            The retained boxes for each image in the batch. Images without any boxes contain a
+            single row of zeros
+        """
+        counts = np.bincount(indices, minlength=batch_size)
+        num_boxes = counts.max() if counts.size else 0
+        if num_boxes == 0:
+            return [np.zeros((1, 5)) for _ in range(batch_size)]
+
+        position = np.arange(indices.shape[0]) - (np.cumsum(counts) - counts)[indices]
+        valid = np.zeros((batch_size, num_boxes), dtype="bool")
+        valid[indices, position] = True
+        padded = np.zeros((batch_size, num_boxes, 5))
+        padded[indices, position] = boxes
+
+        ranked_indices = np.tile(np.arange(num_boxes), (batch_size, 1))
+        for idx, count in enumerate(counts):
+            ranked_indices[idx, :count] = padded[idx, :count, 4].argsort()[::-1]
+        ranked = np.take_along_axis(padded, ranked_indices[..., None], axis=1)
+        alive = np.take_along_axis(valid, ranked_indices, axis=1)
+        retained = np.zeros_like(alive)
+        areas = (ranked[..., 2] - ranked[..., 0] + 1) * (ranked[..., 3] - ranked[..., 1] + 1)
+
+        for best in range(num_boxes):
+            keep = alive[:, best].copy()
+            if not keep.any():
+                continue
+            retained[:, best] = keep
+            alive[:, best] = False
+
+            max_of_xy = np.maximum(ranked[:, best, None, :2], ranked[..., :2])
+            min_of_xy = np.minimum(ranked[:, best, None, 2:4], ranked[..., 2:4])
             width_height = np.maximum(0, min_of_xy - max_of_xy + 1)
-            intersection_areas = width_height[:, 0] * width_height[:, 1]
-            iou = intersection_areas / (areas[best] + areas[rest] - intersection_areas)
-
-            overlapping_boxes = (iou > threshold).nonzero()[0]
-            if len(overlapping_boxes) != 0:
-                overlap_set = ranked_indices[overlapping_boxes + 1]
-                vote = np.average(boxes[overlap_set, :4], axis=0, weights=boxes[overlap_set, 4])
-                boxes[best, :4] = vote
-            retained_box_indices.append(best)
-
-            non_overlapping_boxes = (iou <= threshold).nonzero()[0]
-            ranked_indices = ranked_indices[non_overlapping_boxes + 1]
-        return boxes[retained_box_indices]
+            intersection_areas = width_height[..., 0] * width_height[..., 1]
+            iou = intersection_areas / (areas[:, best, None] + areas - intersection_areas)
+
+            candidates = alive & keep[:, None]
+            overlapping = candidates & (iou > threshold)
+            voted = overlapping.any(axis=1)
+            if voted.any():
+                weights = np.where(overlapping[voted], ranked[voted, :, 4], 0.)
+                vote = (np.sum(ranked[voted, :, :4] * weights[..., None], axis=1) /
+                        np.sum(weights, axis=1, keepdims=True))
+                ranked[voted, best, :4] = vote
+            alive &= ~(candidates & ~(iou <= threshold))
+
+        return [ranked[idx][retained[idx]] if counts[idx] else np.zeros((1, 5))
+                for idx in range(batch_size)]
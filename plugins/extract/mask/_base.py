@@ -120,16 +120,19 @@ class Masker(Extractor):  # pylint:disable=abstract-method
             if not item.detected_faces:
                 self._queues["out"].put(item)
                 continue
+            # Rolled over items do not carry the offset, so take it from the original item
+            offset = self._extract_media[item.filename].image_offset
             for f_idx, face in enumerate(item.detected_faces):
 
                 image = item.get_image_copy(self.color_format)
-                roi = np.ones((*item.image_size[:2], 1), dtype="float32")
+                roi = np.ones((*image.shape[:2], 1), dtype="float32")
 
                 if not self._image_is_aligned:
                     # Add the ROI mask to image so we can get the ROI mask with a single warp
                     image = np.concatenate([image, roi], axis=-1)
 
-                feed_face = AlignedFace(face.landmarks_xy,
+                landmarks = face.landmarks_xy - np.array(offset, dtype=face.landmarks_xy.dtype)
+                feed_face = AlignedFace(landmarks,
                                         image=image,
                                         centering=self._storage_centering,
                                         size=self.input_size,
@@ -152,6 +155,7 @@ class Masker(Extractor):  # pylint:disable=abstract-method
                 batch.setdefault("detected_faces", []).append(face)
                 batch.setdefault("feed_faces", []).append(feed_face)
                 batch.setdefault("filename", []).append(item.filename)
+                batch.setdefault("image_offsets", []).append(offset)
                 idx += 1
                 if idx == self.batchsize:
                     frame_faces = len(item.detected_faces)
@@ -231,7 +235,7 @@ class Masker(Extractor):  # pylint:disable=abstract-method
         ----------
         batch : dict
             The final ``dict`` from the `plugin` process. It must contain the `keys`:
-            ``detected_faces``, ``filename``, ``feed_faces``, ``roi_masks``
+            ``detected_faces``, ``filename``, ``feed_faces``, ``roi_masks``, ``image_offsets``
 
         Yields
         ------
@@ -239,14 +243,18 @@ class Masker(Extractor):  # pylint:disable=abstract-method
             The :attr:`DetectedFaces` list will be populated for this class with the bounding
             boxes, landmarks and masks for the detected faces found in the frame.
         """
-        for mask, face, feed_face, roi_mask in zip(batch["prediction"],
-                                                   batch["detected_faces"],
-                                                   batch["feed_faces"],
-                                                   batch["roi_masks"]):
+        for mask, face, feed_face, roi_mask, offset in zip(batch["prediction"],
+                                                           batch["detected_faces"],
+                                                           batch["feed_faces"],
+                                                           batch["roi_masks"],
+                                                           batch["image_offsets"]):
             self._crop_out_of_bounds(mask, roi_mask)
+            # Move the matrix from the (potentially cropped) image to the original frame
+            matrix = feed_face.adjusted_matrix.copy()
+            matrix[:, 2] -= matrix[:, :2] @ np.array(offset, dtype=matrix.dtype)
             face.add_mask(self._storage_name,
                           mask,
-                          feed_face.adjusted_matrix,
+                          matrix,
                           feed_face.interpolators[1],
                           storage_size=self._storage_size,
                           storage_centering=self._storage_centering)
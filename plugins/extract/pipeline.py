@@ -11,6 +11,7 @@ plugins either in parallel or in series, giving easy access to input and output.
  """
 
 import logging
+from threading import Lock
 
 import cv2
 
@@ -73,6 +74,12 @@ class Extractor():
     image_is_aligned: bool, optional
         Used to set the :attr:`plugins.extract.mask.image_is_aligned` attribute. Indicates to the
         masker that the fed in image is an aligned face rather than a frame. Default: ``False``
+    crop_handoff: bool, optional
+        ``True`` to only pass the area of each frame that contains the detected faces from the
+        detector to the aligner and maskers. The full frame is held in a :class:`FrameStore` and
+        placed back into the :class:`ExtractMedia` object when it exits the pipeline. This
+        reduces the amount of memory held in the plugin queues for high resolution sources.
+        Default: ``False``
 
     Attributes
     ----------
@@ -82,13 +89,14 @@ class Extractor():
     """
     def __init__(self, detector, aligner, masker, configfile=None, multiprocess=False,
                  exclude_gpus=None, rotate_images=None, min_size=20, normalize_method=None,
-                 re_feed=0, image_is_aligned=False):
+                 re_feed=0, image_is_aligned=False, crop_handoff=False):
         logger.debug("Initializing %s: (detector: %s, aligner: %s, masker: %s, configfile: %s, "
                      "multiprocess: %s, exclude_gpus: %s, rotate_images: %s, min_size: %s, "
-                     "normalize_method: %s, re_feed: %s, image_is_aligned: %s)",
+                     "normalize_method: %s, re_feed: %s, image_is_aligned: %s, "
+                     "crop_handoff: %s)",
                      self.__class__.__name__, detector, aligner, masker, configfile, multiprocess,
                      exclude_gpus, rotate_images, min_size, normalize_method, re_feed,
-                     image_is_aligned)
+                     image_is_aligned, crop_handoff)
         self._instance = _get_instance()
         masker = [masker] if not isinstance(masker, list) else masker
         self._flow = self._set_flow(detector, aligner, masker)
@@ -102,8 +110,10 @@ class Extractor():
         self._detect = self._load_detect(detector, rotate_images, min_size, configfile)
         self._align = self._load_align(aligner, configfile, normalize_method, re_feed)
         self._mask = [self._load_mask(mask, image_is_aligned, configfile) for mask in masker]
+        self._set_plugin_replicas()
         self._is_parallel = self._set_parallel_processing(multiprocess)
         self._phases = self._set_phases(multiprocess)
+        self._frame_store = self._set_frame_store(crop_handoff)
         self._phase_index = 0
         self._set_extractor_batchsize()
         self._queues = self._add_queues()
@@ -243,6 +253,8 @@ class Extractor():
                     break
             except QueueEmpty:
                 continue
+            if self._frame_store is not None:
+                self._frame_store.restore(faces)
             yield faces
 
         self._join_threads()
@@ -282,13 +294,14 @@ class Extractor():
 
     @property
     def _vram_per_phase(self):
-        """ dict: The amount of vram required for each phase in :attr:`_flow`. """
+        """ dict: The amount of vram required for each phase in :attr:`_flow`, including all of
+        the replicas of the phase's plugin. """
         retval = dict()
         for phase in self._flow:
             plugin_type, idx = self._get_plugin_type_and_index(phase)
             attr = getattr(self, "_{}".format(plugin_type))
             attr = attr[idx] if idx is not None else attr
-            retval[phase] = attr.vram
+            retval[phase] = attr.vram * attr.replicas
         logger.trace(retval)
         return retval
 
@@ -429,6 +442,46 @@ class Extractor():
         logger.debug(retval)
         return retval
 
+    def _set_plugin_replicas(self):
+        """ Reduce the number of replicas requested for each plugin to fit the available VRAM.
+
+        Plugins which do not use VRAM are never replicated. Replicas are then removed, starting
+        with the plugin that uses the most VRAM, until either all of the plugins fit into VRAM
+        together (if they would fit with a single replica each, so that parallel processing is
+        not lost to replication) or each plugin fits into VRAM on its own. Nvidia only.
+        """
+        plugins = self._all_plugins
+        requested = [plugin.replicas for plugin in plugins]
+        for plugin in plugins:
+            if plugin.vram == 0:
+                plugin.replicas = 1
+        if get_backend() != "nvidia" or self._vram_stats["count"] == 0:
+            logger.debug("Not updating replicas for VRAM: (backend: %s, gpu count: %s)",
+                         get_backend(), self._vram_stats["count"])
+            return
+
+        available = self._vram_stats["vram_free"]
+        scaling = self._parallel_scaling.get(sum(1 for plugin in plugins if plugin.vram > 0),
+                                             self._scaling_fallback)
+        fit_all = sum(plugin.vram for plugin in plugins) * scaling <= available
+        while True:
+            if fit_all and self._total_vram_required > available:
+                candidates = [plugin for plugin in plugins if plugin.replicas > 1]
+            else:
+                candidates = [plugin for plugin in plugins
+                              if plugin.replicas > 1 and plugin.vram * plugin.replicas > available]
+            if not candidates:
+                break
+            plugin = max(candidates, key=lambda p: p.vram)
+            plugin.replicas -= 1
+            logger.debug("Reduced replicas for %s to %s", plugin, plugin.replicas)
+
+        if any(plugin.replicas != req and req > 1 and plugin.vram > 0
+               for plugin, req in zip(plugins, requested)):
+            text = ", ".join(["{}: {}".format(plugin.__class__.__name__, plugin.replicas)
+                              for plugin in plugins if plugin.vram > 0])
+            logger.info("Reset plugin replicas due to available VRAM: %s", text)
+
     def _set_parallel_processing(self, multiprocess):
         """ Set whether to run detect, align, and mask together or separately.
 
@@ -507,6 +560,30 @@ class Extractor():
         logger.debug("Total phases: %s, Phases: %s", len(phases), phases)
         return phases
 
+    def _set_frame_store(self, crop_handoff):
+        """ Create the store for holding full frames whilst crops of the detected faces are passed
+        through the aligner and maskers, and hand it to the detector.
+
+        Parameters
+        ----------
+        crop_handoff: bool
+            ``True`` if crop handoff has been requested otherwise ``False``
+
+        Returns
+        -------
+        :class:`FrameStore` or ``None``
+            The frame store if crop handoff is to be used, otherwise ``None``. Crop handoff is
+            only used when the detector runs in the same phase as at least one other plugin
+        """
+        if not crop_handoff or self._detect is None or len(self._phases[0]) < 2:
+            logger.debug("Not using crop handoff: (requested: %s, phases: %s)",
+                         crop_handoff, self._phases)
+            return None
+        retval = FrameStore()
+        self._detect.set_frame_store(retval)
+        logger.debug("Using crop handoff")
+        return retval
+
     # << INTERNAL PLUGIN HANDLING >> #
     def _load_align(self, aligner, configfile, normalize_method, re_feed):
         """ Set global arguments and load aligner plugin """
@@ -582,7 +659,7 @@ class Extractor():
             logger.debug("No plugins use VRAM. Not updating batchsize requirements.")
             return
 
-        batch_required = sum([plugin.vram_per_batch * plugin.batchsize
+        batch_required = sum([plugin.vram_per_batch * plugin.batchsize * plugin.replicas
                               for plugin in self._active_plugins])
         gpu_plugins = [p for p in self._current_phase if self._vram_per_phase[p] > 0]
         scaling = self._parallel_scaling.get(len(gpu_plugins), self._scaling_fallback)
@@ -610,30 +687,35 @@ class Extractor():
         """ Set the batch size for the given plugin based on given available vram.
         Do not update plugins which have a vram_per_batch of 0 (CPU plugins) due to
         zero division error.
+
+        Each replica of a plugin holds its own batch, so the vram for each additional batch is
+        multiplied by the plugin's number of replicas.
         """
         plugins = [self._active_plugins[idx]
                    for idx, plugin in enumerate(self._current_phase)
                    if plugin in gpu_plugins]
-        vram_per_batch = [plugin.vram_per_batch for plugin in plugins]
+        vram_per_batch = [plugin.vram_per_batch * plugin.replicas for plugin in plugins]
         ratios = [vram / sum(vram_per_batch) for vram in vram_per_batch]
         requested_batchsizes = [plugin.batchsize for plugin in plugins]
-        batchsizes = [min(requested, max(1, int((available_vram * ratio) / plugin.vram_per_batch)))
-                      for ratio, plugin, requested in zip(ratios, plugins, requested_batchsizes)]
-        remaining = available_vram - sum(batchsize * plugin.vram_per_batch
-                                         for batchsize, plugin in zip(batchsizes, plugins))
-        sorted_indices = [i[0] for i in sorted(enumerate(plugins),
-                                               key=lambda x: x[1].vram_per_batch, reverse=True)]
+        batchsizes = [min(requested, max(1, int((available_vram * ratio) / per_batch)))
+                      for ratio, per_batch, requested in zip(ratios,
+                                                             vram_per_batch,
+                                                             requested_batchsizes)]
+        remaining = available_vram - sum(batchsize * per_batch
+                                         for batchsize, per_batch in zip(batchsizes,
+                                                                         vram_per_batch))
+        sorted_indices = [i[0] for i in sorted(enumerate(vram_per_batch),
+                                               key=lambda x: x[1], reverse=True)]
 
         logger.debug("requested_batchsizes: %s, batchsizes: %s, remaining vram: %s",
                      requested_batchsizes, batchsizes, remaining)
 
-        while remaining > min(plugin.vram_per_batch
-                              for plugin in plugins) and requested_batchsizes != batchsizes:
+        while remaining > min(vram_per_batch) and requested_batchsizes != batchsizes:
             for idx in sorted_indices:
                 plugin = plugins[idx]
-                if plugin.vram_per_batch > remaining:
+                if vram_per_batch[idx] > remaining:
                     logger.debug("Not enough VRAM to increase batch size of %s. Required: %sMB, "
-                                 "Available: %sMB", plugin, plugin.vram_per_batch, remaining)
+                                 "Available: %sMB", plugin, vram_per_batch[idx], remaining)
                     continue
                 if plugin.batchsize == batchsizes[idx]:
                     logger.debug("Threshold reached for %s. Batch size: %s",
@@ -641,7 +723,7 @@ class Extractor():
                     continue
                 logger.debug("Incrementing batch size of %s to %s", plugin, batchsizes[idx] + 1)
                 batchsizes[idx] += 1
-                remaining -= plugin.vram_per_batch
+                remaining -= vram_per_batch[idx]
                 logger.debug("Remaining VRAM to allocate: %sMB", remaining)
 
         if batchsizes != requested_batchsizes:
@@ -684,6 +766,7 @@ class ExtractMedia():
         self._filename = filename
         self._image = image
         self._image_shape = image.shape
+        self._image_offset = (0, 0)
         self._detected_faces = detected_faces
 
     @property
@@ -698,14 +781,20 @@ class ExtractMedia():
 
     @property
     def image_shape(self):
-        """ tuple: The shape of the stored :attr:`image`. """
+        """ tuple: The shape of the original frame. """
         return self._image_shape
 
     @property
     def image_size(self):
-        """ tuple: The (`height`, `width`) of the stored :attr:`image`. """
+        """ tuple: The (`height`, `width`) of the original frame. """
         return self._image_shape[:2]
 
+    @property
+    def image_offset(self):
+        """ tuple: The (`left`, `top`) location of :attr:`image` within the original frame. This
+        is (`0`, `0`) unless the image has been cropped with :func:`crop_to_faces`. """
+        return self._image_offset
+
     @property
     def detected_faces(self):
         """list: A list of :class:`~lib.align.DetectedFace` objects in the
@@ -764,6 +853,42 @@ class ExtractMedia():
         logger.trace("Reapplying image: (filename: `%s`, image shape: %s)",
                      self._filename, image.shape)
         self._image = image
+        self._image_offset = (0, 0)
+
+    def crop_to_faces(self, margin):
+        """ Replace :attr:`image` with the area of the frame that contains all of the detected
+        faces, and update :attr:`image_offset` with the location of the area within the frame.
+
+        Parameters
+        ----------
+        margin: float
+            The amount to pad each detected face by on each side, as a fraction of the face's
+            largest dimension
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The full frame that was held prior to cropping
+        """
+        frame = self._image
+        height, width = frame.shape[:2]
+        left = top = right = bottom = 0
+        if self._detected_faces:
+            pads = [int(round(max(face.w, face.h) * margin)) for face in self._detected_faces]
+            left = max(0, min(face.left - pad for face, pad in zip(self._detected_faces, pads)))
+            top = max(0, min(face.top - pad for face, pad in zip(self._detected_faces, pads)))
+            right = min(width,
+                        max(face.right + pad for face, pad in zip(self._detected_faces, pads)))
+            bottom = min(height,
+                         max(face.bottom + pad for face, pad in zip(self._detected_faces, pads)))
+        right, bottom = max(left, right), max(top, bottom)
+        # Copy so that the crop does not hold a reference to the full frame
+        self._image = frame[top:bottom, left:right].copy()
+        self._image_offset = (left, top)
+        logger.trace("Cropped image to faces: (filename: '%s', frame shape: %s, offset: %s, "
+                     "crop shape: %s)", self._filename, frame.shape, self._image_offset,
+                     self._image.shape)
+        return frame
 
     def _image_as_bgr(self):
         """ Get a copy of the source frame in BGR format.
@@ -791,3 +916,50 @@ class ExtractMedia():
         :class:`numpy.ndarray`:
             A copy of :attr:`image` in gray-scale color format """
         return cv2.cvtColor(self._image.copy(), cv2.COLOR_BGR2GRAY)
+
+
+class FrameStore():
+    """ Holds the full frames for :class:`ExtractMedia` objects whilst only the area of each frame
+    that contains the detected faces is passed through the aligner and maskers.
+
+    The detector parks each frame once its faces have been found, and the frame is placed back
+    into the :class:`ExtractMedia` object when it exits the pipeline.
+    """
+    _margin = 1.0
+
+    def __init__(self):
+        logger.debug("Initializing %s", self.__class__.__name__)
+        self._frames = dict()
+        self._lock = Lock()
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    def park(self, extract_media):
+        """ Crop the image of an :class:`ExtractMedia` object to its detected faces and hold the
+        full frame.
+
+        The crop is padded by the size of each face on each side, which covers the areas that
+        are read by the aligners and maskers as well as the aligned faces that are output.
+
+        Parameters
+        ----------
+        extract_media: :class:`ExtractMedia`
+            The object, with its detected faces populated, to crop the image for
+        """
+        frame = extract_media.crop_to_faces(self._margin)
+        with self._lock:
+            self._frames[extract_media.filename] = frame
+
+    def restore(self, extract_media):
+        """ Place the full frame back into an :class:`ExtractMedia` object and release it from the
+        store.
+
+        Parameters
+        ----------
+        extract_media: :class:`ExtractMedia`
+            The object to restore the full frame for. Objects that were not parked are left
+            unchanged
+        """
+        with self._lock:
+            frame = self._frames.pop(extract_media.filename, None)
+        if frame is not None:
+            extract_media.set_image(frame)
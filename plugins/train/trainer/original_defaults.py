@@ -54,6 +54,41 @@ _DEFAULTS = dict(
         rounding=2,
         min_max=(2, 16),
         group="evaluation"),
+    face_store=dict(
+        default=False,
+        info="Decode each side's training images once into an uncompressed store that is saved "
+             "alongside the faces, and load training batches directly from this store rather "
+             "than reading and decoding every image from disk on each iteration. This can "
+             "significantly speed up feeding the model, particularly at higher batch sizes, at "
+             "the cost of disk space (roughly width x height x 3 bytes per face). The store is "
+             "rebuilt automatically if the contents of the faces folder change.\nNB: The faces "
+             "folder must be writable for the store to be created.",
+        datatype=bool,
+        fixed=False,
+        group="data loading"),
+    loader_processes=dict(
+        default=0,
+        info="The number of worker processes to use for loading and augmenting training images "
+             "for each side. Set to 0 to load data in background threads within the training "
+             "process. Using processes means that image decoding and augmentation do not compete "
+             "with the training loop for Python's interpreter lock, which can stop the GPU from "
+             "waiting on data, at the cost of additional RAM for each process.\nNB: Requires "
+             "Python 3.8 or later. Threads will be used for older versions.",
+        datatype=int,
+        rounding=1,
+        min_max=(0, 16),
+        fixed=False,
+        group="data loading"),
+    loader_prefetch=dict(
+        default=4,
+        info="The number of augmented batches to hold ready for each side when loading data "
+             "with worker processes. Higher values smooth out variations in loading speed at the "
+             "cost of additional RAM. This option has no effect if 'loader_processes' is 0.",
+        datatype=int,
+        rounding=1,
+        min_max=(1, 32),
+        fixed=False,
+        group="data loading"),
     zoom_amount=dict(
         default=5,
         info="Percentage amount to randomly zoom each training image in and out.",
@@ -6,7 +6,7 @@ import re
 import os
 import sys
 from threading import Event
-from time import sleep
+from time import perf_counter, sleep
 
 import cv2
 import numpy as np
@@ -14,12 +14,13 @@ from tqdm import tqdm
 
 from scripts.fsmedia import Alignments, PostProcess, finalize
 from lib.serializer import get_serializer
-from lib.convert import Converter
-from lib.align import AlignedFace, DetectedFace, update_legacy_png_header
+from lib.convert import Converter, PatchPool
+from lib.align import DetectedFace, align_faces, get_alignment_matrices, update_legacy_png_header
 from lib.gpu_stats import GPUStats
 from lib.image import read_image_meta_batch, ImagesLoader
 from lib.multithreading import MultiThread, total_cpus
-from lib.queue_manager import queue_manager
+from lib.pipeline_stats import PipelineStats
+from lib.queue_manager import queue_manager, QueueEmpty
 from lib.utils import FaceswapError, get_backend, get_folder, get_image_paths
 from plugins.extract.pipeline import Extractor, ExtractMedia
 from plugins.plugin_loader import PluginLoader
@@ -61,19 +62,26 @@ class Convert():  # pylint:disable=too-few-public-methods
         self._opts = OptionalActions(self._args, self._images.file_list, self._alignments)
 
         self._add_queues()
+        self._stats = PipelineStats([("load", None, "convert_in"),
+                                     ("predict", "convert_in", "patch"),
+                                     ("patch", "patch", "convert_out"),
+                                     ("save", "convert_out", None)],
+                                    stats_file=getattr(self._args, "stats_file", None))
+        self._stats.start()
         self._disk_io = DiskIO(self._alignments, self._images, arguments)
         self._predictor = Predict(self._disk_io.load_queue, self._queue_size, arguments)
         self._validate()
         get_folder(self._args.output_dir)
 
         configfile = self._args.configfile if hasattr(self._args, "configfile") else None
-        self._converter = Converter(self._predictor.output_size,
-                                    self._predictor.coverage_ratio,
-                                    self._predictor.centering,
-                                    self._disk_io.draw_transparent,
-                                    self._disk_io.pre_encode,
-                                    arguments,
-                                    configfile=configfile)
+        self._converter_kwargs = dict(output_size=self._predictor.output_size,
+                                      coverage_ratio=self._predictor.coverage_ratio,
+                                      centering=self._predictor.centering,
+                                      draw_transparent=self._disk_io.draw_transparent,
+                                      pre_encode=self._disk_io.pre_encode,
+                                      arguments=arguments,
+                                      configfile=configfile)
+        self._converter = Converter(**self._converter_kwargs)
 
         logger.debug("Initialized %s", self.__class__.__name__)
 
@@ -101,6 +109,19 @@ class Convert():  # pylint:disable=too-few-public-methods
         logger.debug(retval)
         return retval
 
+    @property
+    def _use_processes(self):
+        """ bool: ``True`` if patching should be run in a pool of processes rather than in
+        threads. """
+        retval = self._args.patch_backend == "processes" and not self._args.singleprocess
+        if retval and not PatchPool.is_supported():
+            logger.warning("The 'processes' patch backend requires Python 3.8 or later. Falling "
+                           "back to 'threads'.")
+            self._args.patch_backend = "threads"
+            retval = False
+        logger.debug(retval)
+        return retval
+
     def _validate(self):
         """ Validate the Command Line Options.
 
@@ -158,7 +179,7 @@ class Convert():  # pylint:disable=too-few-public-methods
         """ Add the queues for in, patch and out. """
         logger.debug("Adding queues. Queue size: %s", self._queue_size)
         for qname in ("convert_in", "convert_out", "patch"):
-            queue_manager.add_queue(qname, self._queue_size)
+            queue_manager.add_queue(qname, self._queue_size, monitored=True)
 
     def process(self):
         """ The entry point for triggering the Conversion Process.
@@ -168,8 +189,12 @@ class Convert():  # pylint:disable=too-few-public-methods
         logger.debug("Starting Conversion")
         # queue_manager.debug_monitor(5)
         try:
-            self._convert_images()
-            self._disk_io.save_thread.join()
+            try:
+                self._convert_images()
+                self._disk_io.save_thread.join()
+            finally:
+                # Stop before the queues are terminated, so flushing them is not recorded
+                self._stats.stop()
             queue_manager.terminate_queues()
 
             finalize(self._images.count,
@@ -190,8 +215,15 @@ class Convert():  # pylint:disable=too-few-public-methods
         logger.debug("Converting images")
         save_queue = queue_manager.get_queue("convert_out")
         patch_queue = queue_manager.get_queue("patch")
-        self._patch_threads = MultiThread(self._converter.process, patch_queue, save_queue,
-                                          thread_count=self._pool_processes, name="patch")
+        if self._use_processes:
+            self._patch_threads = PatchPool(self._converter,
+                                            self._converter_kwargs,
+                                            patch_queue,
+                                            save_queue,
+                                            self._pool_processes)
+        else:
+            self._patch_threads = MultiThread(self._converter.process, patch_queue, save_queue,
+                                              thread_count=self._pool_processes, name="patch")
 
         self._patch_threads.start()
         while True:
@@ -673,6 +705,8 @@ class Predict():
         self._sizes = self._get_io_sizes()
         self._coverage_ratio = self._model.coverage_ratio
         self._centering = self._model.config["centering"]
+        self._feed_buffer = np.empty((0, self._sizes["input"], self._sizes["input"], 3),
+                                     dtype="float32")
 
         self._thread = self._launch_predictor()
         logger.debug("Initialized %s: (out_queue: %s)", self.__class__.__name__, self._out_queue)
@@ -839,6 +873,9 @@ class Predict():
         Reads from the :attr:`self._in_queue`, prepares images for prediction
         then puts the predictions back to the :attr:`self.out_queue`
         """
+        if self._args.adaptive_batching:
+            self._predict_faces_adaptive()
+            return
         faces_seen = 0
         consecutive_no_faces = 0
         batch = list()
@@ -846,22 +883,13 @@ class Predict():
         while True:
             item = self._in_queue.get()
             if item != "EOF":
-                logger.trace("Got from queue: '%s'", item["filename"])
-                faces_count = len(item["detected_faces"])
+                faces_count = self._count_faces(item)
 
                 # Safety measure. If a large stream of frames appear that do not have faces,
                 # these will stack up into RAM. Keep a count of consecutive frames with no faces.
                 # If self._batchsize number of frames appear, force the current batch through
                 # to clear RAM.
                 consecutive_no_faces = consecutive_no_faces + 1 if faces_count == 0 else 0
-                self._faces_count += faces_count
-                if faces_count > 1:
-                    self._verify_output = True
-                    logger.verbose("Found more than one face in an image! '%s'",
-                                   os.path.basename(item["filename"]))
-
-                self.load_aligned(item)
-
                 faces_seen += faces_count
                 batch.append(item)
 
@@ -874,10 +902,8 @@ class Predict():
             if batch:
                 logger.trace("Batching to predictor. Frames: %s, Faces: %s",
                              len(batch), faces_seen)
-                feed_batch = [feed_face for item in batch
-                              for feed_face in item["feed_faces"]]
+                feed_faces = self.load_aligned(batch)
                 if faces_seen != 0:
-                    feed_faces = self._compile_feed_faces(feed_batch)
                     batch_size = None
                     if is_amd and feed_faces.shape[0] != self._batchsize:
                         logger.verbose("Fallback to BS=1")
@@ -898,62 +924,145 @@ class Predict():
         self._out_queue.put("EOF")
         logger.debug("Load queue complete")
 
-    def load_aligned(self, item):
-        """ Load the model's feed faces and the reference output faces.
+    def _predict_faces_adaptive(self):
+        """ Run Prediction on the Faceswap model with a batch size that is tuned at run time.
+
+        Frames that contain faces are collected until the :class:`_BatchTuner` target number of
+        faces is reached, or until the maximum wait time has passed since the first frame of the
+        batch was received, whichever comes first. Frames that do not contain any faces are put
+        straight to the :attr:`self.out_queue` without waiting behind a partially filled batch.
+        """
+        tuner = _BatchTuner(self._batchsize, self._args.batch_wait)
+        queue_size = self._in_queue.maxsize or self._batchsize
+        faces_seen = 0
+        batch = list()
+        deadline = None
+        is_amd = get_backend() == "amd"
+        while True:
+            timeout = None if deadline is None else max(0., deadline - perf_counter())
+            try:
+                item = self._in_queue.get(timeout=timeout)
+            except QueueEmpty:
+                item = None
+            if item is not None and item != "EOF":
+                faces_count = self._count_faces(item)
+                if faces_count == 0:
+                    logger.trace("Passing through frame with no faces: '%s'", item["filename"])
+                    self.load_aligned([item])
+                    self._queue_out_frames([item], list())
+                    continue
+                if not batch:
+                    deadline = perf_counter() + tuner.max_wait
+                faces_seen += faces_count
+                batch.append(item)
+                if faces_seen < tuner.target:
+                    continue
+
+            if batch:
+                logger.trace("Batching to predictor. Frames: %s, Faces: %s, Target: %s, "
+                             "Timed out: %s", len(batch), faces_seen, tuner.target, item is None)
+                start = perf_counter()
+                feed_faces = self.load_aligned(batch)
+                batch_size = None
+                if is_amd and feed_faces.shape[0] != self._batchsize:
+                    logger.verbose("Fallback to BS=1")
+                    batch_size = 1
+                predicted = self._predict(feed_faces, batch_size)
+                tuner.update(faces_seen,
+                             perf_counter() - start,
+                             self._in_queue.qsize() / queue_size,
+                             item is None)
+                self._queue_out_frames(batch, predicted)
+
+            faces_seen = 0
+            batch = list()
+            deadline = None
+            if item == "EOF":
+                logger.debug("EOF Received")
+                break
+        logger.debug("Putting EOF")
+        self._out_queue.put("EOF")
+        logger.debug("Load queue complete")
 
-        For each detected face in the incoming item, load the feed face and reference face
-        images, correctly sized for input and output respectively.
+    def _count_faces(self, item):
+        """ Count the faces in an incoming frame and flag if the output should be verified.
 
         Parameters
         ----------
         item: dict
-            The incoming image, list of :class:`~lib.align.DetectedFace` objects and list of
-            :class:`~lib.align.AlignedFace` objects for the feed face(s) and list of
-            :class:`~lib.align.AlignedFace` objects for the reference face(s)
+            The incoming item containing the image and list of :class:`~lib.align.DetectedFace`
+            objects for the frame
 
+        Returns
+        -------
+        int
+            The number of faces in the frame
         """
-        logger.trace("Loading aligned faces: '%s'", item["filename"])
-        feed_faces = []
-        reference_faces = []
-        for detected_face in item["detected_faces"]:
-            feed_face = AlignedFace(detected_face.landmarks_xy,
-                                    image=item["image"],
-                                    centering=self._centering,
-                                    size=self._sizes["input"],
-                                    coverage_ratio=self._coverage_ratio,
-                                    dtype="float32")
-            if self._sizes["input"] == self._sizes["output"]:
-                reference_faces.append(feed_face)
-            else:
-                reference_faces.append(AlignedFace(detected_face.landmarks_xy,
-                                                   image=item["image"],
-                                                   centering=self._centering,
-                                                   size=self._sizes["output"],
-                                                   coverage_ratio=self._coverage_ratio,
-                                                   dtype="float32"))
-            feed_faces.append(feed_face)
-        item["feed_faces"] = feed_faces
-        item["reference_faces"] = reference_faces
-        logger.trace("Loaded aligned faces: '%s'", item["filename"])
-
-    @staticmethod
-    def _compile_feed_faces(feed_faces):
-        """ Compile a batch of faces for feeding into the Predictor.
+        logger.trace("Got from queue: '%s'", item["filename"])
+        faces_count = len(item["detected_faces"])
+        self._faces_count += faces_count
+        if faces_count > 1:
+            self._verify_output = True
+            logger.verbose("Found more than one face in an image! '%s'",
+                           os.path.basename(item["filename"]))
+        return faces_count
+
+    def load_aligned(self, batch):
+        """ Load the model's feed faces and the reference output faces for a batch of frames.
+
+        The alignment matrices for every face in the batch are calculated in a single pass, and
+        the feed faces are placed directly into a re-usable `float32` feed array. The reference
+        faces are added to each item in the batch, re-using the feed faces if the model's input
+        and output sizes are the same.
 
         Parameters
         ----------
-        feed_faces: list
-            List of :class:`~lib.align.AlignedFace` objects sized for feeding into the model
+        batch: list
+            The incoming items containing the image and list of :class:`~lib.align.DetectedFace`
+            objects for each frame. The list of :class:`~lib.align.AlignedFace` objects for the
+            reference face(s) is added to each item
 
         Returns
         -------
         :class:`numpy.ndarray`
-            A batch of faces ready for feeding into the Faceswap model.
+            The batch of feed faces, scaled 0.0 - 1.0, ready for feeding into the Faceswap model.
+            The array is re-used for subsequent batches.
         """
-        logger.trace("Compiling feed face. Batchsize: %s", len(feed_faces))
-        retval = np.stack([feed_face.face[..., :3] for feed_face in feed_faces]) / 255.0
-        logger.trace("Compiled Feed faces. Shape: %s", retval.shape)
-        return retval
+        faces = [(item["image"], detected_face)
+                 for item in batch for detected_face in item["detected_faces"]]
+        logger.trace("Loading aligned faces: (frames: %s, faces: %s)", len(batch), len(faces))
+        if not faces:
+            for item in batch:
+                item["reference_faces"] = []
+            return self._feed_buffer[:0]
+
+        if self._feed_buffer.shape[0] < len(faces):
+            self._feed_buffer = np.empty((len(faces), ) + self._feed_buffer.shape[1:],
+                                         dtype="float32")
+        feed = self._feed_buffer[:len(faces)]
+
+        images = [image for image, _ in faces]
+        landmarks = np.array([face.landmarks_xy for _, face in faces])
+        matrices = get_alignment_matrices(landmarks)
+        kwargs = dict(centering=self._centering,
+                      coverage_ratio=self._coverage_ratio,
+                      dtype="float32",
+                      matrices=matrices)
+        reference_faces = align_faces(landmarks,
+                                      images,
+                                      size=self._sizes["input"],
+                                      feed=feed,
+                                      **kwargs)
+        if self._sizes["input"] != self._sizes["output"]:
+            reference_faces = align_faces(landmarks, images, size=self._sizes["output"], **kwargs)
+
+        pointer = 0
+        for item in batch:
+            num_faces = len(item["detected_faces"])
+            item["reference_faces"] = reference_faces[pointer:pointer + num_faces]
+            pointer += num_faces
+        logger.trace("Loaded aligned faces. Feed shape: %s", feed.shape)
+        return feed
 
     def _predict(self, feed_faces, batch_size=None):
         """ Run the Faceswap models' prediction function.
@@ -1026,6 +1135,103 @@ class Predict():
         logger.trace("Queued out batch. Batchsize: %s", len(batch))
 
 
+class _BatchTuner():
+    """ Tunes the number of faces to feed the Faceswap model in each batch whilst converting.
+
+    The target starts at the maximum batch size. If a batch's wait time expires before the
+    target is reached, then faces are arriving more slowly than they can be predicted, so the
+    target drops to the number of faces that did arrive. If the predictor's input queue is
+    backing up, then prediction is the bottleneck, so the target is doubled for as long as the
+    larger batches continue to reduce the measured prediction time per face. If a batch takes
+    longer to predict than the maximum wait time whilst the input queue is not backing up, then
+    the target is halved to keep the latency of each frame down.
+
+    Parameters
+    ----------
+    max_batchsize: int
+        The maximum number of faces to feed the model in a single batch
+    max_wait: float
+        The maximum number of seconds to wait for a batch to fill
+    """
+    _pressure_threshold = 0.5
+    _min_improvement = 0.95
+    _smoothing = 0.8
+
+    def __init__(self, max_batchsize, max_wait):
+        logger.debug("Initializing %s: (max_batchsize: %s, max_wait: %s)",
+                     self.__class__.__name__, max_batchsize, max_wait)
+        self._max_batchsize = max(1, max_batchsize)
+        self._max_wait = max_wait
+        self._target = self._max_batchsize
+        self._per_face = dict()
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    @property
+    def target(self):
+        """ int: The number of faces to collect before feeding a batch to the model. """
+        return self._target
+
+    @property
+    def max_wait(self):
+        """ float: The maximum number of seconds to wait for a batch to fill. """
+        return self._max_wait
+
+    def update(self, faces, latency, pressure, timed_out):
+        """ Update the target batch size from the results of a prediction.
+
+        Parameters
+        ----------
+        faces: int
+            The number of faces that were fed to the model
+        latency: float
+            The number of seconds taken to prepare and predict the batch
+        pressure: float
+            The fill level of the predictor's input queue, from 0.0 to 1.0, after the prediction
+        timed_out: bool
+            ``True`` if the batch was fed because the maximum wait time expired before the target
+            was reached
+        """
+        per_face = latency / faces
+        previous = self._per_face.get(faces)
+        self._per_face[faces] = per_face if previous is None else (
+            self._smoothing * previous + (1 - self._smoothing) * per_face)
+
+        target = self._target
+        if pressure >= self._pressure_threshold:
+            if target < self._max_batchsize and self._is_scaling(faces):
+                target = min(self._max_batchsize, target * 2)
+        elif timed_out:
+            target = max(1, faces)
+        elif latency > self._max_wait:
+            target = max(1, target // 2)
+
+        if target != self._target:
+            logger.debug("Updating predictor batch size from %s to %s (faces: %s, latency: %.3fs, "
+                         "pressure: %.2f, timed_out: %s)",
+                         self._target, target, faces, latency, pressure, timed_out)
+            self._target = target
+
+    def _is_scaling(self, faces):
+        """ Check whether larger batches are reducing the prediction time per face.
+
+        Parameters
+        ----------
+        faces: int
+            The number of faces in the batch that has just been predicted
+
+        Returns
+        -------
+        bool
+            ``True`` if the time per face at this batch size is measurably lower than the time per
+            face at the next smallest batch size that has been measured, or if no smaller batch
+            size has been measured
+        """
+        smaller = [size for size in self._per_face if size < faces]
+        if not smaller:
+            return True
+        return self._per_face[faces] < self._per_face[max(smaller)] * self._min_improvement
+
+
 class OptionalActions():  # pylint:disable=too-few-public-methods
     """ Process specific optional actions for Convert.
 
@@ -3,13 +3,18 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+import shutil
 import sys
-from typing import TYPE_CHECKING, Optional
+import tempfile
+from typing import TYPE_CHECKING, Optional, Union
 
+import numpy as np
 from tqdm import tqdm
 
+from lib.align import align_faces
 from lib.image import encode_image, generate_thumbnail, ImagesLoader, ImagesSaver
 from lib.multithreading import MultiThread
 from lib.utils import get_folder
@@ -51,6 +56,9 @@ class Extract():  # pylint:disable=too-few-public-methods
         logger.info("Output Directory: %s", self._args.output_dir)
         self._images = ImagesLoader(self._args.input_dir, fast_count=True)
         self._alignments = Alignments(self._args, True, self._images.is_video)
+        self._images.add_video_meta_data(self._alignments.video_meta_data)
+        self._journal = _ExtractJournal(self._alignments.file,
+                                        getattr(self._args, "resume", False))
 
         self._existing_count = 0
         self._set_skip_list()
@@ -70,9 +78,11 @@ class Extract():  # pylint:disable=too-few-public-methods
                                     rotate_images=self._args.rotate_images,
                                     min_size=self._args.min_size,
                                     normalize_method=normalization,
-                                    re_feed=self._args.re_feed)
+                                    re_feed=self._args.re_feed,
+                                    crop_handoff=self._args.crop_handoff)
         self._threads = []
         self._verify_output = False
+        self._frame_cache = None
         logger.debug("Initialized %s", self.__class__.__name__)
 
     @property
@@ -91,27 +101,40 @@ class Extract():  # pylint:disable=too-few-public-methods
     def _set_skip_list(self) -> None:
         """ Add the skip list to the image loader
 
-        Checks against `extract_every_n` and the existence of alignments data (can exist if
-        `skip_existing` or `skip_existing_faces` has been provided) and compiles a list of frame
+        Checks against `extract_every_n`, the existence of alignments data (if `skip_existing`
+        or `skip_existing_faces` has been provided) and the frames that have been completed by an
+        interrupted extraction (if `resume` has been provided) and compiles a list of frame
         indices that should not be processed, providing these to :class:`lib.image.ImagesLoader`.
         """
-        if self._skip_num == 1 and not self._alignments.data:
+        skip_existing = (getattr(self._args, "skip_existing", False) or
+                         getattr(self._args, "skip_faces", False)) and bool(self._alignments.data)
+        completed = self._journal.get_completed(self._alignments.data)
+        if self._skip_num == 1 and not skip_existing and not completed:
             logger.debug("No frames to be skipped")
             return
         skip_list = []
+        resumed_count = 0
         for idx, filename in enumerate(self._images.file_list):
             if idx % self._skip_num != 0:
                 logger.trace("Adding image '%s' to skip list due to extract_every_n = %s",
                              filename, self._skip_num)
                 skip_list.append(idx)
+            elif os.path.basename(filename) in completed:
+                resumed_count += 1
+                logger.trace("Removing image: '%s' due to previously completed", filename)
+                skip_list.append(idx)
             # Items may be in the alignments file if skip-existing[-faces] is selected
-            elif os.path.basename(filename) in self._alignments.data:
+            elif skip_existing and os.path.basename(filename) in self._alignments.data:
                 self._existing_count += 1
                 logger.trace("Removing image: '%s' due to previously existing", filename)
                 skip_list.append(idx)
         if self._existing_count != 0:
             logger.info("Skipping %s frames due to skip_existing/skip_existing_faces.",
                         self._existing_count)
+        if resumed_count != 0:
+            logger.info("Resuming extraction. Skipping %s frames that have already been "
+                        "completed.", resumed_count)
+            self._existing_count += resumed_count
         logger.debug("Adding skip list: %s", skip_list)
         self._images.add_skip_list(skip_list)
 
@@ -127,6 +150,7 @@ class Extract():  # pylint:disable=too-few-public-methods
         for thread in self._threads:
             thread.join()
         self._alignments.save()
+        self._journal.close()
         finalize(self._images.process_count + self._existing_count,
                  self._alignments.faces_count,
                  self._verify_output)
@@ -179,6 +203,9 @@ class Extract():  # pylint:disable=too-few-public-methods
         """
         logger.debug("Reload Images: Start. Detected Faces Count: %s", len(detected_faces))
         load_queue = self._extractor.input_queue
+        if self._frame_cache is not None:
+            self._reload_from_cache(detected_faces)
+            return
         for filename, image in self._images.load():
             if load_queue.shutdown.is_set():
                 logger.debug("Reload Queue: Stop signal received. Terminating")
@@ -193,6 +220,28 @@ class Extract():  # pylint:disable=too-few-public-methods
         load_queue.put("EOF")
         logger.debug("Reload Images: Complete")
 
+    def _reload_from_cache(self, detected_faces: dict[str, ExtractMedia]) -> None:
+        """ Pair the detected faces with their frames from the :class:`_FrameCache` and pass them
+        back into the extraction queue, rather than decoding the source again.
+
+        Parameters
+        ----------
+        detected_faces: dict
+            Dictionary of :class:`plugins.extract.pipeline.ExtractMedia` with the filename as the
+            key for repopulating the image attribute.
+        """
+        load_queue = self._extractor.input_queue
+        for filename in list(detected_faces):
+            if load_queue.shutdown.is_set():
+                logger.debug("Reload Queue: Stop signal received. Terminating")
+                break
+            logger.trace("Reloading image from cache: '%s'", filename)
+            extract_media = detected_faces.pop(filename)
+            extract_media.set_image(self._frame_cache.get(filename))
+            load_queue.put(extract_media)
+        load_queue.put("EOF")
+        logger.debug("Reload Images from cache: Complete")
+
     def _run_extraction(self) -> None:
         """ The main Faceswap Extraction process
 
@@ -204,6 +253,8 @@ class Extract():  # pylint:disable=too-few-public-methods
         saver = None if self._args.skip_saving_faces else ImagesSaver(self._output_dir,
                                                                       as_bytes=True)
         exception = False
+        if self._extractor.passes > 1 and getattr(self._args, "frame_cache", 0) > 0:
+            self._frame_cache = _FrameCache(self._args.frame_cache)
 
         for phase in range(self._extractor.passes):
             if exception:
@@ -222,9 +273,14 @@ class Extract():  # pylint:disable=too-few-public-methods
                 if is_final:
                     self._output_processing(extract_media, size)
                     self._output_faces(saver, extract_media)
+                    self._journal.add(os.path.basename(extract_media.filename),
+                                      len(extract_media.detected_faces))
                     if self._save_interval and (idx + 1) % self._save_interval == 0:
-                        self._alignments.save()
+                        self._alignments.save(incremental=True)
+                        self._journal.commit()
                 else:
+                    if self._frame_cache is not None and phase == 0:
+                        self._frame_cache.add(extract_media)
                     extract_media.remove_image()
                     # cache extract_media for next run
                     detected_faces[extract_media.filename] = extract_media
@@ -234,6 +290,8 @@ class Extract():  # pylint:disable=too-few-public-methods
                 self._threaded_redirector("reload", detected_faces)
         if not self._args.skip_saving_faces:
             saver.close()
+        if self._frame_cache is not None:
+            self._frame_cache.close()
 
     def _check_thread_error(self) -> None:
         """ Check if any errors have occurred in the running threads and their errors """
@@ -253,10 +311,15 @@ class Extract():  # pylint:disable=too-few-public-methods
         size: int
             The size that the aligned face should be created at
         """
+        unaligned = [face for face in extract_media.detected_faces if face.aligned is None]
+        if unaligned:
+            aligned = align_faces(np.array([face.landmarks_xy for face in unaligned]),
+                                  [extract_media.image for _ in unaligned],
+                                  centering="head",
+                                  size=size)
+            for face, aligned_face in zip(unaligned, aligned):
+                face.aligned = aligned_face
         for face in extract_media.detected_faces:
-            face.load_aligned(extract_media.image,
-                              size=size,
-                              centering="head")
             face.thumbnail = generate_thumbnail(face.aligned.face, size=96, quality=60)
         self._post_process.do_actions(extract_media)
         extract_media.remove_image()
@@ -304,3 +367,238 @@ class Extract():  # pylint:disable=too-few-public-methods
             final_faces.append(face.to_alignment())
         self._alignments.data[os.path.basename(extract_media.filename)] = dict(faces=final_faces)
         del extract_media
+
+
+class _FrameCache():
+    """ Holds the parts of each frame that are needed by later passes when the extraction pipeline
+    runs serially, so that the source does not need to be decoded again for each pass.
+
+    Only the area around each detected face is kept, padded on each side by :attr:`_margin` times
+    the size of the face, which covers every aligned face that is extracted from the frame. No
+    image data is kept for frames without any faces. When a frame is requested, the kept areas
+    are placed back into a blank frame of the original dimensions.
+
+    Areas are held in memory up to the given limit. Any areas beyond this are appended to a raw
+    file in a temporary folder, and are read back through a memory map.
+
+    Parameters
+    ----------
+    max_memory: int
+        The maximum number of megabytes of image data to hold in memory
+    """
+    _margin = 1.0
+
+    def __init__(self, max_memory: int) -> None:
+        logger.debug("Initializing %s: (max_memory: %s)", self.__class__.__name__, max_memory)
+        self._max_bytes = max_memory * 1024 * 1024
+        self._memory_bytes = 0
+        self._frames: dict[str, tuple[tuple[int, ...], np.dtype, list]] = {}
+        self._folder: Optional[str] = None
+        self._spill_file = None
+        self._spill_offset = 0
+        self._spill_map: Optional[np.memmap] = None
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    def add(self, extract_media: ExtractMedia) -> None:
+        """ Add the areas of a frame that contain faces to the cache.
+
+        Parameters
+        ----------
+        extract_media: :class:`plugins.extract.pipeline.ExtractMedia`
+            The output from the first extraction pass, containing the frame and the faces that
+            were detected in it
+        """
+        image = extract_media.image
+        height, width = image.shape[:2]
+        regions = []
+        for face in extract_media.detected_faces:
+            margin = int(round(max(face.w, face.h) * self._margin))
+            left, top = max(0, face.left - margin), max(0, face.top - margin)
+            right, bottom = min(width, face.right + margin), min(height, face.bottom + margin)
+            if right <= left or bottom <= top:
+                continue
+            regions.append((left, top, right, bottom,
+                            self._store(image[top:bottom, left:right])))
+        self._frames[extract_media.filename] = (image.shape, image.dtype, regions)
+        logger.trace("Cached frame: (filename: '%s', regions: %s, memory: %sMB)",
+                     extract_media.filename, [region[:4] for region in regions],
+                     self._memory_bytes // (1024 * 1024))
+
+    def _store(self, region: np.ndarray) -> Union[np.ndarray, tuple[int, tuple[int, ...]]]:
+        """ Store an area of a frame in memory, or on disk if the memory limit has been reached.
+
+        Parameters
+        ----------
+        region: :class:`numpy.ndarray`
+            The area of the frame to be stored
+
+        Returns
+        -------
+        :class:`numpy.ndarray` or tuple
+            A copy of the area if it is held in memory, otherwise the offset and shape of the area
+            within the spill file
+        """
+        if self._memory_bytes + region.nbytes <= self._max_bytes:
+            self._memory_bytes += region.nbytes
+            return region.copy()
+        if self._spill_file is None:
+            self._folder = tempfile.mkdtemp(prefix="faceswap_frames_")
+            logger.verbose("Frame cache memory limit reached. Writing frames to: '%s'",
+                           self._folder)
+            spill_path = os.path.join(self._folder, "frames.raw")
+            self._spill_file = open(spill_path, "wb")  # pylint:disable=consider-using-with
+        offset = self._spill_offset
+        self._spill_file.write(np.ascontiguousarray(region).tobytes())
+        self._spill_offset += region.nbytes
+        return offset, region.shape
+
+    def get(self, filename: str) -> np.ndarray:
+        """ Obtain a frame from the cache.
+
+        Parameters
+        ----------
+        filename: str
+            The filename of the frame to obtain
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The frame at its original dimensions. Only the areas around the detected faces
+            contain image data
+        """
+        shape, dtype, regions = self._frames[filename]
+        if self._spill_file is not None and self._spill_map is None:
+            self._spill_file.close()
+            self._spill_map = np.memmap(self._spill_file.name, dtype="uint8", mode="r")
+        image = np.zeros(shape, dtype=dtype)
+        for left, top, right, bottom, data in regions:
+            if isinstance(data, tuple):
+                offset, region_shape = data
+                size = int(np.prod(region_shape)) * image.itemsize
+                data = self._spill_map[offset:offset + size].view(dtype).reshape(region_shape)
+            image[top:bottom, left:right] = data
+        return image
+
+    def close(self) -> None:
+        """ Empty the cache and remove any temporary files. """
+        logger.debug("Closing %s", self.__class__.__name__)
+        self._frames = {}
+        self._spill_map = None
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        if self._folder is not None:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            self._folder = None
+
+
+class _ExtractJournal():
+    """ An append-only journal of the frames that have been completed by an extraction, along
+    with the number of faces that were found in each frame, used for resuming an extraction that
+    was interrupted.
+
+    Completed frames are held until the alignments file has been saved, and are then written to
+    the journal by :func:`commit`, so every frame in the journal has its results stored in the
+    alignments file. The journal is removed once the extraction completes.
+
+    Parameters
+    ----------
+    alignments_file: str
+        The full path to the alignments file that the extraction is writing to. The journal is
+        stored next to this file
+    resume: bool
+        ``True`` to load the frames recorded in an existing journal, ``False`` to remove any
+        existing journal and start a new one
+    """
+    def __init__(self, alignments_file: str, resume: bool) -> None:
+        logger.debug("Initializing %s: (alignments_file: '%s', resume: %s)",
+                     self.__class__.__name__, alignments_file, resume)
+        self._file = f"{os.path.splitext(alignments_file)[0]}_journal.jsonl"
+        self._completed = self._load() if resume else {}
+        self._pending: list[tuple[str, int]] = []
+        if not resume and os.path.exists(self._file):
+            logger.debug("Removing stale journal: '%s'", self._file)
+            os.remove(self._file)
+        logger.debug("Initialized %s", self.__class__.__name__)
+
+    def _load(self) -> dict[str, int]:
+        """ Load the frames that have been recorded in an existing journal.
+
+        A partially written final line (if the extraction was interrupted whilst writing to the
+        journal) is ignored.
+
+        Returns
+        -------
+        dict
+            The filename of each completed frame as key, with the number of faces found in the
+            frame as value
+        """
+        retval: dict[str, int] = {}
+        if not os.path.exists(self._file):
+            logger.warning("Resume selected, but no extraction journal found at '%s'. All frames "
+                           "will be extracted.", self._file)
+            return retval
+        with open(self._file, "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug("Skipping incomplete journal entry: '%s'", line.strip())
+                    continue
+                retval[entry["frame"]] = entry["faces"]
+        logger.debug("Loaded %s completed frames from journal '%s'", len(retval), self._file)
+        return retval
+
+    def get_completed(self, alignments: dict) -> set[str]:
+        """ Obtain the frames from the journal that do not need to be extracted again.
+
+        Parameters
+        ----------
+        alignments: dict
+            The alignments data that has been loaded from the existing alignments file
+
+        Returns
+        -------
+        set
+            The filenames of frames that are in the journal and that exist in the alignments data
+            with the journaled number of faces
+        """
+        retval = set(frame for frame, faces in self._completed.items()
+                     if frame in alignments and len(alignments[frame]["faces"]) == faces)
+        if len(retval) != len(self._completed):
+            logger.debug("%s journaled frames do not match the alignments file and will be "
+                         "extracted again", len(self._completed) - len(retval))
+        return retval
+
+    def add(self, filename: str, face_count: int) -> None:
+        """ Add a frame that has been output by the extraction.
+
+        The frame is not written to the journal until :func:`commit` is called.
+
+        Parameters
+        ----------
+        filename: str
+            The filename of the frame that has been completed
+        face_count: int
+            The number of faces that were found in the frame
+        """
+        self._pending.append((filename, face_count))
+
+    def commit(self) -> None:
+        """ Write the frames that have been added since the last commit to the journal. Should
+        be called each time that the alignments file has been saved. """
+        if not self._pending:
+            return
+        with open(self._file, "a", encoding="utf-8") as journal:
+            journal.writelines(json.dumps(dict(frame=filename, faces=faces)) + "\n"
+                               for filename, faces in self._pending)
+            journal.flush()
+            os.fsync(journal.fileno())
+        logger.debug("Committed %s frames to journal", len(self._pending))
+        self._pending = []
+
+    def close(self) -> None:
+        """ Remove the journal once the extraction has completed. """
+        if os.path.exists(self._file):
+            logger.debug("Removing journal: '%s'", self._file)
+            os.remove(self._file)
@@ -108,16 +108,16 @@ class Alignments(AlignmentsBase):
 
     def _load(self):
         """ Override the parent :func:`~lib.align.Alignments._load` to handle skip existing
-        frames and faces on extract.
+        frames and faces and resuming on extract.
 
-        If skip existing has been selected, existing alignments are loaded and returned to the
-        calling script.
+        If skip existing or resume has been selected, existing alignments are loaded and returned
+        to the calling script.
 
         Returns
         -------
         dict
-            Any alignments that have already been extracted if skip existing has been selected
-            otherwise an empty dictionary
+            Any alignments that have already been extracted if skip existing or resume has been
+            selected otherwise an empty dictionary
         """
         data = dict()
         if not self._is_extract:
@@ -128,8 +128,9 @@ class Alignments(AlignmentsBase):
 
         skip_existing = hasattr(self._args, 'skip_existing') and self._args.skip_existing
         skip_faces = hasattr(self._args, 'skip_faces') and self._args.skip_faces
+        resume = hasattr(self._args, 'resume') and self._args.resume
 
-        if not skip_existing and not skip_faces:
+        if not skip_existing and not skip_faces and not resume:
             logger.debug("No skipping selected. Returning empty dictionary")
             return data
 
@@ -137,6 +138,11 @@ class Alignments(AlignmentsBase):
             logger.warning("Skip Existing/Skip Faces selected, but no alignments file found!")
             return data
 
+        if not self.have_alignments_file:
+            logger.warning("Resume selected, but no alignments file found! All frames will be "
+                           "extracted.")
+            return data
+
         data = super()._load()
 
         if skip_faces:
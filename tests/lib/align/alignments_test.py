@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+""" Tests for the indexed alignments file format and its delta file. """
+
+import logging
+import os
+
+import numpy as np
+import pytest
+
+# Faceswap's logger must be registered before the modules under test create their loggers
+import lib.logger  # noqa:F401 pylint:disable=unused-import
+from lib.align.alignments import Alignments, IndexedData
+from lib.serializer import get_serializer
+
+_FILENAME = "alignments.fsa"
+
+
+def _face(rng):
+    """ Generate random face alignments. """
+    return dict(x=int(rng.integers(100)), y=2, w=3, h=4,
+                landmarks_xy=rng.random((68, 2)).astype("float32"),
+                mask=dict(components=dict(mask=rng.bytes(256),
+                                          affine_matrix=np.eye(2, 3),
+                                          interpolator=2,
+                                          stored_size=128,
+                                          stored_centering="face")),
+                identity={})
+
+
+def _normalize(obj):
+    """ Convert alignments to a structure that can be compared with ``==`` """
+    if isinstance(obj, dict):
+        return tuple((key, _normalize(val)) for key, val in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(_normalize(val) for val in obj)
+    if isinstance(obj, np.ndarray):
+        return (obj.dtype.str, obj.shape, obj.tobytes())
+    return obj
+
+
+def _snapshot(alignments):
+    """ Obtain the comparable contents of an alignments object in frame order """
+    return [(frame, _normalize(data)) for frame, data in alignments.data.items()]
+
+
+@pytest.fixture(name="legacy_folder")
+def fixture_legacy_folder(tmp_path):
+    """ A folder containing a legacy (single compressed pickle) alignments file """
+    rng = np.random.default_rng(0)
+    data = {f"frame_{idx:04d}.png": dict(faces=[_face(rng) for _ in range(idx % 3)],
+                                         video_meta=dict(pts_time=idx / 25,
+                                                         keyframe=idx % 10 == 0))
+            for idx in range(50)}
+    get_serializer("compressed").save(str(tmp_path / _FILENAME),
+                                      dict(__meta__=dict(version=2.2), __data__=data))
+    return str(tmp_path)
+
+
+def test_legacy_load_save(legacy_folder, caplog):
+    """ Legacy alignments load in full, are upgraded on save with a warning and reload from the
+    indexed file unchanged """
+    filename = os.path.join(legacy_folder, _FILENAME)
+    assert not IndexedData.is_indexed(filename)
+    alignments = Alignments(legacy_folder, _FILENAME)
+    expected = _snapshot(alignments)
+    assert len(expected) == 50
+
+    with caplog.at_level(logging.WARNING):
+        alignments.save()
+    assert "Upgrading alignments file" in caplog.text
+    assert IndexedData.is_indexed(filename)
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        alignments.save()
+    assert "Upgrading alignments file" not in caplog.text
+
+    reloaded = Alignments(legacy_folder, _FILENAME)
+    assert isinstance(reloaded.data, IndexedData)
+    assert _snapshot(reloaded) == expected
+    assert reloaded.video_meta_data == alignments.video_meta_data
+
+
+def test_delta_replay(legacy_folder):
+    """ Frames added, modified and deleted through incremental saves are replayed from the delta
+    file on load, and folded into the indexed file by a full save """
+    rng = np.random.default_rng(1)
+    filename = os.path.join(legacy_folder, _FILENAME)
+    alignments = Alignments(legacy_folder, _FILENAME)
+    alignments.save()
+
+    alignments = Alignments(legacy_folder, _FILENAME)
+    alignments.add_face("frame_0001.png", _face(rng))
+    alignments.data["new_frame.png"] = dict(faces=[_face(rng)])
+    del alignments.data["frame_0002.png"]
+    alignments.save(incremental=True)
+    alignments.data["frame_0004.png"]["faces"].clear()
+    alignments.data.mark_changed("frame_0004.png")
+    alignments.save(incremental=True)
+    assert os.path.exists(IndexedData.delta_file(filename))
+
+    expected = _snapshot(alignments)
+    reloaded = Alignments(legacy_folder, _FILENAME)
+    assert _snapshot(reloaded) == expected
+    assert "frame_0002.png" not in reloaded.data
+    assert not reloaded.data["frame_0004.png"]["faces"]
+
+    reloaded.save()
+    assert not os.path.exists(IndexedData.delta_file(filename))
+    assert _snapshot(Alignments(legacy_folder, _FILENAME)) == expected
+
+
+@pytest.mark.parametrize("damage", ["truncate", "corrupt"])
+def test_damaged_delta_record(legacy_folder, damage):
+    """ A torn or corrupt final delta record is ignored, and the records before it are kept """
+    rng = np.random.default_rng(2)
+    filename = os.path.join(legacy_folder, _FILENAME)
+    alignments = Alignments(legacy_folder, _FILENAME)
+    alignments.save()
+
+    alignments.add_face("frame_0010.png", _face(rng))
+    alignments.save(incremental=True)
+    expected = _snapshot(alignments)
+    alignments.add_face("frame_0020.png", _face(rng))
+    alignments.save(incremental=True)
+
+    delta_file = IndexedData.delta_file(filename)
+    with open(delta_file, "r+b") as delta:
+        if damage == "truncate":
+            delta.truncate(os.path.getsize(delta_file) - 5)
+        else:
+            delta.seek(-1, os.SEEK_END)
+            last = delta.read(1)
+            delta.seek(-1, os.SEEK_END)
+            delta.write(bytes([last[0] ^ 0xFF]))
+
+    reloaded = Alignments(legacy_folder, _FILENAME)
+    assert _snapshot(reloaded) == expected
+
+    # Appending after a damaged record must not lose the new record
+    reloaded.add_face("frame_0030.png", _face(rng))
+    reloaded.save(incremental=True)
+    assert _snapshot(Alignments(legacy_folder, _FILENAME)) == _snapshot(reloaded)
+
+
+def test_stale_delta_ignored(legacy_folder):
+    """ A delta file written against an earlier generation of the indexed file is ignored """
+    rng = np.random.default_rng(3)
+    filename = os.path.join(legacy_folder, _FILENAME)
+    alignments = Alignments(legacy_folder, _FILENAME)
+    alignments.save()
+    alignments.add_face("frame_0005.png", _face(rng))
+    alignments.save(incremental=True)
+    with open(IndexedData.delta_file(filename), "rb") as delta:
+        stale = delta.read()
+
+    alignments.save()
+    expected = _snapshot(alignments)
+    with open(IndexedData.delta_file(filename), "wb") as delta:
+        delta.write(stale)
+    assert _snapshot(Alignments(legacy_folder, _FILENAME)) == expected
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+""" Tests for Faceswap's image utilities. """
+
+import builtins
+import os
+import struct
+import zlib
+
+from hashlib import sha1
+
+import cv2
+import numpy as np
+import pytest
+
+# Faceswap's logger must be registered before the modules under test create their loggers
+import lib.logger  # noqa:F401 pylint:disable=unused-import
+from lib.align.detected_face import DetectedFace
+from lib.image import (_META_CHUNK, _META_VERSION, FaceIndex, pack_to_png_meta, png_read_meta,
+                       png_write_meta, read_image_meta, update_existing_metadata)
+from lib.utils import FaceswapError
+
+
+def _metadata(seed=0):
+    """ Generate the png header metadata for a random extracted face """
+    rng = np.random.default_rng(seed)
+    mask = zlib.compress((rng.random((128, 128)) * 255).astype("uint8").tobytes())
+    alignments = dict(x=10, w=120, y=20, h=130,
+                      landmarks_xy=(rng.random((68, 2)) * 256).astype("float32").tolist(),
+                      mask=dict(components=dict(mask=mask,
+                                                affine_matrix=rng.random((2, 3)).tolist(),
+                                                interpolator=2,
+                                                stored_size=128,
+                                                stored_centering="face")),
+                      identity={})
+    source = dict(alignments_version=2.3,
+                  original_filename=f"frame_{seed}_0.png",
+                  face_index=0,
+                  source_filename=f"frame_{seed}.png",
+                  source_is_video=False,
+                  source_frame_dims=(720, 1280))
+    return dict(alignments=alignments, source=source)
+
+
+def _legacy_png(image, metadata):
+    """ Encode an image to png with the metadata stored in Faceswap's legacy iTXt format """
+    data = b"faceswap\0\0\0\0\0" + str(metadata).encode("utf-8")
+    crc = struct.pack(">I", zlib.crc32(data, zlib.crc32(b"iTXt")) & 0xFFFFFFFF)
+    chunk = struct.pack(">I", len(data)) + b"iTXt" + data + crc
+    png = cv2.imencode(".png", image)[1].tobytes()
+    split = png.find(b"IDAT") - 4
+    return png[:split] + chunk + png[split:]
+
+
+def _image(seed=0):
+    """ Generate a random test image """
+    return (np.random.default_rng(seed).random((64, 64, 3)) * 255).astype("uint8")
+
+
+def _face_from_meta(metadata):
+    """ Obtain the png formatted alignments of a :class:`DetectedFace` loaded from metadata """
+    face = DetectedFace()
+    face.from_png_meta(metadata["alignments"])
+    return face.to_png_meta()
+
+
+def test_png_meta_round_trip():
+    """ Binary and legacy iTXt metadata load to the same :class:`DetectedFace` """
+    metadata = _metadata()
+    image = _image()
+    binary = png_write_meta(cv2.imencode(".png", image)[1].tobytes(), metadata)
+    legacy = _legacy_png(image, metadata)
+    assert _META_CHUNK in binary and b"iTXt" not in binary
+
+    binary_meta = png_read_meta(binary)
+    legacy_meta = png_read_meta(legacy)
+    assert binary_meta["source"] == legacy_meta["source"] == metadata["source"]
+    assert isinstance(binary_meta["alignments"]["landmarks_xy"], np.ndarray)
+    assert _face_from_meta(binary_meta) == _face_from_meta(legacy_meta)
+
+
+def test_png_meta_unknown_version():
+    """ Metadata written by a newer version of the binary format is rejected """
+    chunk = bytearray(pack_to_png_meta(_metadata()))
+    chunk[8] = _META_VERSION + 1
+    chunk[-4:] = struct.pack(">I", zlib.crc32(bytes(chunk[4:-4])) & 0xFFFFFFFF)
+    png = cv2.imencode(".png", _image())[1].tobytes()
+    split = png.find(b"IDAT") - 4
+    with pytest.raises(FaceswapError):
+        png_read_meta(png[:split] + bytes(chunk) + png[split:])
+
+
+def test_update_existing_metadata_legacy(tmp_path):
+    """ Updating the metadata of a legacy face replaces its iTXt chunk with the binary chunk """
+    filename = str(tmp_path / "face.png")
+    image = _image()
+    with open(filename, "wb") as png:
+        png.write(_legacy_png(image, _metadata(0)))
+
+    updated = _metadata(1)
+    update_existing_metadata(filename, updated)
+    with open(filename, "rb") as png:
+        contents = png.read()
+    assert _META_CHUNK in contents and b"iTXt" not in contents
+
+    metadata = read_image_meta(filename)
+    assert (metadata["width"], metadata["height"]) == (64, 64)
+    assert metadata["itxt"]["source"] == updated["source"]
+    assert _face_from_meta(metadata["itxt"]) == _face_from_meta(updated)
+    assert np.array_equal(cv2.imread(filename), image)
+
+
+@pytest.fixture(name="faces_folder")
+def fixture_faces_folder(tmp_path):
+    """ A folder of extracted faces """
+    for idx in range(4):
+        with open(tmp_path / f"face_{idx}.png", "wb") as png:
+            png.write(png_write_meta(cv2.imencode(".png", _image(idx))[1].tobytes(),
+                                     _metadata(idx)))
+    return str(tmp_path)
+
+
+def _face_files(folder):
+    """ The full paths to the faces within the given folder """
+    return sorted(os.path.join(folder, fname)
+                  for fname in os.listdir(folder) if fname.endswith(".png"))
+
+
+def _index_metadata(folder):
+    """ Read the metadata for a folder of faces through its :class:`FaceIndex` """
+    return dict(FaceIndex(folder).read(_face_files(folder)))
+
+
+def _normalized(metadata):
+    """ Convert the metadata returned from a :class:`FaceIndex` to a comparable format """
+    return {fname: (meta["width"], meta["height"], meta["hash"], meta["itxt"]["source"],
+                    _face_from_meta(meta["itxt"]))
+            for fname, meta in metadata.items()}
+
+
+def test_face_index_warm_read(faces_folder, monkeypatch):
+    """ Once a folder has been indexed, reading its metadata does not open any of the images """
+    expected = _index_metadata(faces_folder)
+    assert os.path.isfile(os.path.join(faces_folder, FaceIndex._file_name))
+    for fname, meta in expected.items():
+        with open(fname, "rb") as png:
+            assert meta["hash"] == sha1(png.read()).hexdigest()
+    assert _normalized(expected) == _normalized({fname: dict(read_image_meta(fname),
+                                                             hash=meta["hash"])
+                                                 for fname, meta in expected.items()})
+
+    index = FaceIndex(faces_folder)
+    opened = []
+    real_open = builtins.open
+
+    def logged_open(file, *args, **kwargs):
+        opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", logged_open)
+    result = dict(index.read(_face_files(faces_folder)))
+    assert not opened
+    assert _normalized(result) == _normalized(expected)
+
+
+def test_face_index_changed_file(faces_folder):
+    """ An image that has changed since it was indexed is read again """
+    original = _index_metadata(faces_folder)
+    changed = os.path.join(faces_folder, "face_1.png")
+    with open(changed, "wb") as png:
+        png.write(png_write_meta(cv2.imencode(".png", _image(10))[1].tobytes(), _metadata(10)))
+    stat = os.stat(changed)
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    result = _index_metadata(faces_folder)
+    assert result[changed]["hash"] != original[changed]["hash"]
+    assert result[changed]["itxt"]["source"] == _metadata(10)["source"]
+    unchanged = [fname for fname in result if fname != changed]
+    assert all(result[fname]["hash"] == original[fname]["hash"] for fname in unchanged)
+
+
+@pytest.mark.parametrize("damage", ["corrupt", "truncated", "version"])
+def test_face_index_rebuilt(faces_folder, damage):
+    """ A corrupt, truncated or unsupported index file is rebuilt rather than raising """
+    expected = _normalized(_index_metadata(faces_folder))
+    index_file = os.path.join(faces_folder, FaceIndex._file_name)
+    with open(index_file, "rb") as index:
+        contents = index.read()
+    with open(index_file, "wb") as index:
+        if damage == "corrupt":
+            index.write(os.urandom(len(contents)))
+        elif damage == "truncated":
+            index.write(contents[:len(contents) // 2])
+        else:
+            index.write(FaceIndex(faces_folder)._serializer.marshal(
+                dict(version=FaceIndex._version + 1, entries=dict(bad=None))))
+
+    assert _normalized(_index_metadata(faces_folder)) == expected
+    assert len(FaceIndex(faces_folder)._entries) == len(expected)
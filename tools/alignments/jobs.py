@@ -263,7 +263,8 @@ class Draw():  # pylint:disable=too-few-public-methods
     def __init__(self, alignments, arguments):
         logger.debug("Initializing %s: (arguments: %s)", self.__class__.__name__, arguments)
         self._alignments = alignments
-        self._frames = Frames(arguments.frames_dir)
+        self._frames = Frames(arguments.frames_dir,
+                              video_meta_data=self._alignments.video_meta_data)
         self._output_folder = self._set_output()
         self._mesh_areas = dict(mouth=(48, 68),
                                 right_eyebrow=(17, 22),
@@ -413,7 +414,9 @@ class Extract():  # pylint:disable=too-few-public-methods
         self._faces_dir = arguments.faces_dir
         self._min_size = self._get_min_size(arguments.size, arguments.min_size)
 
-        self._frames = Frames(arguments.frames_dir, self._get_count())
+        self._frames = Frames(arguments.frames_dir,
+                              self._get_count(),
+                              video_meta_data=self._alignments.video_meta_data)
         self._extracted_faces = ExtractedFaces(self._frames,
                                                self._alignments,
                                                size=arguments.size)
@@ -795,7 +798,7 @@ class FromFaces():  # pylint:disable=too-few-public-methods
         return retval
 
     def _extract_alignment(self, metadata: dict) -> Tuple[str, int, dict]:
-        """ Extract alignment data from a PNG image's itxt header.
+        """ Extract alignment data from a PNG image's header.
 
         Formats the landmarks into a numpy array and adds in mask centering information if it is
         from an older extract.
@@ -980,7 +983,7 @@ class RemoveFaces():  # pylint:disable=too-few-public-methods
         rename.process()
 
     def _update_png_headers(self) -> None:
-        """ Update the EXIF iTXt field of any face PNGs that have had their face index changed.
+        """ Update the PNG header metadata of any face PNGs that have had their face index changed.
 
         Notes
         -----
@@ -9,12 +9,9 @@ import sys
 import cv2
 from tqdm import tqdm
 
-# TODO imageio single frame seek seems slow. Look into this
-# import imageio
-
 from lib.align import Alignments, DetectedFace, update_legacy_png_header
-from lib.image import (count_frames, generate_thumbnail, ImagesLoader,
-                       png_write_meta, read_image, read_image_meta_batch)
+from lib.image import (count_frames, generate_thumbnail, ImagesLoader, png_write_meta,
+                       read_image, read_image_meta_batch, VideoFrameReader)
 from lib.utils import _image_extensions, _video_extensions, FaceswapError
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -75,11 +72,17 @@ class MediaLoader():
     count: int or ``None``, optional
         If the total frame count is known it can be passed in here which will skip
         analyzing a video file. If the count is not passed in, it will be calculated.
+    video_meta_data: dict, optional
+        Existing video meta information containing the `pts_time` and `keyframes` for a video
+        file, as stored in the alignments file. Providing this means that the video does not need
+        to be scanned before frames can be loaded from it. Default: ``None``
     """
-    def __init__(self, folder, count=None):
-        logger.debug("Initializing %s: (folder: '%s')", self.__class__.__name__, folder)
+    def __init__(self, folder, count=None, video_meta_data=None):
+        logger.debug("Initializing %s: (folder: '%s', count: %s, video_meta_data: %s)",
+                     self.__class__.__name__, folder, count, video_meta_data)
         logger.info("[%s DATA]", self.__class__.__name__.upper())
         self._count = count
+        self._video_meta_data = video_meta_data
         self.folder = folder
         self.vid_reader = self.check_input_folder()
         self.file_list_sorted = self.sorted_items()
@@ -105,7 +108,7 @@ class MediaLoader():
 
     def check_input_folder(self):
         """ makes sure that the frames or faces folder exists
-            If frames folder contains a video file return imageio reader object """
+            If frames folder contains a video file return a random access video reader """
         err = None
         loadtype = self.__class__.__name__
         if not self.folder:
@@ -121,9 +124,7 @@ class MediaLoader():
                 os.path.isfile(self.folder) and
                 os.path.splitext(self.folder)[1].lower() in _video_extensions):
             logger.verbose("Video exists at: '%s'", self.folder)
-            retval = cv2.VideoCapture(self.folder)  # pylint: disable=no-member
-            # TODO ImageIO single frame seek seems slow. Look into this
-            # retval = imageio.get_reader(self.folder, "ffmpeg")
+            retval = VideoFrameReader(self.folder, video_meta_data=self._video_meta_data)
         else:
             logger.verbose("Folder exists at '%s'", self.folder)
             retval = None
@@ -167,11 +168,7 @@ class MediaLoader():
         frame = os.path.splitext(filename)[0]
         logger.trace("Loading video frame: '%s'", frame)
         frame_no = int(frame[frame.rfind("_") + 1:]) - 1
-        self.vid_reader.set(cv2.CAP_PROP_POS_FRAMES, frame_no)  # pylint: disable=no-member
-        _, image = self.vid_reader.read()
-        # TODO imageio single frame seek seems slow. Look into this
-        # self.vid_reader.set_image_index(frame_no)
-        # image = self.vid_reader.get_next_data()[:, :, ::-1]
+        image = self.vid_reader.get_frame(frame_no)
         return image
 
     def stream(self, skip_list=None):
@@ -143,6 +143,11 @@ class DetectedFaces():
         """ Save the alignments file with the latest edits. """
         self._children["io"].save()
 
+    def close(self):
+        """ Write the edits that have been saved incrementally during this session into the
+        alignments file itself. Should be called when the Manual Tool exits. """
+        self._children["io"].close()
+
     def revert_to_saved(self, frame_index):
         """ Revert the frame's alignments to their saved version for the given frame index.
 
@@ -255,6 +260,7 @@ class _DiskIO():  # pylint:disable=too-few-public-methods
         self._tk_edited = detected_faces.tk_edited
         self._tk_face_count_changed = detected_faces.tk_face_count_changed
         self._globals = detected_faces._globals
+        self._is_backed_up = False
 
         # Must be populated after loading faces as video_meta_data may have increased frame count
         self._sorted_frame_names = None
@@ -276,7 +282,10 @@ class _DiskIO():  # pylint:disable=too-few-public-methods
 
     def save(self):
         """ Convert updated :class:`~lib.align.DetectedFace` objects to alignments format
-        and save the alignments file. """
+        and save the alignments file.
+
+        The original alignments file is backed up on the first save of the session. Subsequent
+        saves only append the updated frames to the alignments file's delta file. """
         if not self._tk_unsaved.get():
             logger.debug("Alignments not updated. Returning")
             return
@@ -286,12 +295,27 @@ class _DiskIO():  # pylint:disable=too-few-public-methods
         for idx, faces in zip(frames, np.array(self._frame_faces)[np.array(frames)]):
             frame = self._sorted_frame_names[idx]
             self._alignments.data[frame]["faces"] = [face.to_alignment() for face in faces]
+            self._alignments.data.mark_changed(frame)
 
-        self._alignments.backup()
-        self._alignments.save()
+        if not self._is_backed_up:
+            self._alignments.backup()
+            self._is_backed_up = True
+        self._alignments.save(incremental=True)
         self._updated_frame_indices.clear()
         self._tk_unsaved.set(False)
 
+    def close(self):
+        """ Perform a full save of the alignments file if any saves have been made this session.
+
+        Saves made whilst editing are only appended to the alignments file's delta file, so a
+        full save is made on exit to ensure that the alignments file holds all of the edits
+        without requiring its delta file. """
+        if not self._is_backed_up:
+            logger.debug("No saves made this session. Returning")
+            return
+        logger.info("Writing alignments file...")
+        self._alignments.save()
+
     def revert_to_saved(self, frame_index):
         """ Revert the frame's alignments to their saved version for the given frame index.
 
@@ -271,7 +271,10 @@ class Manual(tk.Tk):
         Launch the tkinter Visual Alignments Window and run main loop.
         """
         logger.debug("Launching mainloop")
-        self.mainloop()
+        try:
+            self.mainloop()
+        finally:
+            self._detected_faces.close()
 
 
 class _Options(ttk.Frame):  # pylint:disable=too-many-ancestors
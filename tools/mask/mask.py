@@ -9,7 +9,8 @@ import numpy as np
 from tqdm import tqdm
 
 from lib.align import Alignments, AlignedFace, DetectedFace, update_legacy_png_header
-from lib.image import FacesLoader, ImagesLoader, ImagesSaver, encode_image
+from lib.image import (FacesLoader, ImagesLoader, ImagesSaver, encode_image,
+                       read_image_meta_batch)
 
 from lib.multithreading import MultiThread
 from lib.utils import get_folder
@@ -157,7 +158,10 @@ class Mask():  # pylint:disable=too-few-public-methods
         logger.debug("args: %s", args)
         if self._update_type != "output":
             queue = args[0]
-        for filename, image, metadata in tqdm(self._loader.load(), total=self._loader.count):
+        if self._update_type == "missing":
+            self._skip_existing_faces()
+        for filename, image, metadata in tqdm(self._loader.load(),
+                                              total=self._loader.process_count):
             if not metadata:  # Legacy faces. Update the headers
                 if not log_once:
                     logger.warning("Legacy faces discovered. These faces will be updated")
@@ -245,6 +249,33 @@ class Mask():  # pylint:disable=too-few-public-methods
         if self._update_type != "output":
             queue.put("EOF")
 
+    def _skip_existing_faces(self):
+        """ Add faces which already have the requested mask in the alignments file to the
+        loader's skip list, so that their images are not loaded.
+
+        The face metadata is obtained from the face folder's index, so only faces that have not
+        previously been indexed are read from disk. Legacy faces, which do not contain metadata,
+        are not skipped so that their headers can be updated.
+        """
+        indices = {filename: idx for idx, filename in enumerate(self._loader.file_list)}
+        skip_list = []
+        for filename, metadata in tqdm(read_image_meta_batch(self._loader.file_list),
+                                       desc="Checking existing masks",
+                                       total=self._loader.count,
+                                       leave=False):
+            source = metadata.get("itxt", {}).get("source")
+            if source is None:
+                continue
+            frame_name = source["source_filename"]
+            face_index = source["face_index"]
+            alignment = self._alignments.get_faces_in_frame(frame_name)
+            if (face_index < len(alignment)
+                    and self._check_for_missing(frame_name, face_index, alignment[face_index])):
+                skip_list.append(indices[filename])
+        logger.debug("Skipping %s faces with existing masks", len(skip_list))
+        self._counts["face"] += len(skip_list)
+        self._loader.add_skip_list(skip_list)
+
     def _check_for_missing(self, frame, idx, alignment):
         """ Check if the alignment is missing the requested mask_type
 
@@ -6,7 +6,6 @@ import logging
 import os
 import sys
 import operator
-from concurrent import futures
 from shutil import copyfile
 
 import numpy as np
@@ -16,11 +15,15 @@ from tqdm import tqdm
 # faceswap imports
 from lib.serializer import get_serializer_from_filename
 from lib.align import AlignedFace, DetectedFace
-from lib.image import FacesLoader, read_image, read_image_meta_batch
-from lib.utils import FaceswapError
+from lib.image import read_image_meta_batch, read_image_stream
+from lib.multithreading import MultiThread
+from lib.utils import FaceswapError, get_image_paths
 from plugins.extract.recognition.vgg_face2_keras import VGGFace2 as VGGFace
 from plugins.extract.pipeline import Extractor, ExtractMedia
 
+from .sort_engines import (bhattacharyya_features, group_by_similarity, sort_by_similarity,
+                           sum_distances)
+
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
@@ -33,7 +36,7 @@ class Sort():
         self.changes = None
         self.serializer = None
         self._vgg_face = None
-        self._loader = FacesLoader(self._args.input_dir)
+        self._filenames = get_image_paths(self._args.input_dir)
 
     def process(self):
         """ Main processing function of the sort tool """
@@ -100,33 +103,112 @@ class Sort():
         face = DetectedFace(x=0, w=width, y=0, h=height)
         return ExtractMedia(filename, image, detected_faces=[face])
 
+    def _feed_aligner(self, extractor):
+        """ Stream the images into the aligner's input queue. Run in a background thread.
+
+        Parameters
+        ----------
+        extractor: :class:`plugins.extract.pipeline.Extractor`
+            The extractor to feed images to
+        """
+        load_queue = extractor.input_queue
+        for filename, image in read_image_stream(self._filenames):
+            if load_queue.shutdown.is_set():
+                logger.debug("Load Queue: Stop signal received. Terminating")
+                break
+            load_queue.put(self.alignment_dict(filename, image[..., :3]))
+        load_queue.put("EOF")
+
     def _get_landmarks(self):
-        """ Multi-threaded, parallel and sequentially ordered landmark loader """
-        extractor = self.launch_aligner()
-        filename_list, image_list = self._get_images()
-        feed_list = list(map(Sort.alignment_dict, filename_list, image_list))
-        landmarks = np.zeros((len(feed_list), 68, 2), dtype='float32')
+        """ Obtain the landmarks for each image from the aligner.
 
+        Images are streamed into the aligner from a background thread, so only the landmarks for
+        each image are held in memory.
+
+        Returns
+        -------
+        filenames: list
+            The filenames of the images that landmarks were obtained for
+        landmarks: :class:`numpy.ndarray`
+            The (`N`, 68, 2) landmarks for each image
+        """
+        extractor = self.launch_aligner()
         logger.info("Finding landmarks in images...")
-        # TODO thread the put to queue so we don't have to put and get at the same time
-        # Or even better, set up a proper background loader from disk (i.e. use lib.image.ImageIO)
-        for idx, feed in enumerate(tqdm(feed_list, desc="Aligning", file=sys.stdout)):
-            extractor.input_queue.put(feed)
-            landmarks[idx] = next(extractor.detected_faces()).detected_faces[0].landmarks_xy
-
-        return filename_list, image_list, landmarks
-
-    def _get_images(self):
-        """ Multi-threaded, parallel and sequentially ordered image loader """
-        logger.info("Loading images...")
-        filename_list = self.find_images(self._args.input_dir)
-        with futures.ThreadPoolExecutor() as executor:
-            image_list = list(tqdm(executor.map(read_image, filename_list),
-                                   desc="Loading Images",
-                                   file=sys.stdout,
-                                   total=len(filename_list)))
-
-        return filename_list, image_list
+        feeder = MultiThread(self._feed_aligner, extractor, thread_count=1)
+        feeder.start()
+
+        filenames = []
+        landmarks = np.empty((len(self._filenames), 68, 2), dtype="float32")
+        for extract_media in tqdm(extractor.detected_faces(),
+                                  desc="Aligning",
+                                  total=len(self._filenames),
+                                  file=sys.stdout):
+            landmarks[len(filenames)] = extract_media.detected_faces[0].landmarks_xy
+            filenames.append(extract_media.filename)
+        feeder.join()
+        return filenames, landmarks[:len(filenames)]
+
+    def _get_features(self, function, description, with_metadata=False):
+        """ Stream the images in the input folder through a bounded parallel decoder and obtain a
+        feature for each image. Only the features are held in memory.
+
+        Parameters
+        ----------
+        function: callable
+            The function to obtain the feature for an image. Takes the image, and the image's
+            metadata if :attr:`with_metadata` is ``True``, and returns a score or a
+            :class:`numpy.ndarray` feature. The feature must be the same shape for each image
+        description: str
+            The description to display in the progress bar
+        with_metadata: bool, optional
+            ``True`` to load each image's Faceswap metadata and pass it to :attr:`function`.
+            Default: ``False``
+
+        Returns
+        -------
+        filenames: list
+            The filenames of the images that features were obtained for
+        features: :class:`numpy.ndarray`
+            The feature for each image in :attr:`filenames`
+        """
+        filenames = []
+        features = None
+        for filename, image, *metadata in tqdm(read_image_stream(self._filenames,
+                                                                 with_metadata=with_metadata),
+                                               desc=description,
+                                               total=len(self._filenames),
+                                               file=sys.stdout,
+                                               leave=False):
+            feature = np.asarray(function(image, *metadata))
+            if features is None:
+                features = np.empty((len(self._filenames), *feature.shape), dtype=feature.dtype)
+            features[len(filenames)] = feature
+            filenames.append(filename)
+        if features is None:
+            features = np.empty((0, ), dtype="float32")
+        return filenames, features[:len(filenames)]
+
+    @staticmethod
+    def _check_metadata(metadata):
+        """ Check that an image has Faceswap alignment metadata.
+
+        Parameters
+        ----------
+        metadata: dict
+            The metadata read from the image
+
+        Raises
+        ------
+        FaceswapError
+            If the image does not contain any alignment data
+        """
+        if metadata:
+            return
+        msg = ("The images to be sorted do not contain alignment data. Images must have "
+               "been generated by Faceswap's Extract process.\nIf you are sorting an "
+               "older faceset, then you should re-extract the faces from your source "
+               "alignments file to generate this data.")
+        raise FaceswapError(msg)
 
     def sort_process(self):
         """
@@ -158,18 +240,13 @@ class Sort():
         logger.info("Sorting by average distance of landmarks...")
         filenames = []
         distances = []
-        filelist = [os.path.join(self._loader.location, fname)
-                    for fname in os.listdir(self._loader.location)
+        filelist = [os.path.join(self._args.input_dir, fname)
+                    for fname in os.listdir(self._args.input_dir)
                     if os.path.splitext(fname)[-1] == ".png"]
         for filename, metadata in tqdm(read_image_meta_batch(filelist),
                                        total=len(filelist),
                                        desc="Calculating Distances"):
-            if not metadata:
-                msg = ("The images to be sorted do not contain alignment data. Images must have "
-                       "been generated by Faceswap's Extract process.\nIf you are sorting an "
-                       "older faceset, then you should re-extract the faces from your source "
-                       "alignments file to generate this data.")
-                raise FaceswapError(msg)
+            self._check_metadata(metadata)
             alignments = metadata["itxt"]["alignments"]
             aligned_face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"))
             filenames.append(filename)
@@ -183,26 +260,20 @@ class Sort():
     def sort_blur(self):
         """ Sort by blur amount """
         logger.info("Sorting by estimated image blur...")
-
-        blurs = [(filename, self.estimate_blur(image, metadata))
-                 for filename, image, metadata in tqdm(self._loader.load(),
-                                                       desc="Estimating blur",
-                                                       total=self._loader.count,
-                                                       leave=False)]
+        filenames, blurs = self._get_features(self.estimate_blur,
+                                              "Estimating blur",
+                                              with_metadata=True)
         logger.info("Sorting...")
-        return sorted(blurs, key=lambda x: x[1], reverse=True)
+        return sorted(zip(filenames, blurs), key=lambda x: x[1], reverse=True)
 
     def sort_blur_fft(self):
         """ Sort by fft filtered blur amount with fft"""
         logger.info("Sorting by estimated fft filtered image blur...")
-
-        fft_blurs = [(filename, self.estimate_blur_fft(image, metadata))
-                     for filename, image, metadata in tqdm(self._loader.load(),
-                                                           desc="Estimating fft blur score",
-                                                           total=self._loader.count,
-                                                           leave=False)]
+        filenames, fft_blurs = self._get_features(self.estimate_blur_fft,
+                                                  "Estimating fft blur score",
+                                                  with_metadata=True)
         logger.info("Sorting...")
-        return sorted(fft_blurs, key=lambda x: x[1], reverse=True)
+        return sorted(zip(filenames, fft_blurs), key=lambda x: x[1], reverse=True)
 
     def sort_color(self):
         """ Score by channel average intensity """
@@ -210,19 +281,12 @@ class Sort():
         desired_channel = {'gray': 0, 'luma': 0, 'orange': 1, 'green': 2}
         method = self._args.color_method
         channel_to_sort = next(v for (k, v) in desired_channel.items() if method.endswith(k))
-        filename_list, image_list = self._get_images()
+        filename_list, averages = self._get_features(
+            lambda image: np.mean(image[..., :3], axis=(0, 1)),
+            "Averaging colors")
 
         logger.info("Converting to appropriate colorspace...")
-        same_size = all(img.size == image_list[0].size for img in image_list)
-        images = np.array(image_list, dtype='float32')[None, ...] if same_size else image_list
-        converted_images = self._convert_color(images, same_size, method)
-
-        logger.info("Scoring each image...")
-        if same_size:
-            scores = np.average(converted_images[0], axis=(1, 2))
-        else:
-            progress_bar = tqdm(converted_images, desc="Scoring", file=sys.stdout)
-            scores = np.array([np.average(image, axis=(0, 1)) for image in progress_bar])
+        scores = self._convert_color(averages, method)
 
         logger.info("Sorting...")
         matched_list = list(zip(filename_list, scores[:, channel_to_sort]))
@@ -232,72 +296,33 @@ class Sort():
     def sort_face(self):
         """ Sort by identity similarity """
         logger.info("Sorting by identity similarity...")
-        filenames = []
-        preds = []
-        for filename, image, metadata in tqdm(self._loader.load(),
-                                              desc="Classifying Faces",
-                                              total=self._loader.count,
-                                              leave=False):
-            if not metadata:
-                msg = ("The images to be sorted do not contain alignment data. Images must have "
-                       "been generated by Faceswap's Extract process.\nIf you are sorting an "
-                       "older faceset, then you should re-extract the faces from your source "
-                       "alignments file to generate this data.")
-                raise FaceswapError(msg)
-            alignments = metadata["alignments"]
-            face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"),
-                               image=image,
-                               centering="legacy",
-                               size=self._vgg_face.input_size,
-                               is_aligned=True).face
-            filenames.append(filename)
-            preds.append(self._vgg_face.predict(face))
-
+        filenames, preds = self._get_features(self._get_identity,
+                                              "Classifying Faces",
+                                              with_metadata=True)
         logger.info("Sorting by ward linkage...")
 
-        indices = self._vgg_face.sorted_similarity(np.array(preds), method="ward")
+        indices = self._vgg_face.sorted_similarity(preds, method="ward")
         img_list = np.array(filenames)[indices]
         return img_list
 
     def sort_face_cnn(self):
         """ Sort by landmark similarity """
         logger.info("Sorting by landmark similarity...")
-        filename_list, _, landmarks = self._get_landmarks()
+        filename_list, landmarks = self._get_landmarks()
         img_list = list(zip(filename_list, landmarks))
 
         logger.info("Comparing landmarks and sorting...")
-        img_list_len = len(img_list)
-        for i in tqdm(range(0, img_list_len - 1), desc="Comparing", file=sys.stdout):
-            min_score = float("inf")
-            j_min_score = i + 1
-            for j in range(i + 1, img_list_len):
-                fl1 = img_list[i][1]
-                fl2 = img_list[j][1]
-                score = np.sum(np.absolute((fl2 - fl1).flatten()))
-                if score < min_score:
-                    min_score = score
-                    j_min_score = j
-            (img_list[i + 1], img_list[j_min_score]) = (img_list[j_min_score], img_list[i + 1])
-        return img_list
+        indices = sort_by_similarity(landmarks, "cityblock")
+        return [img_list[idx] for idx in indices]
 
     def sort_face_cnn_dissim(self):
         """ Sort by landmark dissimilarity """
         logger.info("Sorting by landmark dissimilarity...")
-        filename_list, _, landmarks = self._get_landmarks()
-        scores = np.zeros(len(filename_list), dtype='float32')
-        img_list = list(list(items) for items in zip(filename_list, landmarks, scores))
+        filename_list, landmarks = self._get_landmarks()
 
         logger.info("Comparing landmarks...")
-        img_list_len = len(img_list)
-        for i in tqdm(range(0, img_list_len - 1), desc="Comparing", file=sys.stdout):
-            score_total = 0
-            for j in range(i + 1, img_list_len):
-                if i == j:
-                    continue
-                fl1 = img_list[i][1]
-                fl2 = img_list[j][1]
-                score_total += np.sum(np.absolute((fl2 - fl1).flatten()))
-            img_list[i][2] = score_total
+        scores = sum_distances(landmarks, "cityblock")
+        img_list = list(list(items) for items in zip(filename_list, landmarks, scores))
 
         logger.info("Sorting...")
         img_list = sorted(img_list, key=operator.itemgetter(2), reverse=True)
@@ -306,26 +331,9 @@ class Sort():
     def sort_face_yaw(self):
         """ Sort by estimated face yaw angle """
         logger.info("Sorting by estimated face yaw angle..")
-        filenames = []
-        yaws = []
-        for filename, image, metadata in tqdm(self._loader.load(),
-                                              desc="Classifying Faces",
-                                              total=self._loader.count,
-                                              leave=False):
-            if not metadata:
-                msg = ("The images to be sorted do not contain alignment data. Images must have "
-                       "been generated by Faceswap's Extract process.\nIf you are sorting an "
-                       "older faceset, then you should re-extract the faces from your source "
-                       "alignments file to generate this data.")
-                raise FaceswapError(msg)
-            alignments = metadata["alignments"]
-            aligned_face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"),
-                                       image=image,
-                                       centering="legacy",
-                                       is_aligned=True)
-            filenames.append(filename)
-            yaws.append(aligned_face.pose.yaw)
-
+        filenames, yaws = self._get_features(self._get_yaw,
+                                             "Classifying Faces",
+                                             with_metadata=True)
         logger.info("Sorting...")
         matched_list = list(zip(filenames, yaws))
         img_list = sorted(matched_list, key=operator.itemgetter(1), reverse=True)
@@ -336,76 +344,37 @@ class Sort():
         logger.info("Sorting by histogram similarity...")
 
         # TODO We have metadata here, so we can mask the face for hist sorting
-        img_list = [(filename, cv2.calcHist([image], [0], None, [256], [0, 256]))
-                    for filename, image, _ in tqdm(self._loader.load(),
-                                                   desc="Calculating histograms",
-                                                   total=self._loader.count,
-                                                   leave=False)]
+        filenames, histograms = self._get_features(self._get_histogram,
+                                                   "Calculating histograms")
 
         logger.info("Comparing histograms and sorting...")
-        img_list_len = len(img_list)
-        for i in tqdm(range(0, img_list_len - 1), desc="Comparing histograms", file=sys.stdout):
-            min_score = float("inf")
-            j_min_score = i + 1
-            for j in range(i + 1, img_list_len):
-                score = cv2.compareHist(img_list[i][1], img_list[j][1], cv2.HISTCMP_BHATTACHARYYA)
-                if score < min_score:
-                    min_score = score
-                    j_min_score = j
-            (img_list[i + 1], img_list[j_min_score]) = (img_list[j_min_score], img_list[i + 1])
-        return img_list
+        indices = sort_by_similarity(bhattacharyya_features(histograms), "bhattacharyya")
+        return [(filenames[idx], histograms[idx]) for idx in indices]
 
     def sort_hist_dissim(self):
         """ Sort by image histogram dissimilarity """
         logger.info("Sorting by histogram dissimilarity...")
 
         # TODO We have metadata here, so we can mask the face for hist sorting
-        img_list = [[filename, cv2.calcHist([image], [0], None, [256], [0, 256]), 0.0]
-                    for filename, image, _ in tqdm(self._loader.load(),
-                                                   desc="Calculating histograms",
-                                                   total=self._loader.count,
-                                                   leave=False)]
-
-        img_list_len = len(img_list)
-        for i in tqdm(range(0, img_list_len), desc="Comparing histograms", file=sys.stdout):
-            score_total = 0
-            for j in range(0, img_list_len):
-                if i == j:
-                    continue
-                score_total += cv2.compareHist(img_list[i][1],
-                                               img_list[j][1],
-                                               cv2.HISTCMP_BHATTACHARYYA)
-            img_list[i][2] = score_total
+        filenames, histograms = self._get_features(self._get_histogram,
+                                                   "Calculating histograms")
+
+        logger.info("Comparing histograms...")
+        scores = sum_distances(bhattacharyya_features(histograms), "bhattacharyya")
 
         logger.info("Sorting...")
+        img_list = [[filename, histogram, score]
+                    for filename, histogram, score in zip(filenames, histograms, scores)]
         return sorted(img_list, key=lambda x: x[2], reverse=True)
 
     def sort_size(self):
         """ Sort the faces by largest face (in original frame) to smallest """
         logger.info("Sorting by original face size...")
-        img_list = []
-        for filename, image, metadata in tqdm(self._loader.load(),
-                                              desc="Calculating face sizes",
-                                              total=self._loader.count,
-                                              leave=False):
-            if not metadata:
-                msg = ("The images to be sorted do not contain alignment data. Images must have "
-                       "been generated by Faceswap's Extract process.\nIf you are sorting an "
-                       "older faceset, then you should re-extract the faces from your source "
-                       "alignments file to generate this data.")
-                raise FaceswapError(msg)
-            alignments = metadata["alignments"]
-            aligned_face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"),
-                                       image=image,
-                                       centering="legacy",
-                                       is_aligned=True)
-            roi = aligned_face.original_roi
-            size = ((roi[1][0] - roi[0][0]) ** 2 +  # pylint:disable=unsubscriptable-object
-                    (roi[1][1] - roi[0][1]) ** 2) ** 0.5  # pylint:disable=unsubscriptable-object
-            img_list.append((filename, size))
-
+        filenames, sizes = self._get_features(self._get_size,
+                                              "Calculating face sizes",
+                                              with_metadata=True)
         logger.info("Sorting...")
-        return sorted(img_list, key=lambda x: x[1], reverse=True)
+        return sorted(zip(filenames, sizes), key=lambda x: x[1], reverse=True)
 
     def sort_black_pixels(self):
         """ Sort by percentage of black pixels
@@ -413,19 +382,117 @@ class Sort():
          Calculates the sum of black pixels, get the percentage X 3 channels
         """
         logger.info("Sorting by percentage of black pixels...")
-        img_list = [(filename, np.ndarray.all(image == [0, 0, 0], axis=2).sum()/image.size*100*3)
-                    for filename, image, _ in tqdm(self._loader.load(),
-                                                   desc="Calculating black pixels",
-                                                   total=self._loader.count,
-                                                   leave=False)]
-        img_list_len = len(img_list)
-        for i in tqdm(range(0, img_list_len - 1), desc="Comparing black pixels", file=sys.stdout):
-            for j in range(0, img_list_len-i-1):
-                if img_list[j][1] > img_list[j+1][1]:
-                    temp = img_list[j]
-                    img_list[j] = img_list[j+1]
-                    img_list[j+1] = temp
-        return img_list
+        filenames, black_pixels = self._get_features(self._get_black_pixels,
+                                                     "Calculating black pixels")
+        logger.info("Sorting...")
+        return sorted(zip(filenames, black_pixels), key=lambda x: x[1])
+
+    # Per image features
+    def _get_identity(self, image, metadata):
+        """ Obtain the VGG Face identity encoding for a face.
+
+        Parameters
+        ----------
+        image: :class:`numpy.ndarray`
+            The face image
+        metadata: dict
+            The Faceswap metadata for the face
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The identity encoding for the face
+        """
+        self._check_metadata(metadata)
+        alignments = metadata["alignments"]
+        face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"),
+                           image=image,
+                           centering="legacy",
+                           size=self._vgg_face.input_size,
+                           is_aligned=True).face
+        return self._vgg_face.predict(face)
+
+    @classmethod
+    def _get_yaw(cls, image, metadata):
+        """ Obtain the yaw of a face.
+
+        Parameters
+        ----------
+        image: :class:`numpy.ndarray`
+            The face image
+        metadata: dict
+            The Faceswap metadata for the face
+
+        Returns
+        -------
+        float
+            The yaw of the face
+        """
+        cls._check_metadata(metadata)
+        alignments = metadata["alignments"]
+        aligned_face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"),
+                                   image=image,
+                                   centering="legacy",
+                                   is_aligned=True)
+        return aligned_face.pose.yaw
+
+    @classmethod
+    def _get_size(cls, image, metadata):
+        """ Obtain the size of a face in its original frame.
+
+        Parameters
+        ----------
+        image: :class:`numpy.ndarray`
+            The face image
+        metadata: dict
+            The Faceswap metadata for the face
+
+        Returns
+        -------
+        float
+            The diagonal length of the face's bounding box in the original frame
+        """
+        cls._check_metadata(metadata)
+        alignments = metadata["alignments"]
+        aligned_face = AlignedFace(np.array(alignments["landmarks_xy"], dtype="float32"),
+                                   image=image,
+                                   centering="legacy",
+                                   is_aligned=True)
+        roi = aligned_face.original_roi
+        return ((roi[1][0] - roi[0][0]) ** 2 +  # pylint:disable=unsubscriptable-object
+                (roi[1][1] - roi[0][1]) ** 2) ** 0.5  # pylint:disable=unsubscriptable-object
+
+    @staticmethod
+    def _get_histogram(image):
+        """ Obtain the histogram of the first channel of an image.
+
+        Parameters
+        ----------
+        image: :class:`numpy.ndarray`
+            The face image
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (256, 1) histogram for the image
+        """
+        return cv2.calcHist([image], [0], None, [256], [0, 256])
+
+    @staticmethod
+    def _get_black_pixels(image):
+        """ Obtain the percentage of black pixels in an image, multiplied by 3.
+
+        Parameters
+        ----------
+        image: :class:`numpy.ndarray`
+            The face image
+
+        Returns
+        -------
+        float
+            The percentage of black pixels in the image multiplied by 3
+        """
+        return np.ndarray.all(image == [0, 0, 0], axis=2).sum() / image.size * 100 * 3
 
     # Methods for grouping
     def group_blur(self, img_list):
@@ -480,46 +547,15 @@ class Sort():
         """ Group into bins by CNN face similarity """
         logger.info("Grouping by face-cnn similarity...")
 
-        # Groups are of the form: group_num -> reference faces
-        reference_groups = dict()
-
-        # Bins array, where index is the group number and value is
-        # an array containing the file paths to the images in that group.
-        bins = []
-
         # Comparison threshold used to decide how similar
         # faces have to be to be grouped together.
         # It is multiplied by 1000 here to allow the cli option to use smaller
         # numbers.
         min_threshold = self._args.min_threshold * 1000
 
-        img_list_len = len(img_list)
-
-        for i in tqdm(range(0, img_list_len - 1),
-                      desc="Grouping",
-                      file=sys.stdout):
-            fl1 = img_list[i][1]
-
-            current_best = [-1, float("inf")]
-
-            for key, references in reference_groups.items():
-                try:
-                    score = self.get_avg_score_faces_cnn(fl1, references)
-                except TypeError:
-                    score = float("inf")
-                except ZeroDivisionError:
-                    score = float("inf")
-                if score < current_best[1]:
-                    current_best[0], current_best[1] = key, score
-
-            if current_best[1] < min_threshold:
-                reference_groups[current_best[0]].append(fl1[0])
-                bins[current_best[0]].append(img_list[i][0])
-            else:
-                reference_groups[len(reference_groups)] = [img_list[i][1]]
-                bins.append([img_list[i][0]])
-
-        return bins
+        landmarks = np.array([item[1] for item in img_list], dtype="float32")
+        bins = group_by_similarity(landmarks, min_threshold, "cityblock")
+        return [[img_list[idx][0] for idx in _bin] for _bin in bins]
 
     def group_face_yaw(self, img_list):
         """ Group into bins by yaw of face """
@@ -568,36 +604,9 @@ class Sort():
         """ Group into bins by histogram """
         logger.info("Grouping by histogram...")
 
-        # Groups are of the form: group_num -> reference histogram
-        reference_groups = dict()
-
-        # Bins array, where index is the group number and value is
-        # an array containing the file paths to the images in that group
-        bins = []
-
-        min_threshold = self._args.min_threshold
-
-        img_list_len = len(img_list)
-        reference_groups[0] = [img_list[0][1]]
-        bins.append([img_list[0][0]])
-
-        for i in tqdm(range(1, img_list_len),
-                      desc="Grouping",
-                      file=sys.stdout):
-            current_best = [-1, float("inf")]
-            for key, value in reference_groups.items():
-                score = self.get_avg_score_hist(img_list[i][1], value)
-                if score < current_best[1]:
-                    current_best[0], current_best[1] = key, score
-
-            if current_best[1] < min_threshold:
-                reference_groups[current_best[0]].append(img_list[i][1])
-                bins[current_best[0]].append(img_list[i][0])
-            else:
-                reference_groups[len(reference_groups)] = [img_list[i][1]]
-                bins.append([img_list[i][0]])
-
-        return bins
+        features = bhattacharyya_features([item[1] for item in img_list])
+        bins = group_by_similarity(features, self._args.min_threshold, "bhattacharyya")
+        return [[img_list[idx][0] for idx in _bin] for _bin in bins]
 
     # Final process methods
     def final_process_rename(self, img_list):
@@ -700,33 +709,25 @@ class Sort():
         """
         logger.info("Preparing to group...")
         if group_method == 'group_blur':
-            filename_list, image_list = self._get_images()
-            blurs = [self.estimate_blur(img) for img in image_list]
-            temp_list = list(zip(filename_list, blurs))
+            filename_list, values = self._get_features(self.estimate_blur, "Estimating blur")
         elif group_method == 'group_blur_fft':
-            filename_list, image_list = self._get_images()
-            fft_blurs = [self.estimate_blur_fft(img) for img in image_list]
-            temp_list = list(zip(filename_list, fft_blurs))
+            filename_list, values = self._get_features(self.estimate_blur_fft,
+                                                       "Estimating fft blur score")
         elif group_method == 'group_face_cnn':
-            filename_list, image_list, landmarks = self._get_landmarks()
-            temp_list = list(zip(filename_list, landmarks))
+            filename_list, values = self._get_landmarks()
         elif group_method == 'group_face_yaw':
-            filename_list, image_list, landmarks = self._get_landmarks()
-            yaws = [self.calc_landmarks_face_yaw(mark) for mark in landmarks]
-            temp_list = list(zip(filename_list, yaws))
+            filename_list, landmarks = self._get_landmarks()
+            values = [self.calc_landmarks_face_yaw(mark) for mark in landmarks]
         elif group_method == 'group_hist':
-            filename_list, image_list = self._get_images()
-            histograms = [cv2.calcHist([img], [0], None, [256], [0, 256]) for img in image_list]
-            temp_list = list(zip(filename_list, histograms))
+            filename_list, values = self._get_features(self._get_histogram,
+                                                       "Calculating histograms")
         elif group_method == 'group_black_pixels':
-            filename_list, image_list = self._get_images()
-            black_pixels = [np.ndarray.all(img == [0, 0, 0], axis=2).sum()/img.size*100*3
-                            for img in image_list]
-            temp_list = list(zip(filename_list, black_pixels))
+            filename_list, values = self._get_features(self._get_black_pixels,
+                                                       "Calculating black pixels")
         else:
             raise ValueError("{} group_method not found.".format(group_method))
 
-        return self.splice_lists(img_list, temp_list)
+        return self.splice_lists(img_list, list(zip(filename_list, values)))
 
     @staticmethod
     def _near_split(bin_range, num_bins):
@@ -754,25 +755,29 @@ class Sort():
         return bins
 
     @staticmethod
-    def _convert_color(imgs, same_size, method):
-        """ Helper function to convert color spaces """
+    def _convert_color(averages, method):
+        """ Helper function to convert average BGR colors to the requested color space.
 
-        if method.endswith('gray'):
-            conversion = np.array([[0.0722], [0.7152], [0.2126]])
-        else:
-            conversion = np.array([[0.25, 0.5, 0.25], [-0.5, 0.0, 0.5], [-0.25, 0.5, -0.25]])
+        The color space conversions are linear, so converting the average color of an image
+        gives the same result as averaging the image after converting each of its pixels.
 
-        if same_size:
-            path = 'greedy'
-            operation = 'bijk, kl -> bijl' if method.endswith('gray') else 'bijl, kl -> bijk'
-        else:
-            operation = 'ijk, kl -> ijl' if method.endswith('gray') else 'ijl, kl -> ijk'
-            path = np.einsum_path(operation, imgs[0][..., :3], conversion, optimize='optimal')[0]
+        Parameters
+        ----------
+        averages: :class:`numpy.ndarray`
+            The (`N`, 3) average BGR color of each image
+        method: str
+            The color sort method in use
 
-        progress_bar = tqdm(imgs, desc="Converting", file=sys.stdout)
-        images = [np.einsum(operation, img[..., :3], conversion, optimize=path).astype('float32')
-                  for img in progress_bar]
-        return images
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            The (`N`, `channels`) average color of each image in the requested color space
+        """
+        if method.endswith('gray'):
+            conversion = np.array([[0.0722], [0.7152], [0.2126]])
+            return averages @ conversion
+        conversion = np.array([[0.25, 0.5, 0.25], [-0.5, 0.0, 0.5], [-0.25, 0.5, -0.25]])
+        return averages @ conversion.T
 
     @staticmethod
     def splice_lists(sorted_list, new_vals_list):
@@ -791,27 +796,14 @@ class Sort():
         but the values corresponding to each image are from new_vals_list.
         """
         new_list = []
-        # Make new list of just image paths to serve as an index
-        val_index_list = [i[0] for i in new_vals_list]
+        # Index the new values by image path
+        new_vals = dict(new_vals_list)
         for i in tqdm(range(len(sorted_list)), desc="Splicing", file=sys.stdout):
             current_img = sorted_list[i] if isinstance(sorted_list[i], str) else sorted_list[i][0]
-            new_val_index = val_index_list.index(current_img)
-            new_list.append([current_img, new_vals_list[new_val_index][1]])
+            new_list.append([current_img, new_vals[current_img]])
 
         return new_list
 
-    @staticmethod
-    def find_images(input_dir):
-        """ Return list of images at specified location """
-        result = []
-        extensions = [".jpg", ".png", ".jpeg"]
-        for root, _, files in os.walk(input_dir):
-            for file in files:
-                if os.path.splitext(file)[1].lower() in extensions:
-                    result.append(os.path.join(root, file))
-            break
-        return result
-
     @classmethod
     def estimate_blur(cls, image, metadata=None):
         """ Estimate the amount of blur an image has with the variance of the Laplacian.
@@ -981,23 +973,3 @@ class Sort():
                     '{:05d}{}'.format(i, os.path.splitext(src_basename)[1]))
                 return src, dst
         return renaming
-
-    @staticmethod
-    def get_avg_score_hist(img1, references):
-        """ Return the average histogram score between a face and
-            reference image """
-        scores = []
-        for img2 in references:
-            score = cv2.compareHist(img1, img2, cv2.HISTCMP_BHATTACHARYYA)
-            scores.append(score)
-        return sum(scores) / len(scores)
-
-    @staticmethod
-    def get_avg_score_faces_cnn(fl1, references):
-        """ Return the average CNN similarity score
-            between a face and reference image """
-        scores = []
-        for fl2 in references:
-            score = np.sum(np.absolute((fl2 - fl1).flatten()))
-            scores.append(score)
-        return sum(scores) / len(scores)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+""" Vectorized similarity engines for the sort tool.
+
+Sorting and grouping faces by landmark or histogram similarity requires comparing every face
+with many other faces. Rather than comparing each pair of faces in Python, the functions in
+this module operate on a 2D array holding one feature vector per face, and use a spatial index,
+chunked distance matrices or bin centroids so that the work is done inside compiled code and
+peak memory remains bounded regardless of the number of faces being sorted.
+
+Two metrics are supported:
+
+    * ``"cityblock"`` - The sum of the absolute differences between two feature vectors. Used
+      for comparing face landmarks.
+    * ``"bhattacharyya"`` - The Bhattacharyya distance between two histograms, as calculated by
+      :func:`cv2.compareHist` with ``cv2.HISTCMP_BHATTACHARYYA``. Histograms should be passed
+      through :func:`bhattacharyya_features` prior to being handed to any of the engines. This
+      maps each histogram to a point where the Euclidean distance between two points is
+      proportional to the Bhattacharyya distance between their histograms.
+"""
+import logging
+import sys
+
+import numpy as np
+from scipy.spatial import cKDTree
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+_CHUNK_BYTES = 64 * 1024 * 1024  # Maximum size of each chunk of a pairwise distance matrix
+
+
+def bhattacharyya_features(histograms):
+    """ Convert histograms into feature vectors for the ``"bhattacharyya"`` metric.
+
+    Each histogram is normalized to sum to 1 and then square rooted. The Bhattacharyya distance
+    between two histograms is then the Euclidean distance between their feature vectors divided
+    by the square root of 2.
+
+    Parameters
+    ----------
+    histograms: :class:`numpy.ndarray` or list
+        The histograms to convert. The first dimension should be the number of histograms. Any
+        further dimensions are flattened
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The (`number of histograms`, `number of bins`) feature vectors as float64
+    """
+    features = np.array(histograms, dtype="float64").reshape(len(histograms), -1)
+    totals = features.sum(axis=1, keepdims=True)
+    np.divide(features, totals, out=features, where=totals != 0)
+    return np.sqrt(features, out=features)
+
+
+def _get_chunk_size(rows, columns, itemsize=8):
+    """ Obtain the number of rows of a pairwise distance matrix to calculate at a time to keep
+    within the chunk memory limit.
+
+    Parameters
+    ----------
+    rows: int
+        The total number of rows in the distance matrix
+    columns: int
+        The number of columns in the distance matrix
+    itemsize: int, optional
+        The number of bytes held by each distance. Default: `8`
+
+    Returns
+    -------
+    int
+        The number of rows to process in each chunk
+    """
+    return int(max(1, min(rows, _CHUNK_BYTES // max(1, columns * itemsize))))
+
+
+def sort_by_similarity(features, metric):
+    """ Order the items so that each item is followed by its most similar remaining item.
+
+    Starting from the first item, the nearest item that has not already been placed is found
+    from a KD-Tree and appended to the chain. Points that have been placed are not removed from
+    the tree, rather more neighbours are requested if all of the returned neighbours have already
+    been placed, and the tree is rebuilt from the remaining points once half of the points it
+    holds have been placed.
+
+    For the ``"bhattacharyya"`` metric the features are first rotated onto their principal axes.
+    This does not change the distance between any two points, but lets the tree split the data
+    along the directions in which it actually varies, which significantly speeds up each query.
+
+    Parameters
+    ----------
+    features: :class:`numpy.ndarray`
+        The (`number of items`, `feature length`) feature vectors for each item
+    metric: ["cityblock", "bhattacharyya"]
+        The distance metric to compare the items with
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The indices of the items in sorted order
+    """
+    features = np.asarray(features, dtype="float64").reshape(len(features), -1)
+    num_items = features.shape[0]
+    logger.debug("Sorting by similarity: (items: %s, metric: '%s')", num_items, metric)
+    order = np.empty((num_items, ), dtype="int64")
+    if num_items == 0:
+        return order
+    p_norm = 1 if metric == "cityblock" else 2
+    if p_norm == 2:
+        features = _rotate_to_principal_axes(features)
+    placed = np.zeros((num_items, ), dtype="bool")
+    min_neighbours = 8
+
+    current = 0
+    order[0] = current
+    placed[current] = True
+    tree_indices = np.arange(num_items)
+    tree = cKDTree(features)
+    tree_placed = 1
+    neighbours = min_neighbours
+
+    for position in tqdm(range(1, num_items), desc="Comparing", file=sys.stdout, leave=False):
+        if tree_placed * 2 > len(tree_indices):
+            tree_indices = np.flatnonzero(~placed)
+            tree = cKDTree(features[tree_indices])
+            tree_placed = 0
+            neighbours = min_neighbours
+        while True:
+            count = min(neighbours, len(tree_indices))
+            _, indices = tree.query(features[current], k=count, p=p_norm)
+            candidates = tree_indices[np.atleast_1d(indices)]
+            candidates = candidates[~placed[candidates]]
+            if candidates.size:
+                break
+            neighbours *= 2
+        neighbours = max(min_neighbours, neighbours // 2)
+
+        current = candidates[0]
+        order[position] = current
+        placed[current] = True
+        tree_placed += 1
+    return order
+
+
+def _rotate_to_principal_axes(features):
+    """ Rotate feature vectors onto the principal axes of their distribution.
+
+    Parameters
+    ----------
+    features: :class:`numpy.ndarray`
+        The (`number of items`, `feature length`) feature vectors for each item
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The rotated feature vectors. Euclidean distances between the vectors are preserved
+    """
+    centered = features - features.mean(axis=0)
+    _, axes = np.linalg.eigh(centered.T @ centered)
+    return centered @ axes[:, ::-1]
+
+
+def sum_distances(features, metric):
+    """ Obtain the sum of the distances between each item and every other item.
+
+    For the ``"cityblock"`` metric, the sum is calculated independently for each feature from
+    the sorted feature values and their cumulative sum. For the ``"bhattacharyya"`` metric, the
+    pairwise distance matrix is calculated in chunks of rows.
+
+    Parameters
+    ----------
+    features: :class:`numpy.ndarray`
+        The (`number of items`, `feature length`) feature vectors for each item
+    metric: ["cityblock", "bhattacharyya"]
+        The distance metric to compare the items with
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The total distance from each item to every other item
+    """
+    features = np.asarray(features, dtype="float64").reshape(len(features), -1)
+    logger.debug("Summing distances: (items: %s, metric: '%s')", features.shape[0], metric)
+    if metric == "cityblock":
+        return _sum_cityblock(features)
+    return _sum_bhattacharyya(features)
+
+
+def _sum_cityblock(features):
+    """ Obtain the sum of the cityblock distances between each item and every other item.
+
+    Parameters
+    ----------
+    features: :class:`numpy.ndarray`
+        The (`number of items`, `feature length`) feature vectors for each item
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The total cityblock distance from each item to every other item
+    """
+    num_items = features.shape[0]
+    retval = np.zeros((num_items, ), dtype="float64")
+    ranks = np.arange(num_items, dtype="float64")
+    for column in tqdm(features.T, desc="Comparing", file=sys.stdout, leave=False):
+        order = np.argsort(column, kind="stable")
+        values = column[order]
+        below = np.cumsum(values) - values  # Sum of the values sorted before each value
+        above = values.sum() - below - values  # Sum of the values sorted after each value
+        retval[order] += (values * ranks - below) + (above - values * (num_items - ranks - 1))
+    return retval
+
+
+def _sum_bhattacharyya(features):
+    """ Obtain the sum of the Bhattacharyya distances between each item and every other item.
+
+    Parameters
+    ----------
+    features: :class:`numpy.ndarray`
+        The (`number of items`, `feature length`) feature vectors for each item, as returned from
+        :func:`bhattacharyya_features`
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The total Bhattacharyya distance from each item to every other item
+    """
+    num_items = features.shape[0]
+    retval = np.empty((num_items, ), dtype="float64")
+    chunk_size = _get_chunk_size(num_items, num_items)
+    for start in tqdm(range(0, num_items, chunk_size),
+                      desc="Comparing",
+                      file=sys.stdout,
+                      leave=False):
+        end = min(num_items, start + chunk_size)
+        distances = features[start:end] @ features.T
+        np.subtract(1.0, distances, out=distances)
+        np.maximum(distances, 0.0, out=distances)
+        np.sqrt(distances, out=distances)
+        distances[np.arange(end - start), np.arange(start, end)] = 0.0
+        retval[start:end] = distances.sum(axis=1)
+    return retval
+
+
+def group_by_similarity(features, threshold, metric):
+    """ Group items into bins of similar items.
+
+    Each item, in order, is compared with the centroid of each existing bin, and placed into the
+    bin with the closest centroid if the distance to that centroid is below the given threshold.
+    Otherwise a new bin is created for the item.
+
+    For the ``"cityblock"`` metric the distance to a centroid is the cityblock distance to the
+    mean of the bin's feature vectors. For the ``"bhattacharyya"`` metric, the distance is the
+    root mean square Bhattacharyya distance between the item and each member of the bin, which
+    can be calculated exactly from the bin's centroid.
+
+    Parameters
+    ----------
+    features: :class:`numpy.ndarray`
+        The (`number of items`, `feature length`) feature vectors for each item
+    threshold: float
+        The distance below which an item will be placed into an existing bin
+    metric: ["cityblock", "bhattacharyya"]
+        The distance metric to compare the items with
+
+    Returns
+    -------
+    list
+        A list of bins, with each bin being a list of the indices of the items within the bin
+    """
+    features = np.asarray(features, dtype="float64").reshape(len(features), -1)
+    logger.debug("Grouping by similarity: (items: %s, threshold: %s, metric: '%s')",
+                 features.shape[0], threshold, metric)
+    bins = []
+    totals = np.empty((min(64, max(1, features.shape[0])), features.shape[1]), dtype="float64")
+    counts = np.empty((totals.shape[0], ), dtype="float64")
+
+    for idx, feature in enumerate(tqdm(features, desc="Grouping", file=sys.stdout)):
+        num_bins = len(bins)
+        if num_bins:
+            centroids = totals[:num_bins] / counts[:num_bins, None]
+            if metric == "cityblock":
+                scores = np.abs(centroids - feature).sum(axis=1)
+            else:
+                scores = np.sqrt(np.maximum(1.0 - centroids @ feature, 0.0))
+            best = int(np.argmin(scores))
+            if scores[best] < threshold:
+                bins[best].append(idx)
+                totals[best] += feature
+                counts[best] += 1
+                continue
+
+        if num_bins == totals.shape[0]:
+            totals = np.concatenate([totals, np.empty_like(totals)])
+            counts = np.concatenate([counts, np.empty_like(counts)])
+        bins.append([idx])
+        totals[num_bins] = feature
+        counts[num_bins] = 1
+    logger.debug("Grouped into %s bins", len(bins))
+    return bins